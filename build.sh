@@ -1,5 +1,6 @@
 #!/usr/bin/env bash
 # Build script for Render deployment
+set -o errexit
 
 echo "🚀 Building ACTS - Accountability & Corruption Tracking System..."
 
@@ -7,6 +8,10 @@ echo "🚀 Building ACTS - Accountability & Corruption Tracking System..."
 echo "📦 Installing Python dependencies..."
 pip install -r requirements.txt
 
+# Co-bidding detection, the similarity index and the network graph need NumPy and SciPy;
+# fail here rather than in production
+python -c "import numpy, scipy.sparse"
+
 # Collect static files
 echo "📁 Collecting static files..."
 python manage.py collectstatic --noinput
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import District, TenderCategory, Organization, Tender, TenderBid, RiskScore
+from .models import (
+    District, TenderCategory, Organization, OrganizationMerge, Tender, TenderBid, RiskScore,
+    RiskAnalysisJob,
+)
 
 
 @admin.register(District)
@@ -25,6 +28,18 @@ class OrganizationAdmin(admin.ModelAdmin):
     ordering = ('name',)
 
 
+@admin.register(OrganizationMerge)
+class OrganizationMergeAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'registration_number', 'organization', 'method', 'score', 'status', 'imported_as',
+        'created_at',
+    )
+    list_filter = ('status', 'method')
+    search_fields = ('name', 'registration_number', 'organization__name')
+    ordering = ('-created_at',)
+    readonly_fields = ('normalized_name', 'method', 'score', 'imported_as', 'created_at')
+
+
 @admin.register(Tender)
 class TenderAdmin(admin.ModelAdmin):
     list_display = ('tender_id', 'title', 'buyer', 'status', 'estimated_value', 'publication_date')
@@ -88,3 +103,11 @@ class RiskScoreAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(RiskAnalysisJob)
+class RiskAnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'mode', 'tenders_scored', 'tenders_total', 'created_at', 'finished_at')
+    list_filter = ('status', 'mode')
+    ordering = ('-created_at',)
+    readonly_fields = ('results', 'error', 'started_at', 'heartbeat_at', 'finished_at')
@@ -18,7 +18,10 @@ urlpatterns = [
     path('analytics/summary/', api_views.AnalyticsSummaryView.as_view(), name='analytics-summary'),
     path('analytics/district-risks/', api_views.DistrictRiskView.as_view(), name='district-risks'),
     path('analytics/run-analysis/', api_views.RunRiskAnalysisView.as_view(), name='run-analysis'),
+    path('analytics/run-analysis/<int:job_id>/', api_views.RiskAnalysisJobView.as_view(), name='run-analysis-status'),
     path('analytics/network-stats/', api_views.NetworkStatsView.as_view(), name='network-stats'),
+    path('analytics/cobidding/', api_views.CoBiddingView.as_view(), name='cobidding'),
+    path('analytics/network-export/', api_views.NetworkExportView.as_view(), name='network-export'),
     
     # Export endpoints
     path('export/tenders/', api_views.ExportTendersView.as_view(), name='export-tenders'),
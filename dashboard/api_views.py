@@ -1,15 +1,22 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Count, Avg, Q
-from .models import District, TenderCategory, Organization, Tender, RiskScore
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from .models import (
+    District, TenderCategory, Organization, Tender, RiskScore, RiskAnalysisJob, OrganizationSimilarity
+)
 from .serializers import (
     DistrictSerializer, TenderCategorySerializer, OrganizationSerializer,
     TenderListSerializer, TenderDetailSerializer, RiskScoreSerializer,
-    DistrictRiskSerializer, AnalyticsSummarySerializer
+    DistrictRiskSerializer, AnalyticsSummarySerializer, RiskAnalysisJobSerializer
 )
-from data_analysis.risk_analyzer import RiskAnalyzer, NetworkAnalyzer
+from data_analysis.graph_export import GraphExporter
+from data_analysis.network_cache import network_snapshots
+from data_analysis.risk_analyzer import NetworkAnalyzer
 
 
 class DistrictViewSet(viewsets.ReadOnlyModelViewSet):
@@ -29,6 +36,42 @@ class OrganizationViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Organization.objects.select_related('district')
     serializer_class = OrganizationSerializer
     filterset_fields = ['organization_type', 'district', 'is_active']
+    
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Most similar buyers and/or suppliers from the precomputed similarity index"""
+        organization = self.get_object()
+        projections = {
+            'buyer': ['buyer'], 'supplier': ['supplier'], 'both': ['buyer', 'supplier'],
+        }[organization.organization_type]
+        if 'projection' in request.query_params:
+            projections = [request.query_params['projection']]
+            if projections[0] not in dict(OrganizationSimilarity.PROJECTION_CHOICES):
+                return Response({'error': 'projection must be buyer or supplier'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', NetworkAnalyzer.SIMILAR_TOP_N))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'limit must be a positive integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        neighbours = OrganizationSimilarity.objects.filter(
+            organization=organization, projection__in=projections, rank__lte=limit
+        ).select_related('similar').order_by('projection', 'rank')
+        similar = {projection: [] for projection in projections}
+        for item in neighbours:
+            similar[item.projection].append({
+                'organization_id': item.similar_id,
+                'name': item.similar.name,
+                'organization_type': item.similar.organization_type,
+                'rank': item.rank,
+                'shared_counterparties': item.shared,
+                'jaccard': item.jaccard,
+                'overlap': item.overlap,
+            })
+        return Response({'organization_id': organization.id, 'similar': similar})
 
 
 class TenderViewSet(viewsets.ReadOnlyModelViewSet):
@@ -115,13 +158,23 @@ class DistrictRiskView(APIView):
 
 
 class RunRiskAnalysisView(APIView):
-    """API endpoint to run risk analysis"""
+    """API endpoint to queue a risk analysis run"""
     
     def post(self, request):
+        mode = request.data.get('mode', 'incremental')
+        if mode not in dict(RiskAnalysisJob.MODE_CHOICES):
+            return Response(
+                {'error': f'Unknown mode: {mode}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         try:
-            analyzer = RiskAnalyzer()
-            results = analyzer.analyze_all_tenders()
-            return Response(results, status=status.HTTP_200_OK)
+            # An already queued or running job is returned instead of a new one
+            job, created = RiskAnalysisJob.enqueue(mode)
+            return Response(
+                RiskAnalysisJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -129,18 +182,109 @@ class RunRiskAnalysisView(APIView):
             )
 
 
+class RiskAnalysisJobView(APIView):
+    """API endpoint for risk analysis job progress"""
+    
+    def get(self, request, job_id):
+        job = get_object_or_404(RiskAnalysisJob, pk=job_id)
+        return Response(RiskAnalysisJobSerializer(job).data)
+
+
+def snapshot_building_response():
+    """503 for network endpoints until the worker has built the first snapshot"""
+    return Response(
+        {'error': 'The network snapshot is still being built', 'status': 'building'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '30'},
+    )
+
+
 class NetworkStatsView(APIView):
     """API endpoint for network statistics"""
     
+    PATTERN_PARAMS = (
+        'limit', 'sort', 'min_connections', 'min_tenders', 'suppliers_cursor', 'relationships_cursor'
+    )
+    
     def get(self, request):
         try:
-            network_analyzer = NetworkAnalyzer()
-            stats = network_analyzer.get_network_stats()
-            patterns = network_analyzer.find_suspicious_patterns()
+            # Served from the cached snapshot; a stale one while the worker rebuilds it
+            snapshot, is_current = network_snapshots.get()
+            if snapshot is None:
+                return snapshot_building_response()
+            
+            stats = snapshot.stats
+            if request.query_params.get('exact') in ('1', 'true') and not stats.get('exact', True):
+                # The snapshot holds estimates for a large graph; compute the exact numbers now
+                stats = NetworkAnalyzer().get_network_stats(exact=True)
+            
+            patterns = snapshot.patterns
+            if any(param in request.query_params for param in self.PATTERN_PARAMS):
+                # Other pages, orders or thresholds are read from the pattern indexes
+                try:
+                    patterns = self.pattern_page(request.query_params)
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
             return Response({
                 'network_stats': stats,
                 'suspicious_patterns': patterns,
+                'snapshot': {
+                    'version': snapshot.version,
+                    'built_at': snapshot.built_at,
+                    'build_seconds': snapshot.build_seconds,
+                    'is_current': is_current,
+                },
+            })
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def pattern_page(self, params):
+        """Suspicious patterns for the requested page, order and thresholds"""
+        limit = self.positive_int(params, 'limit', NetworkAnalyzer.PATTERN_PAGE_SIZE)
+        return NetworkAnalyzer().find_suspicious_patterns(
+            limit=min(limit, NetworkAnalyzer.MAX_PATTERN_PAGE_SIZE),
+            min_connections=self.positive_int(params, 'min_connections', None),
+            min_tenders=self.positive_int(params, 'min_tenders', None),
+            sort=params.get('sort', 'rank'),
+            cursors={
+                'highly_connected_suppliers': params.get('suppliers_cursor'),
+                'exclusive_relationships': params.get('relationships_cursor'),
+            },
+        )
+    
+    def positive_int(self, params, name, default):
+        if name not in params:
+            return default
+        try:
+            value = int(params[name])
+        except ValueError:
+            value = 0
+        if value < 1:
+            raise ValueError(f'{name} must be a positive integer')
+        return value
+
+
+class CoBiddingView(APIView):
+    """API endpoint for supplier communities that bid together and rotate wins"""
+    
+    def get(self, request):
+        try:
+            snapshot, is_current = network_snapshots.get()
+            if snapshot is None:
+                return snapshot_building_response()
+            
+            return Response({
+                'cobidding': snapshot.cobidding,
+                'snapshot': {
+                    'version': snapshot.version,
+                    'built_at': snapshot.built_at,
+                    'build_seconds': snapshot.build_seconds,
+                    'is_current': is_current,
+                },
             })
         except Exception as e:
             return Response(
@@ -149,6 +293,49 @@ class NetworkStatsView(APIView):
             )
 
 
+class NetworkExportView(APIView):
+    """API endpoint streaming the award or co-bidding network for graph tools"""
+    
+    def get(self, request):
+        params = request.query_params
+        try:
+            exporter = GraphExporter(
+                graph=params.get('graph', 'award'),
+                district=self.id_param(params, 'district'),
+                category=self.id_param(params, 'category'),
+                date_from=self.date_param(params, 'date_from'),
+                date_to=self.date_param(params, 'date_to'),
+            )
+            output_format = params.get('output', 'ndjson')
+            chunks = exporter.stream(output_format)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        content_type, extension = GraphExporter.FORMATS[output_format]
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{exporter.graph}_network.{extension}"'
+        return response
+    
+    def id_param(self, params, name):
+        if name not in params:
+            return None
+        try:
+            return int(params[name])
+        except ValueError:
+            raise ValueError(f'{name} must be an id')
+    
+    def date_param(self, params, name):
+        if name not in params:
+            return None
+        try:
+            value = parse_date(params[name])
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+        return value
+
+
 class ExportTendersView(APIView):
     """API endpoint to export tender data"""
     
@@ -5,3 +5,7 @@ class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
     verbose_name = 'Dashboard'
+    
+    def ready(self):
+        # Register change tracking for incremental risk analysis
+        from . import signals  # noqa: F401
@@ -0,0 +1,152 @@
+"""
+Management command to benchmark the analyzers on synthetic datasets
+"""
+import json
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from data_analysis.benchmarks import (
+    BENCHMARK_FORMAT_VERSION, DATASET_SIZES, BenchmarkSuite, SyntheticDataset, find_regressions
+)
+
+
+def dataset_size(value):
+    """A named size (10k, 100k, 1m) or a plain number of tenders"""
+    if value.lower() in DATASET_SIZES:
+        return DATASET_SIZES[value.lower()]
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'Unknown dataset size: {value}')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark risk analysis, network building, endpoints and exports at scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=dataset_size,
+            default=[DATASET_SIZES['10k']],
+            help='Dataset sizes: 10k, 100k, 1m or a number of tenders (default: 10k)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the synthetic datasets (default: 42)',
+        )
+        parser.add_argument(
+            '--cases',
+            nargs='+',
+            choices=BenchmarkSuite.CASES,
+            default=None,
+            help='Only run these benchmark cases',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Timed runs per case; the fastest is kept (default: 1)',
+        )
+        parser.add_argument(
+            '--baseline',
+            default=None,
+            metavar='PATH',
+            help='Baseline JSON; compared against when it exists, written otherwise',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Overwrite the baseline with these results after comparing',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Allowed growth over the baseline before failing (default: 0.2 = 20%%)',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            metavar='PATH',
+            help='Also write the results JSON to PATH',
+        )
+
+    def handle(self, *args, **options):
+        results = {
+            'format_version': BENCHMARK_FORMAT_VERSION,
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'datasets': {},
+        }
+
+        for tenders in options['sizes']:
+            self.stdout.write(f'Benchmarking {tenders} tenders (seed {options["seed"]})...')
+            results['datasets'][str(tenders)] = self.benchmark(
+                tenders, options['seed'], options['cases'], options['repeat']
+            )
+
+        if options['output']:
+            self.write_json(options['output'], results)
+
+        baseline_path = options['baseline']
+        if not baseline_path:
+            return
+        if not os.path.exists(baseline_path):
+            self.write_json(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        with open(baseline_path) as handle:
+            baseline = json.load(handle)
+        regressions = find_regressions(results, baseline, options['threshold'])
+        if options['update_baseline']:
+            self.write_json(baseline_path, results)
+            self.stdout.write(f'Baseline updated at {baseline_path}')
+
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(
+                f'{regression["case"]} @ {regression["size"]}: {regression["metric"]} '
+                f'{regression["baseline"]} -> {regression["current"]}'
+            ))
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} benchmark regression(s) past {options["threshold"]:.0%}'
+            )
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def benchmark(self, tenders, seed, cases, repeat):
+        """Run the suite on one dataset in a throwaway test database"""
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            started = time.perf_counter()
+            dataset = SyntheticDataset(tenders, seed).generate()
+            dataset['generate_seconds'] = round(time.perf_counter() - started, 3)
+            self.stdout.write(
+                f'  generated {dataset["tenders"]} tenders, {dataset["bids"]} bids and '
+                f'{dataset["organizations"]} organizations in {dataset["generate_seconds"]:.2f}s'
+            )
+            cases = BenchmarkSuite(cases, repeat).run(on_case=self.report_case)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        return {'dataset': dataset, 'cases': cases}
+
+    def report_case(self, name, metrics):
+        if 'error' in metrics:
+            self.stdout.write(self.style.WARNING(f'  {name}: failed ({metrics["error"]})'))
+            return
+        self.stdout.write(
+            f'  {name}: {metrics["wall_seconds"]:.3f}s wall, {metrics["cpu_seconds"]:.3f}s cpu, '
+            f'{metrics["queries"]} queries ({metrics["sql_seconds"]:.3f}s), '
+            f'{metrics["peak_memory_mb"]:.1f} MB peak'
+        )
+
+    def write_json(self, path, data):
+        with open(path, 'w') as handle:
+            json.dump(data, handle, indent=2, sort_keys=True)
@@ -0,0 +1,41 @@
+"""
+Management command to build the memory-mapped network graph file
+"""
+import time
+from django.core.management.base import BaseCommand
+from dashboard.models import NetworkSnapshotState
+from data_analysis.graph_store import CSRGraphStore, default_graph_path
+from data_analysis.network_index import network_index
+
+
+class Command(BaseCommand):
+    help = 'Build the CSR buyer-supplier graph file that web workers memory-map'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=None,
+            help='Output file (default: settings.NETWORK_GRAPH_PATH)',
+        )
+        parser.add_argument(
+            '--reindex',
+            action='store_true',
+            help='First recompute the edge index from the tenders, e.g. after a bulk import',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or default_graph_path()
+        started = time.perf_counter()
+        if options['reindex']:
+            counts = network_index.rebuild()
+            self.stdout.write(f'Indexed {counts["edges"]} relationships between {counts["nodes"]} organizations')
+            NetworkSnapshotState.invalidate()
+        # Read before building, so changes made meanwhile leave the file stale
+        version = NetworkSnapshotState.current().data_version
+        store = CSRGraphStore.from_database()
+        store.version = version
+        store.save(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved {store.number_of_nodes} organizations and {store.number_of_edges} '
+            f'relationships to {path} in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,28 @@
+"""
+Management command to precompute the organization similarity index
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from data_analysis.risk_analyzer import NetworkAnalyzer
+
+
+class Command(BaseCommand):
+    help = 'Precompute the most similar buyers and suppliers by shared counterparties'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-n',
+            type=int,
+            default=NetworkAnalyzer.SIMILAR_TOP_N,
+            help=f'Neighbours kept per organization (default: {NetworkAnalyzer.SIMILAR_TOP_N})',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        results = NetworkAnalyzer().refresh_similarity_index(top_n=options['top_n'])
+        if 'error' in results:
+            raise CommandError(results['error'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {results["buyer"]} buyer and {results["supplier"]} supplier neighbours '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
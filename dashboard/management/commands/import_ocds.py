@@ -0,0 +1,13 @@
+"""
+Management command to import an Open Contracting Data Standard export
+"""
+from data_analysis.ocds import OCDSImporter
+from .import_procurement_csv import Command as CSVImportCommand
+
+
+class Command(CSVImportCommand):
+    help = 'Import tenders, bids and organizations from OCDS JSON, JSON Lines or gzipped files in chunks'
+    path_help = 'OCDS release or record package, or JSON Lines of releases; .gz files are read directly'
+
+    def run_import(self, options, on_chunk):
+        return OCDSImporter(chunk_size=options['chunk_size']).import_from_file(options['path'], on_chunk=on_chunk)
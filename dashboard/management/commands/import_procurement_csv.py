@@ -0,0 +1,62 @@
+"""
+Management command to import a procurement CSV export
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from data_analysis.importer import DataImporter
+
+
+class Command(BaseCommand):
+    help = 'Import tenders, bids and organizations from a CSV export in chunks'
+    path_help = 'CSV file with one row per bid'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help=self.path_help)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DataImporter.CHUNK_SIZE,
+            help=f'Rows per chunk and transaction (default: {DataImporter.CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def report(summary):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Chunk {summary["chunk"]}: {summary["tenders"]} new and {summary["updated_tenders"]} '
+                f'updated tenders, {summary["bids"]} new and {summary["updated_bids"]} updated bids, '
+                f'{summary["organizations"]} new and {summary["resolved_organizations"]} resolved organizations, '
+                f'{summary["unchanged_tenders"]} unchanged, {summary["rejected_rows"]} rejected rows '
+                f'({elapsed:.1f}s)'
+            )
+            for error in summary['errors']:
+                self.stderr.write(f'  row {error["row"]} ({error["tender_id"]}): {error["error"]}')
+
+        results = self.run_import(options, report)
+        if 'error' in results:
+            raise CommandError(results['error'])
+        for error in results['errors']:
+            self.stderr.write(error)
+        for stage, rates in results['stages'].items():
+            rate = f'{rates["rows_per_second"]} rows/s' if rates['rows_per_second'] is not None else '-'
+            self.stdout.write(f'  {stage}: {rates["rows"]} rows in {rates["seconds"]}s ({rate})')
+
+        message = (
+            f'Imported {results["imported_tenders"]} tenders, {results["imported_bids"]} bids and '
+            f'{results["imported_organizations"]} organizations in {time.perf_counter() - started:.2f}s '
+            f'({results["load_method"]}); '
+            f'resolved {results["resolved_organizations"]} organization names to existing ones '
+            f'and left {results["pending_merges"]} possible matches for review; '
+            f'updated {results["updated_tenders"]} tenders and {results["updated_bids"]} bids; '
+            f'{results["unchanged_tenders"]} tenders unchanged, {results["rejected_rows"]} rows rejected; '
+            f'{results["changed_tenders"]} tenders queued for risk re-scoring'
+        )
+        if results['success']:
+            self.stdout.write(self.style.SUCCESS(message))
+        else:
+            raise CommandError(message)
+
+    def run_import(self, options, on_chunk):
+        return DataImporter(chunk_size=options['chunk_size']).import_from_csv(options['path'], on_chunk=on_chunk)
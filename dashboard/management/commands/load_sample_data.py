@@ -8,8 +8,10 @@ from faker import Faker
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from dashboard.models import (
-    District, TenderCategory, Organization, Tender, TenderBid, RiskScore
+    District, TenderCategory, Organization, Tender, TenderBid, RiskScore,
+    RiskChange, RiskBaseline
 )
+from data_analysis.network_cache import network_snapshots
 from data_analysis.risk_analyzer import RiskAnalyzer
 
 fake = Faker()
@@ -49,7 +51,9 @@ class Command(BaseCommand):
         # Run risk analysis
         self.stdout.write('Running risk analysis...')
         analyzer = RiskAnalyzer()
-        results = analyzer.analyze_all_tenders()
+        results = analyzer.analyze_changed_tenders()
+        # Build the network snapshot too, so the demo does not wait for the worker
+        network_snapshots.refresh()
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -66,6 +70,8 @@ class Command(BaseCommand):
     def clear_data(self):
         """Clear existing demo data"""
         RiskScore.objects.all().delete()
+        RiskChange.objects.all().delete()
+        RiskBaseline.objects.all().delete()
         TenderBid.objects.all().delete()
         Tender.objects.all().delete()
         Organization.objects.all().delete()
@@ -0,0 +1,155 @@
+"""
+Management command that runs queued risk analysis jobs
+"""
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from dashboard.models import Tender, RiskAnalysisJob, NetworkSnapshotState
+from data_analysis.network_cache import network_snapshots
+from data_analysis.parallel import ShardedRiskRunner
+from data_analysis.risk_analyzer import RiskAnalyzer
+
+
+class Heartbeat:
+    """Beat a running job from a background thread until the block exits
+
+    Long load phases and slow shards report no progress for a while, so
+    liveness is signalled separately. The thread closes its connection
+    after every beat so forked shard workers never inherit an open one.
+    """
+
+    def __init__(self, job, interval=RiskAnalysisJob.HEARTBEAT_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.job.beat()
+            except DatabaseError:
+                # A missed beat is retried next interval; only a run of them makes the job stale
+                pass
+            finally:
+                connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Run queued risk analysis jobs and rebuild stale network snapshots between them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds between queue checks when idle (default: 5)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker processes for full runs (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        self.stdout.write('Waiting for risk analysis jobs...')
+
+        while True:
+            job = RiskAnalysisJob.claim_next()
+            if job:
+                self.run_job(job)
+                continue
+            # Idle: rebuild a stale network snapshot here rather than in a web request
+            self.refresh_snapshot()
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+
+    def run_job(self, job):
+        """Run one claimed job and record its outcome"""
+        self.stdout.write(f'Starting job #{job.pk} ({job.get_mode_display()})')
+        try:
+            with Heartbeat(job):
+                if job.mode == 'full':
+                    results = self.run_full(job)
+                else:
+                    results = RiskAnalyzer(profile=True).analyze_changed_tenders(
+                        progress=lambda done, total: self.update_progress(job, done, total)
+                    )
+        except Exception as e:
+            job.finish('failed', error=str(e))
+            self.stdout.write(self.style.ERROR(f'Job #{job.pk} failed: {e}'))
+            return
+
+        owned = job.finish(
+            'completed',
+            results=results,
+            tenders_scored=results['total_analyzed'],
+            tenders_total=max(job.tenders_total, results['total_analyzed']),
+        )
+        NetworkSnapshotState.invalidate()
+        if not owned:
+            self.stdout.write(self.style.WARNING(
+                f'Job #{job.pk} was marked failed while running; its status was left unchanged'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Job #{job.pk} scored {job.tenders_scored} tenders'
+        ))
+
+    def refresh_snapshot(self):
+        """Rebuild the network snapshot if it is stale and no one else is"""
+        started = time.perf_counter()
+        try:
+            snapshot = network_snapshots.refresh()
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Network snapshot rebuild failed: {e}'))
+            return
+        if snapshot:
+            self.stdout.write(
+                f'Built network snapshot v{snapshot.version} in {time.perf_counter() - started:.2f}s'
+            )
+
+    def run_full(self, job):
+        """Score every tender with the sharded runner, reporting per shard"""
+        total = Tender.objects.count()
+        self.update_progress(job, 0, total)
+
+        runner = ShardedRiskRunner(workers=self.workers, profile=True)
+        scored = 0
+
+        def on_shard(shard):
+            nonlocal scored
+            scored += shard['tenders']
+            self.update_progress(job, scored, total)
+
+        # More shards than workers gives finer-grained progress
+        return runner.run(runner.workers * 4, on_shard=on_shard)
+
+    def update_progress(self, job, done, total):
+        """Store progress without touching the rest of the row"""
+        job.tenders_scored = done
+        job.tenders_total = total
+        RiskAnalysisJob.objects.filter(pk=job.pk, status='running').update(
+            tenders_scored=done,
+            tenders_total=total,
+            heartbeat_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
@@ -0,0 +1,112 @@
+"""
+Management command to run the full risk analysis across worker processes
+"""
+import time
+from django.core.management.base import BaseCommand
+from dashboard.models import NetworkSnapshotState
+from data_analysis.parallel import ShardedRiskRunner
+
+
+class Command(BaseCommand):
+    help = 'Score every tender, sharded by buyer across worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes (default: 1)',
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=None,
+            help='Number of buyer shards (default: one per worker)',
+        )
+        parser.add_argument(
+            '--vectorized',
+            action='store_true',
+            help='Score shards with the NumPy kernel',
+        )
+        parser.add_argument(
+            '--in-database',
+            action='store_true',
+            help='Score every tender in SQL with one upsert instead of worker shards',
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Score in keyset-ordered chunks with constant memory',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Tenders per chunk in streaming mode (default: 2000)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=None,
+            help='Checkpoint name for streaming mode; rerun with it to resume',
+        )
+        parser.add_argument(
+            '--high-value-scope',
+            choices=['global', 'category', 'district'],
+            default='global',
+            help='Median the high-value rule compares against (default: global)',
+        )
+        parser.add_argument(
+            '--profile',
+            default=None,
+            metavar='PATH',
+            help='Write per-phase and per-rule timings and query counts as JSON to PATH',
+        )
+
+    def handle(self, *args, **options):
+        runner = ShardedRiskRunner(
+            workers=options['workers'],
+            vectorized=options['vectorized'],
+            high_value_scope=options['high_value_scope'],
+            profile=bool(options['profile']),
+        )
+        started = time.perf_counter()
+        if options['in_database']:
+            mode = 'in_database'
+            self.stdout.write('Scoring all tenders in the database...')
+            results = runner.analyzer.analyze_tenders_in_database()
+        elif options['stream']:
+            mode = 'stream'
+            self.stdout.write(f'Streaming tenders in chunks of {options["chunk_size"]}...')
+            results = runner.analyzer.analyze_tenders_streaming(
+                chunk_size=options['chunk_size'],
+                checkpoint=options['checkpoint'],
+                vectorized=options['vectorized'],
+            )
+        else:
+            mode = 'vectorized' if options['vectorized'] else 'batch'
+            shard_count = options['shards'] or runner.workers
+            self.stdout.write(
+                f'Scoring up to {shard_count} shard(s) with {runner.workers} worker(s)...'
+            )
+            results = runner.run(shard_count, on_shard=self.report_shard)
+        NetworkSnapshotState.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Risk analysis complete in {time.perf_counter() - started:.2f}s:\n'
+                f'- Tenders analyzed: {results["total_analyzed"]}\n'
+                f'- High Risk Tenders: {results["high_risk_found"]}\n'
+                f'- Flags: {dict(results["flags_detected"])}'
+            )
+        )
+
+        if options['profile']:
+            runner.analyzer.profiler.write(options['profile'], results, mode)
+            self.stdout.write(f'Run profile written to {options["profile"]}')
+
+    def report_shard(self, shard):
+        self.stdout.write(
+            f'Shard {shard["shard"] + 1}: {shard["tenders"]} tenders from '
+            f'{shard["buyers"]} buyers, scored in {shard["score_seconds"]:.2f}s, '
+            f'written in {shard["write_seconds"]:.2f}s'
+        )
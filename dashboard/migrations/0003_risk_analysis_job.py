@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_risk_change_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskAnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('mode', models.CharField(choices=[('incremental', 'Changed tenders only'), ('full', 'All tenders')], default='incremental', max_length=12)),
+                ('tenders_total', models.IntegerField(default=0)),
+                ('tenders_scored', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('results', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status'], name='dashboard_r_status_8ffd89_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_risk_analysis_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NetworkSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True)),
+                ('stats', models.JSONField(default=dict)),
+                ('patterns', models.JSONField(default=dict)),
+                ('build_seconds', models.FloatField(default=0)),
+                ('built_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-version'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NetworkSnapshotState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_version', models.PositiveIntegerField(default=0)),
+                ('rebuilding_since', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
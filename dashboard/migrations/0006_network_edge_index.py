@@ -0,0 +1,68 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import Counter
+
+
+def build_network_index(apps, schema_editor):
+    """Fill the index from the awarded tenders already in the database"""
+    Tender = apps.get_model('dashboard', 'Tender')
+    NetworkEdge = apps.get_model('dashboard', 'NetworkEdge')
+    NetworkNode = apps.get_model('dashboard', 'NetworkNode')
+
+    pair_counts = Tender.objects.filter(
+        status='awarded', winner__isnull=False
+    ).order_by().values_list('buyer_id', 'winner_id').annotate(tenders=models.Count('id'))
+
+    weights = Counter()
+    for buyer_id, winner_id, count in pair_counts:
+        weights[(min(buyer_id, winner_id), max(buyer_id, winner_id))] += count
+    degrees = Counter()
+    for low, high in weights:
+        degrees[low] += 1
+        degrees[high] += 1
+
+    NetworkEdge.objects.bulk_create(
+        [NetworkEdge(organization_id=low, counterparty_id=high, weight=weight)
+         for (low, high), weight in weights.items()],
+        batch_size=5000,
+    )
+    NetworkNode.objects.bulk_create(
+        [NetworkNode(organization_id=org_id, degree=degree) for org_id, degree in degrees.items()],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_network_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NetworkNode',
+            fields=[
+                ('organization', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='network_node', serialize=False, to='dashboard.organization')),
+                ('degree', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['degree'], name='dashboard_n_degree_c269fd_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NetworkEdge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.PositiveIntegerField(default=0)),
+                ('counterparty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.organization')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['weight'], name='dashboard_n_weight_ce42b3_idx')],
+                'unique_together': {('organization', 'counterparty')},
+            },
+        ),
+        migrations.RunPython(build_network_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_network_edge_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='networksnapshot',
+            name='cobidding',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_network_snapshot_cobidding'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='networkedge',
+            name='dashboard_n_weight_ce42b3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='networknode',
+            name='dashboard_n_degree_c269fd_idx',
+        ),
+        migrations.AddIndex(
+            model_name='networkedge',
+            index=models.Index(fields=['-weight', 'organization', 'counterparty'], name='dashboard_n_weight_d8f860_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='networknode',
+            index=models.Index(fields=['-degree', 'organization'], name='dashboard_n_degree_daa559_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_network_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('projection', models.CharField(choices=[('buyer', 'Buyer'), ('supplier', 'Supplier')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('shared', models.PositiveIntegerField()),
+                ('jaccard', models.FloatField()),
+                ('overlap', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='dashboard.organization')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.organization')),
+            ],
+            options={
+                'ordering': ['organization', 'projection', 'rank'],
+                'unique_together': {('organization', 'projection', 'rank')},
+            },
+        ),
+    ]
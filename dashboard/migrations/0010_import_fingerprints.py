@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_organization_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tender',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='tenderbid',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
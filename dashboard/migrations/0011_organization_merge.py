@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_import_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationMerge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('registration_number', models.CharField(blank=True, max_length=50)),
+                ('normalized_name', models.CharField(max_length=200)),
+                ('method', models.CharField(choices=[('normalized', 'Same normalized name'), ('phonetic', 'Same-sounding name'), ('fuzzy', 'Similar name')], max_length=10)),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='merged_names', to='dashboard.organization')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('name', 'registration_number')},
+            },
+        ),
+    ]
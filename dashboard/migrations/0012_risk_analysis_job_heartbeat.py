@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_organization_merge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riskanalysisjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
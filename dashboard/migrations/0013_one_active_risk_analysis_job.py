@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:43
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Keep the oldest queued or running job; earlier races may have left more"""
+    RiskAnalysisJob = apps.get_model('dashboard', 'RiskAnalysisJob')
+    active = RiskAnalysisJob.objects.filter(status__in=['queued', 'running']).order_by('created_at')
+    duplicates = list(active.values_list('id', flat=True)[1:])
+    RiskAnalysisJob.objects.filter(id__in=duplicates).update(
+        status='failed',
+        error='Duplicate of an earlier active job',
+        finished_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_risk_analysis_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='riskanalysisjob',
+            constraint=models.UniqueConstraint(models.Value(1), condition=models.Q(('status__in', ['queued', 'running'])), name='one_active_risk_analysis_job'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_one_active_risk_analysis_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riskanalysischeckpoint',
+            name='last_change_id',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_risk_checkpoint_last_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organizationmerge',
+            name='imported_as',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.organization'),
+        ),
+        migrations.AddField(
+            model_name='organizationmerge',
+            name='status',
+            field=models.CharField(choices=[('merged', 'Merged'), ('pending', 'Pending review'), ('rejected', 'Rejected')], default='merged', max_length=10),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from datetime import timedelta
+from django.db import IntegrityError, models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
@@ -109,6 +110,9 @@ class Tender(models.Model):
         related_name='won_tenders'
     )
     
+    # Content hash of the imported row, so re-imports only write what changed
+    import_fingerprint = models.CharField(max_length=32, blank=True)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -165,6 +169,8 @@ class TenderBid(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
     
+    import_fingerprint = models.CharField(max_length=32, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -227,14 +233,370 @@ class RiskScore(models.Model):
     def __str__(self):
         return f"{self.tender.tender_id}: {self.total_risk_score}/100 ({self.get_risk_level_display()})"
     
+    @staticmethod
+    def level_for_score(total_risk_score):
+        """Map a total risk score to its risk level"""
+        if total_risk_score >= 80:
+            return 'critical'
+        elif total_risk_score >= 60:
+            return 'high'
+        elif total_risk_score >= 30:
+            return 'medium'
+        return 'low'
+    
     def save(self, *args, **kwargs):
         """Auto-calculate risk level based on total score"""
-        if self.total_risk_score >= 80:
-            self.risk_level = 'critical'
-        elif self.total_risk_score >= 60:
-            self.risk_level = 'high'
-        elif self.total_risk_score >= 30:
-            self.risk_level = 'medium'
-        else:
-            self.risk_level = 'low'
+        self.risk_level = self.level_for_score(self.total_risk_score)
         super().save(*args, **kwargs)
+
+
+class RiskChange(models.Model):
+    """Tenders, buyer-winner pairs and suppliers touched since the last risk run"""
+    # Plain ids rather than foreign keys so deleted tenders stay recorded
+    tender_id = models.BigIntegerField(null=True, blank=True)
+    buyer_id = models.BigIntegerField(null=True, blank=True)
+    winner_id = models.BigIntegerField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"Tender {self.tender_id} (buyer {self.buyer_id}, winner {self.winner_id})"
+
+
+class RiskBaseline(models.Model):
+    """Global scoring inputs as of the last full or incremental risk run"""
+    total_awarded = models.IntegerField(default=0)
+    median_value = models.DecimalField(max_digits=18, decimal_places=3, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Baseline: {self.total_awarded} awards, median {self.median_value}"
+
+
+class RiskAnalysisJob(models.Model):
+    """Queued risk analysis run, executed by the process_risk_jobs worker"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    MODE_CHOICES = [
+        ('incremental', 'Changed tenders only'),
+        ('full', 'All tenders'),
+    ]
+    
+    ACTIVE_STATUSES = ['queued', 'running']
+    
+    # Seconds between a running job's heartbeats, sent whether or not it progresses
+    HEARTBEAT_INTERVAL = 60
+    
+    # Running jobs without a heartbeat for this long are presumed dead
+    STALE_AFTER = timedelta(minutes=10)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    mode = models.CharField(max_length=12, choices=MODE_CHOICES, default='incremental')
+    
+    # Progress
+    tenders_total = models.IntegerField(default=0)
+    tenders_scored = models.IntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
+    # Outcome
+    results = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+        constraints = [
+            # A constant key, so at most one row can match the condition
+            models.UniqueConstraint(
+                models.Value(1),
+                condition=models.Q(status__in=['queued', 'running']),
+                name='one_active_risk_analysis_job',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Risk analysis #{self.pk} ({self.get_status_display()})"
+    
+    @classmethod
+    def enqueue(cls, mode='incremental'):
+        """Return the active job, or queue a new one. Returns (job, created)"""
+        stale = timezone.now() - cls.STALE_AFTER
+        cls.objects.filter(
+            models.Q(heartbeat_at__lt=stale) | models.Q(heartbeat_at__isnull=True, updated_at__lt=stale),
+            status='running',
+        ).update(
+            status='failed',
+            error='Worker stopped sending heartbeats',
+            finished_at=timezone.now(),
+        )
+        
+        active = cls.objects.filter(status__in=cls.ACTIVE_STATUSES).first()
+        if active:
+            return active, False
+        try:
+            with transaction.atomic():
+                return cls.objects.create(mode=mode), True
+        except IntegrityError:
+            # Another request queued a job between our lookup and insert
+            return cls.objects.get(status__in=cls.ACTIVE_STATUSES), False
+    
+    @classmethod
+    def claim_next(cls):
+        """Atomically move the oldest queued job to running, or return None"""
+        for job in cls.objects.filter(status='queued').order_by('created_at'):
+            claimed = cls.objects.filter(pk=job.pk, status='queued').update(
+                status='running',
+                started_at=timezone.now(),
+                heartbeat_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+    
+    def beat(self):
+        """Record that the worker is alive; False once the job is no longer running"""
+        return bool(RiskAnalysisJob.objects.filter(pk=self.pk, status='running').update(
+            heartbeat_at=timezone.now(),
+        ))
+    
+    def finish(self, status, **fields):
+        """
+        Record the job's outcome if it is still running.
+        
+        Returns False, leaving the row alone, when the job was marked failed
+        as stale and possibly re-queued while this worker was still busy.
+        """
+        fields.update(status=status, finished_at=timezone.now(), updated_at=timezone.now())
+        finished = RiskAnalysisJob.objects.filter(pk=self.pk, status='running').update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return bool(finished)
+    
+    @property
+    def rate(self):
+        """Tenders scored per second so far"""
+        if not self.started_at or not self.tenders_scored:
+            return None
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return self.tenders_scored / elapsed if elapsed > 0 else None
+    
+    @property
+    def eta_seconds(self):
+        """Estimated seconds until the running job finishes"""
+        if self.status != 'running':
+            return None
+        rate = self.rate
+        if not rate or self.tenders_total <= self.tenders_scored:
+            return None
+        return (self.tenders_total - self.tenders_scored) / rate
+
+
+class RiskAnalysisCheckpoint(models.Model):
+    """Progress of a streaming risk run, so an interrupted run can resume"""
+    name = models.CharField(max_length=50, unique=True)
+    last_tender_id = models.BigIntegerField(default=0)
+    # Newest RiskChange when the run started, so a resumed run keeps its baseline
+    last_change_id = models.BigIntegerField(default=0)
+    results = models.JSONField(default=dict, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: after tender {self.last_tender_id}"
+
+
+class NetworkSnapshotState(models.Model):
+    """Single row holding the network data version and the snapshot rebuild lease"""
+    
+    # A rebuild holding the lease this long is presumed dead
+    REBUILD_LEASE = timedelta(minutes=10)
+    
+    data_version = models.PositiveIntegerField(default=0)
+    rebuilding_since = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Network data version {self.data_version}"
+    
+    @classmethod
+    def current(cls):
+        return cls.objects.get_or_create(pk=1)[0]
+    
+    @classmethod
+    def invalidate(cls):
+        """
+        Mark every stored network snapshot, and each process's tender
+        value index, as outdated.
+        
+        The version is bumped once the current transaction commits, and only
+        once per transaction however many changes it makes, so concurrent
+        writers don't hold a lock on this row for their whole transaction.
+        Nothing is bumped if the transaction rolls back.
+        """
+        connection = transaction.get_connection()
+        if connection.in_atomic_block and any(
+            func == cls._bump_version for _, func, _ in connection.run_on_commit
+        ):
+            return
+        transaction.on_commit(cls._bump_version)
+    
+    @classmethod
+    def _bump_version(cls):
+        cls.objects.filter(pk=1).update(data_version=models.F('data_version') + 1)
+    
+    @classmethod
+    def claim_rebuild(cls):
+        """Atomically take the rebuild lease; False if another process holds it"""
+        now = timezone.now()
+        return bool(cls.objects.filter(pk=1).filter(
+            models.Q(rebuilding_since__isnull=True) |
+            models.Q(rebuilding_since__lt=now - cls.REBUILD_LEASE)
+        ).update(rebuilding_since=now))
+    
+    @classmethod
+    def release_rebuild(cls):
+        cls.objects.filter(pk=1).update(rebuilding_since=None)
+
+
+class NetworkSnapshot(models.Model):
+    """Buyer-supplier network statistics and patterns built for one data version"""
+    version = models.PositiveIntegerField(unique=True)
+    stats = models.JSONField(default=dict)
+    patterns = models.JSONField(default=dict)
+    cobidding = models.JSONField(default=dict)
+    build_seconds = models.FloatField(default=0)
+    built_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-version']
+    
+    def __str__(self):
+        return f"Network snapshot v{self.version}"
+
+
+class NetworkEdge(models.Model):
+    """Awarded tenders between two organizations, in either direction
+
+    Kept current by the Tender signals; organization_id <= counterparty_id.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='+')
+    counterparty = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='+')
+    weight = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('organization', 'counterparty')
+        indexes = [
+            # Serves the heaviest-first pattern pages
+            models.Index(fields=['-weight', 'organization', 'counterparty']),
+        ]
+    
+    def __str__(self):
+        return f"{self.organization_id} - {self.counterparty_id}: {self.weight} tenders"
+
+
+class NetworkNode(models.Model):
+    """Distinct counterparties of an organization, a self-loop counting twice"""
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, primary_key=True, related_name='network_node'
+    )
+    degree = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            # Serves the most-connected-first pattern pages
+            models.Index(fields=['-degree', 'organization']),
+        ]
+    
+    def __str__(self):
+        return f"{self.organization_id}: {self.degree} connections"
+
+
+class OrganizationSimilarity(models.Model):
+    """An organization's nearest neighbours by shared counterparties, precomputed
+
+    Buyers are compared on the suppliers they awarded and suppliers on the
+    buyers that awarded them; rank 1 is the most similar.
+    """
+    PROJECTION_CHOICES = [
+        ('buyer', 'Buyer'),
+        ('supplier', 'Supplier'),
+    ]
+    
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='similarities')
+    similar = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='+')
+    projection = models.CharField(max_length=10, choices=PROJECTION_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    
+    shared = models.PositiveIntegerField()
+    jaccard = models.FloatField()
+    overlap = models.FloatField()
+    
+    computed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        # Also the index behind the per-organization lookup
+        unique_together = ('organization', 'projection', 'rank')
+        ordering = ['organization', 'projection', 'rank']
+    
+    def __str__(self):
+        return f"{self.organization_id} ~ {self.similar_id} ({self.projection} #{self.rank})"
+
+
+class OrganizationMerge(models.Model):
+    """An imported organization name resolved to an existing organization
+
+    Audit of the importer's entity resolution; later imports reuse a merged
+    name as an alias instead of matching the name again. Matches too weak
+    to merge are kept as pending, with the organization the import created
+    for the name, until someone reviews them.
+    """
+    METHOD_CHOICES = [
+        ('normalized', 'Same normalized name'),
+        ('phonetic', 'Same-sounding name'),
+        ('fuzzy', 'Similar name'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('merged', 'Merged'),
+        ('pending', 'Pending review'),
+        ('rejected', 'Rejected'),
+    ]
+    
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='merged_names')
+    name = models.CharField(max_length=200)
+    registration_number = models.CharField(max_length=50, blank=True)
+    normalized_name = models.CharField(max_length=200)
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES)
+    score = models.FloatField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='merged')
+    # Organization created for the name while the match waits for review
+    imported_as = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('name', 'registration_number')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} -> {self.organization_id} ({self.method} {self.score:.2f}, {self.status})"
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import District, TenderCategory, Organization, Tender, TenderBid, RiskScore
+from .models import (
+    District, TenderCategory, Organization, Tender, TenderBid, RiskScore, RiskAnalysisJob
+)
 
 
 class DistrictSerializer(serializers.ModelSerializer):
@@ -104,3 +106,16 @@ class AnalyticsSummarySerializer(serializers.Serializer):
     risk_distribution = serializers.DictField()
     top_risk_flags = serializers.DictField()
     monthly_trends = serializers.ListField()
+
+
+class RiskAnalysisJobSerializer(serializers.ModelSerializer):
+    """Serializer for queued risk analysis runs and their progress"""
+    rate = serializers.FloatField(read_only=True)
+    eta_seconds = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = RiskAnalysisJob
+        fields = [
+            'id', 'status', 'mode', 'tenders_total', 'tenders_scored', 'rate',
+            'eta_seconds', 'results', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
@@ -0,0 +1,123 @@
+"""
+Change tracking for incremental risk analysis and the award network
+Records which tenders, buyer-winner pairs and suppliers need re-scoring,
+and keeps the network edge index and snapshot version current
+"""
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from data_analysis.network_index import network_index
+from data_analysis.value_index import value_index
+from .models import Tender, TenderBid, Organization, RiskChange, NetworkSnapshotState
+
+# Tender fields that feed pair counts and supplier win counts
+AWARD_FIELDS = ('buyer_id', 'winner_id', 'status')
+
+# Tender fields that place a tender in the value index
+VALUE_FIELDS = ('estimated_value', 'category_id', 'buyer_id')
+
+
+@receiver(pre_save, sender=Tender)
+def remember_tender_award(sender, instance, **kwargs):
+    """Keep the stored award and value fields so post_save can see what changed"""
+    instance._previous_fields = None
+    if instance.pk:
+        instance._previous_fields = Tender.objects.filter(pk=instance.pk).values(
+            *AWARD_FIELDS, *VALUE_FIELDS
+        ).first()
+
+
+@receiver(post_save, sender=Tender)
+def record_tender_change(sender, instance, created, raw=False, **kwargs):
+    """Record the tender, and its old and new pairs if the award changed"""
+    if raw:
+        return
+    
+    stored = getattr(instance, '_previous_fields', None)
+    _update_value_index(instance, stored)
+    
+    previous = {field: stored[field] for field in AWARD_FIELDS} if stored else None
+    current = {field: getattr(instance, field) for field in AWARD_FIELDS}
+    
+    if not created and previous == current:
+        # Only tender-local inputs (window, value, ...) changed
+        RiskChange.objects.create(tender_id=instance.pk)
+        return
+    
+    changes = [_award_change(instance.pk, current)]
+    if previous and previous != current:
+        changes.append(_award_change(instance.pk, previous))
+    RiskChange.objects.bulk_create(changes)
+    
+    previous_edge = _network_edge(previous) if previous else None
+    current_edge = _network_edge(current)
+    if previous_edge or current_edge:
+        network_index.record_award(previous_edge, current_edge)
+        NetworkSnapshotState.invalidate()
+
+
+@receiver(post_delete, sender=Tender)
+def record_tender_delete(sender, instance, **kwargs):
+    """Record the pair and supplier that lost an award"""
+    value_index.remove(instance.estimated_value, instance.category_id, instance.buyer_id)
+    RiskChange.objects.create(**_award_fields(instance.pk, instance.buyer_id, instance.winner_id))
+    edge = _network_edge({field: getattr(instance, field) for field in AWARD_FIELDS})
+    if edge:
+        network_index.record_award(edge, None)
+        NetworkSnapshotState.invalidate()
+
+
+@receiver(post_save, sender=TenderBid)
+@receiver(post_delete, sender=TenderBid)
+def record_bid_change(sender, instance, raw=False, **kwargs):
+    """Bid changes only affect the bid count of their own tender, and co-bidding"""
+    if raw:
+        return
+    RiskChange.objects.create(tender_id=instance.tender_id)
+    NetworkSnapshotState.invalidate()
+
+
+@receiver(pre_delete, sender=Organization)
+def remove_organization_edges(sender, instance, **kwargs):
+    """Drop the edges and log the tenders it won; they are unlinked without signals"""
+    network_index.remove_organization(instance.pk)
+    RiskChange.objects.bulk_create(
+        RiskChange(**_award_fields(tender_id, buyer_id, instance.pk))
+        for tender_id, buyer_id in
+        Tender.objects.filter(winner=instance).values_list('id', 'buyer_id')
+    )
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def record_organization_change(sender, instance, raw=False, **kwargs):
+    """Organizations are the network's nodes"""
+    if raw:
+        return
+    NetworkSnapshotState.invalidate()
+
+
+def _network_edge(award):
+    # Only awarded tenders with a winner become network edges
+    if award['status'] == 'awarded' and award['winner_id'] is not None:
+        return (award['buyer_id'], award['winner_id'])
+    return None
+
+
+def _update_value_index(instance, stored):
+    current = tuple(getattr(instance, field) for field in VALUE_FIELDS)
+    if stored is None:
+        value_index.add(*current, updated_at=instance.updated_at)
+    else:
+        previous = tuple(stored[field] for field in VALUE_FIELDS)
+        value_index.replace(previous, current, updated_at=instance.updated_at)
+
+
+def _award_change(tender_id, award):
+    return RiskChange(**_award_fields(tender_id, award['buyer_id'], award['winner_id']))
+
+
+def _award_fields(tender_id, buyer_id, winner_id):
+    # A pair only exists once the tender has a winner
+    if winner_id is None:
+        return {'tender_id': tender_id}
+    return {'tender_id': tender_id, 'buyer_id': buyer_id, 'winner_id': winner_id}
@@ -0,0 +1,102 @@
+"""
+Tests for the dashboard models and change-tracking signals
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone as django_timezone
+from .models import (
+    District, TenderCategory, Organization, Tender, RiskChange, RiskAnalysisJob
+)
+
+START_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def create_organization(name, district, organization_type='supplier'):
+    return Organization.objects.create(
+        name=name, organization_type=organization_type, district=district
+    )
+
+
+def create_tender(tender_id, category, buyer, winner=None, value=1_000_000):
+    return Tender.objects.create(
+        tender_id=tender_id,
+        title=f'Tender {tender_id}',
+        description='',
+        category=category,
+        buyer=buyer,
+        estimated_value=Decimal(value),
+        publication_date=START_DATE,
+        submission_deadline=START_DATE + timedelta(days=14),
+        opening_date=START_DATE + timedelta(days=15),
+        status='awarded' if winner else 'published',
+        winner=winner,
+    )
+
+
+class SignalTests(TestCase):
+    """Changes that bypass save() must still reach the RiskChange log"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.district = District.objects.create(name='Dhaka', division='Dhaka', code='DHK')
+        cls.category = TenderCategory.objects.create(name='Infrastructure')
+        cls.buyer = create_organization('Roads Department', cls.district, 'buyer')
+
+    def test_deleting_a_winner_logs_its_tenders(self):
+        winner = create_organization('Rahim Traders', self.district)
+        won = [create_tender(f'T-{n}', self.category, self.buyer, winner) for n in range(3)]
+        create_tender('T-other', self.category, self.buyer)
+        RiskChange.objects.all().delete()
+
+        winner_id = winner.pk
+        winner.delete()
+
+        self.assertFalse(Tender.objects.filter(winner_id=winner_id).exists())
+        self.assertEqual(
+            set(RiskChange.objects.values_list('tender_id', 'buyer_id', 'winner_id')),
+            {(tender.pk, self.buyer.pk, winner_id) for tender in won},
+        )
+
+
+class RiskAnalysisJobTests(TestCase):
+    """The queue holds at most one active job, owned by one worker"""
+
+    def test_enqueue_returns_the_active_job(self):
+        job, created = RiskAnalysisJob.enqueue()
+        self.assertTrue(created)
+        self.assertEqual(RiskAnalysisJob.enqueue('full'), (job, False))
+
+        RiskAnalysisJob.claim_next()
+        self.assertEqual(RiskAnalysisJob.enqueue(), (job, False))
+
+    def test_database_allows_one_active_job(self):
+        RiskAnalysisJob.objects.create()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RiskAnalysisJob.objects.create(status='running')
+        RiskAnalysisJob.objects.create(status='completed')
+
+    def test_stale_job_is_failed_and_replaced(self):
+        RiskAnalysisJob.enqueue()
+        stale = RiskAnalysisJob.claim_next()
+        RiskAnalysisJob.objects.filter(pk=stale.pk).update(
+            heartbeat_at=django_timezone.now() - RiskAnalysisJob.STALE_AFTER * 2
+        )
+
+        job, created = RiskAnalysisJob.enqueue()
+        self.assertTrue(created)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        # The old worker must not overwrite the outcome once it wakes up
+        self.assertFalse(stale.beat())
+        self.assertFalse(stale.finish('completed'))
+        self.assertEqual(RiskAnalysisJob.objects.get(pk=stale.pk).status, 'failed')
+
+    def test_finish_requires_a_running_job(self):
+        RiskAnalysisJob.enqueue()
+        job = RiskAnalysisJob.claim_next()
+        self.assertTrue(job.beat())
+        self.assertTrue(job.finish('completed', results={'total_analyzed': 0}))
+        self.assertFalse(job.finish('failed'))
+        self.assertEqual(RiskAnalysisJob.objects.get(pk=job.pk).status, 'completed')
@@ -0,0 +1,404 @@
+"""
+Scale benchmarks for the risk and network analyzers
+Generates seeded synthetic datasets and measures analysis, endpoints and exports
+"""
+import random
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from rest_framework.test import APIRequestFactory
+from dashboard import api_views
+from dashboard.models import (
+    District, TenderCategory, Organization, Tender, TenderBid, NetworkSnapshotState
+)
+from .cobidding import CoBiddingAnalyzer
+from .network_cache import network_snapshots
+from .network_index import network_index
+from .profiling import RunProfiler
+from .risk_analyzer import RiskAnalyzer, NetworkAnalyzer
+
+# Bumped when the layout of a benchmark results file changes
+BENCHMARK_FORMAT_VERSION = 1
+
+# Named dataset sizes, in tenders
+DATASET_SIZES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+# Metrics checked against a baseline, with the smallest value worth comparing
+# so sub-noise timings don't fail a run
+REGRESSION_METRICS = {
+    'wall_seconds': 0.05,
+    'queries': 1,
+    'peak_memory_mb': 1.0,
+}
+
+
+class SyntheticDataset:
+    """Seeded procurement data shaped like load_sample_data, written in bulk
+
+    The same seed and size always produce the same rows, so timings from
+    different code versions are comparable. Organization counts grow with
+    the number of tenders to keep the network realistically sparse.
+    """
+
+    BATCH_SIZE = 5000
+
+    DIVISIONS = (
+        'Dhaka', 'Chittagong', 'Rajshahi', 'Khulna',
+        'Barisal', 'Sylhet', 'Rangpur', 'Mymensingh',
+    )
+    CATEGORIES = (
+        'Infrastructure', 'IT Services', 'Healthcare', 'Education', 'Transportation',
+        'Energy', 'Water & Sanitation', 'Agriculture', 'Security', 'Consulting',
+    )
+    DISTRICTS_PER_DIVISION = 8
+
+    # Fixed so generated dates don't depend on when the benchmark runs
+    START_DATE = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    def __init__(self, tenders, seed=42):
+        self.tenders = tenders
+        self.seed = seed
+
+    def generate(self):
+        """Create the dataset in the current database and return its row counts"""
+        rng = random.Random(self.seed)
+        districts = self._create_districts()
+        categories = self._create_categories()
+        buyers, suppliers = self._create_organizations(rng, districts)
+
+        suppliers_by_district = {}
+        for supplier in suppliers:
+            suppliers_by_district.setdefault(supplier.district_id, []).append(supplier.id)
+        district_ids = [district.id for district in districts]
+
+        # Some buyers have 1-3 preferred suppliers, as in the sample data
+        preferred = {
+            buyer.id: rng.sample([supplier.id for supplier in suppliers], rng.randint(1, 3))
+            for buyer in rng.sample(buyers, max(1, len(buyers) // 8))
+        }
+
+        bids = 0
+        for start in range(0, self.tenders, self.BATCH_SIZE):
+            count = min(self.BATCH_SIZE, self.tenders - start)
+            bids += self._create_tenders(
+                rng, start, count, buyers, categories,
+                suppliers_by_district, district_ids, preferred,
+            )
+        # bulk_create skips the Tender signals that maintain the edge index
+        network_index.rebuild()
+
+        return {
+            'tenders': self.tenders,
+            'bids': bids,
+            'organizations': len(buyers) + len(suppliers),
+            'seed': self.seed,
+        }
+
+    def _create_districts(self):
+        District.objects.bulk_create([
+            District(
+                name=f'{division} {number:02d}',
+                division=division,
+                code=f'DV{index + 1}-{number:02d}',
+            )
+            for index, division in enumerate(self.DIVISIONS)
+            for number in range(1, self.DISTRICTS_PER_DIVISION + 1)
+        ])
+        return list(District.objects.order_by('id'))
+
+    def _create_categories(self):
+        TenderCategory.objects.bulk_create([
+            TenderCategory(name=name, description=f'{name} procurement')
+            for name in self.CATEGORIES
+        ])
+        return list(TenderCategory.objects.order_by('id'))
+
+    def _create_organizations(self, rng, districts):
+        buyer_count = max(150, self.tenders // 500)
+        supplier_count = max(500, self.tenders // 100)
+
+        organizations = [
+            Organization(
+                name=f'Buyer {i + 1:05d}',
+                organization_type='buyer',
+                district=rng.choice(districts),
+                registration_number=f'GOV-{i + 1:05d}',
+            )
+            for i in range(buyer_count)
+        ] + [
+            Organization(
+                name=f'Supplier {i + 1:06d}',
+                organization_type='supplier',
+                district=rng.choice(districts),
+                registration_number=f'SUP-{i + 1:06d}',
+                # 25% chance inactive
+                is_active=rng.random() >= 0.25,
+            )
+            for i in range(supplier_count)
+        ]
+        Organization.objects.bulk_create(organizations, batch_size=self.BATCH_SIZE)
+
+        buyers = list(Organization.objects.filter(organization_type='buyer').order_by('id'))
+        suppliers = list(
+            Organization.objects.filter(organization_type='supplier', is_active=True).order_by('id')
+        )
+        return buyers, suppliers
+
+    def _create_tenders(self, rng, start, count, buyers, categories,
+                        suppliers_by_district, district_ids, preferred):
+        """Create one batch of tenders and their bids, returning the bid count"""
+        tenders = []
+        tender_bids = []
+        for i in range(start, start + count):
+            buyer = rng.choice(buyers)
+            category = rng.choice(categories)
+
+            publication_date = self.START_DATE + timedelta(seconds=rng.randint(0, 730 * 86400))
+            # 15% chance of a suspiciously short window
+            if rng.random() < 0.15:
+                days_to_deadline = rng.randint(1, 6)
+            else:
+                days_to_deadline = rng.randint(7, 45)
+            submission_deadline = publication_date + timedelta(days=days_to_deadline)
+            opening_date = submission_deadline + timedelta(days=rng.randint(1, 3))
+
+            status = rng.choices(
+                ['published', 'closed', 'awarded', 'cancelled'],
+                weights=[0.1, 0.2, 0.6, 0.1]
+            )[0]
+            estimated_value = Decimal(rng.randint(100000, 50000000))
+
+            tender = Tender(
+                tender_id=f'BENCH-{self.seed}-{i + 1:07d}',
+                title=f'{category.name} Contract {i + 1}',
+                description='',
+                category=category,
+                buyer=buyer,
+                estimated_value=estimated_value,
+                publication_date=publication_date,
+                submission_deadline=submission_deadline,
+                opening_date=opening_date,
+                status=status,
+            )
+            bids = []
+            if status in ['closed', 'awarded']:
+                bids = self._generate_bids(
+                    rng, buyer, estimated_value, suppliers_by_district, district_ids, preferred
+                )
+            if status == 'awarded':
+                tender.award_date = opening_date + timedelta(days=rng.randint(1, 14))
+                winner = self._pick_winner(rng, bids, preferred.get(buyer.id, ()))
+                if winner:
+                    tender.winner_id = winner[0]
+                    tender.award_amount = winner[1]
+
+            tenders.append(tender)
+            tender_bids.append(bids)
+
+        Tender.objects.bulk_create(tenders)
+
+        bid_objects = []
+        for tender, bids in zip(tenders, tender_bids):
+            window_hours = 24 * max(1, (tender.submission_deadline - tender.publication_date).days)
+            for bidder_id, amount in bids:
+                bid_objects.append(TenderBid(
+                    tender_id=tender.id,
+                    bidder_id=bidder_id,
+                    bid_amount=amount,
+                    submission_date=tender.submission_deadline - timedelta(
+                        hours=rng.randint(1, window_hours)
+                    ),
+                    is_winner=bidder_id == tender.winner_id,
+                ))
+        TenderBid.objects.bulk_create(bid_objects, batch_size=self.BATCH_SIZE)
+        return len(bid_objects)
+
+    def _generate_bids(self, rng, buyer, estimated_value, suppliers_by_district,
+                       district_ids, preferred):
+        """Return (bidder_id, amount) pairs sorted by amount"""
+        # 12% single bid, then a 30% chance of two bids, otherwise 3-8
+        if rng.random() < 0.12:
+            num_bids = 1
+        elif rng.random() < 0.3:
+            num_bids = 2
+        else:
+            num_bids = rng.randint(3, 8)
+
+        bidders = []
+        buyer_preferred = preferred.get(buyer.id, ())
+        if buyer_preferred and rng.random() < 0.25:
+            bidders.append(rng.choice(buyer_preferred))
+
+        # Local suppliers plus those of three random districts
+        pool = set(suppliers_by_district.get(buyer.district_id, ()))
+        for district_id in rng.choices(district_ids, k=3):
+            pool.update(suppliers_by_district.get(district_id, ()))
+        pool.difference_update(bidders)
+        pool = sorted(pool)
+        bidders.extend(rng.sample(pool, min(num_bids - len(bidders), len(pool))))
+
+        bids = []
+        for bidder_id in bidders:
+            # Preferred suppliers bid closer to the estimate
+            if bidder_id in buyer_preferred:
+                variation = rng.uniform(0.95, 1.05)
+            else:
+                variation = rng.uniform(0.85, 1.1)
+            bids.append((bidder_id, (estimated_value * Decimal(variation)).quantize(Decimal('0.01'))))
+        bids.sort(key=lambda bid: bid[1])
+        return bids
+
+    def _pick_winner(self, rng, bids, buyer_preferred):
+        """Lowest bid wins, unless a preferred supplier is favoured"""
+        if not bids:
+            return None
+        for bid in bids:
+            if bid[0] in buyer_preferred and rng.random() < 0.3:
+                return bid
+        return bids[0]
+
+
+class BenchmarkSuite:
+    """Time the analysis paths, endpoints and exports on the current database
+
+    Every case records wall time, CPU time, query count, SQL time and
+    peak Python heap usage. With repeat > 1 the fastest run is kept. The
+    peak comes from one more, traced run of the case, so tracing overhead
+    stays out of the timings.
+    """
+
+    CASES = (
+        'risk_analysis',
+        'risk_analysis_vectorized',
+        'risk_analysis_in_database',
+        'network_build',
+        'cobidding',
+        'network_snapshot',
+        'endpoint.analytics_summary',
+        'endpoint.district_risks',
+        'endpoint.network_stats',
+        'export.tenders',
+        'export.risks',
+        'export.network',
+    )
+
+    def __init__(self, cases=None, repeat=1):
+        self.cases = cases or self.CASES
+        self.repeat = max(1, repeat)
+        self.factory = APIRequestFactory()
+
+    def run(self, on_case=None):
+        """Run the selected cases, returning metrics (or an error) per case"""
+        results = {}
+        for name in self.cases:
+            try:
+                results[name] = self.measure(name, getattr(self, self._method_name(name)))
+            except Exception as e:
+                results[name] = {'error': str(e)}
+            if on_case:
+                on_case(name, results[name])
+        return results
+
+    def measure(self, name, func):
+        """Time func repeat times, then run it once more under heap tracing"""
+        metrics = None
+        for _ in range(self.repeat):
+            profiler = RunProfiler()
+            with profiler.measure(name):
+                func()
+            run = profiler.as_dict()[name]
+            if metrics is None or run['wall_seconds'] < metrics['wall_seconds']:
+                metrics = run
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        del metrics['calls']
+        metrics['peak_memory_mb'] = round(peak / 2 ** 20, 3)
+        return metrics
+
+    def _method_name(self, name):
+        return 'bench_' + name.replace('.', '_')
+
+    def bench_risk_analysis(self):
+        RiskAnalyzer().analyze_tenders_batch()
+
+    def bench_risk_analysis_vectorized(self):
+        RiskAnalyzer().analyze_tenders_batch(vectorized=True)
+
+    def bench_risk_analysis_in_database(self):
+        RiskAnalyzer().analyze_tenders_in_database()
+
+    def bench_network_build(self):
+        NetworkAnalyzer().build_network()
+
+    def bench_cobidding(self):
+        CoBiddingAnalyzer().analyze()
+
+    def bench_network_snapshot(self):
+        # Also leaves a current snapshot for the network stats endpoint
+        network_snapshots.rebuild(NetworkSnapshotState.current().data_version)
+
+    def bench_endpoint_analytics_summary(self):
+        self._call_view(api_views.AnalyticsSummaryView, '/api/analytics/summary/')
+
+    def bench_endpoint_district_risks(self):
+        self._call_view(api_views.DistrictRiskView, '/api/analytics/district-risks/')
+
+    def bench_endpoint_network_stats(self):
+        self._call_view(api_views.NetworkStatsView, '/api/analytics/network-stats/')
+
+    def bench_export_tenders(self):
+        self._call_view(api_views.ExportTendersView, '/api/export/tenders/')
+
+    def bench_export_risks(self):
+        self._call_view(api_views.ExportRisksView, '/api/export/risks/')
+
+    def bench_export_network(self):
+        self._call_view(api_views.NetworkExportView, '/api/analytics/network-export/?graph=cobidding')
+
+    def _call_view(self, view_class, path):
+        """GET a view and consume the whole response body"""
+        response = view_class.as_view()(self.factory.get(path))
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.render()
+        if response.status_code >= 400:
+            raise RuntimeError(f'{path} returned {response.status_code}')
+
+
+def find_regressions(current, baseline, threshold):
+    """List metrics that grew by more than threshold (a fraction) over the baseline"""
+    regressions = []
+    for size, dataset in current['datasets'].items():
+        baseline_dataset = baseline.get('datasets', {}).get(size)
+        if not baseline_dataset or baseline_dataset['dataset'].get('seed') != dataset['dataset']['seed']:
+            continue
+
+        for case, metrics in dataset['cases'].items():
+            before_metrics = baseline_dataset['cases'].get(case)
+            if not before_metrics or 'error' in before_metrics or 'error' in metrics:
+                continue
+            for metric, floor in REGRESSION_METRICS.items():
+                before, after = before_metrics.get(metric), metrics.get(metric)
+                if before is None or after is None or max(before, after) < floor:
+                    continue
+                if after > before * (1 + threshold):
+                    regressions.append({
+                        'size': size,
+                        'case': case,
+                        'metric': metric,
+                        'baseline': before,
+                        'current': after,
+                    })
+    return regressions
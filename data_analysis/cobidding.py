@@ -0,0 +1,188 @@
+"""
+Co-bidding analysis for cover bidding and bid rotation
+Finds groups of suppliers that keep bidding on the same tenders and take
+turns winning them
+"""
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import math
+from array import array
+from dashboard.models import Organization, TenderBid
+from .graph_algorithms import co_occurrence
+
+
+class CoBiddingAnalyzer:
+    """Supplier communities in the co-bidding graph
+
+    Bids are read in one pass into a tender x supplier incidence matrix B.
+    B.T @ B counts the tenders every pair of suppliers bid on together;
+    pairs that share enough of their tenders are strong ties. Label
+    propagation over the strong ties groups suppliers into communities,
+    and each community is scored on how its members split the wins of the
+    tenders they bid on together.
+    """
+
+    # Bids read per database round trip
+    BATCH_SIZE = 10000
+
+    # A strong tie needs this many shared tenders...
+    MIN_SHARED_TENDERS = 3
+
+    # ...covering this share of the less active supplier's bids
+    MIN_OVERLAP = 0.5
+
+    MIN_COMMUNITY_SIZE = 3
+
+    MAX_ITERATIONS = 20
+
+    # Communities kept in the results, most shared tenders first
+    MAX_COMMUNITIES = 100
+
+    def analyze(self):
+        """Find co-bidding communities and score their win rotation"""
+        if not NUMPY_AVAILABLE:
+            return {'error': 'NumPy not available. Install numpy for co-bidding analysis.'}
+
+        tenders, suppliers, winners = self._load_bids()
+        supplier_ids, supplier_index = np.unique(suppliers, return_inverse=True)
+        _, tender_index = np.unique(tenders, return_inverse=True)
+        bids_per_supplier = np.bincount(supplier_index, minlength=len(supplier_ids))
+
+        first, second, shared = co_occurrence(tender_index, supplier_index, len(supplier_ids))
+        smaller = np.minimum(bids_per_supplier[first], bids_per_supplier[second])
+        strong = (shared >= self.MIN_SHARED_TENDERS) & (shared >= self.MIN_OVERLAP * smaller)
+        first, second, shared = first[strong], second[strong], shared[strong]
+
+        labels = self.propagate_labels(first, second, shared, len(supplier_ids))
+        communities = self._communities(
+            labels, first, second, shared, tender_index, supplier_index, winners, supplier_ids,
+            bids_per_supplier,
+        )
+        return {
+            'summary': {
+                'bids': len(tenders),
+                'suppliers': len(supplier_ids),
+                'co_bidding_pairs': len(strong),
+                'strong_pairs': len(first),
+                'communities': len(communities),
+            },
+            'thresholds': {
+                'min_shared_tenders': self.MIN_SHARED_TENDERS,
+                'min_overlap': self.MIN_OVERLAP,
+                'min_community_size': self.MIN_COMMUNITY_SIZE,
+            },
+            'communities': communities[:self.MAX_COMMUNITIES],
+        }
+
+    def propagate_labels(self, first, second, weights, n_nodes):
+        """Community label of every node by synchronous weighted label propagation
+
+        Every node also votes for its own label with its strongest tie, so
+        pairs settle on one label instead of swapping forever; ties go to
+        the smallest label. Nodes without strong ties keep their own label.
+        """
+        labels = np.arange(n_nodes)
+        if not len(first):
+            return labels
+        nodes = np.unique(np.concatenate([first, second]))
+        strongest = np.zeros(n_nodes, dtype=np.int64)
+        np.maximum.at(strongest, first, weights)
+        np.maximum.at(strongest, second, weights)
+
+        sources = np.concatenate([first, second, nodes])
+        targets = np.concatenate([second, first, nodes])
+        votes = np.concatenate([weights, weights, strongest[nodes]])
+        for _ in range(self.MAX_ITERATIONS):
+            keys, inverse = np.unique(sources * n_nodes + labels[targets], return_inverse=True)
+            totals = np.bincount(inverse, weights=votes)
+            node, label = keys // n_nodes, keys % n_nodes
+            # Per node, the heaviest label and the smallest on ties
+            order = np.lexsort((label, -totals, node))
+            best = order[np.r_[True, node[order][1:] != node[order][:-1]]]
+            updated = labels.copy()
+            updated[node[best]] = label[best]
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+        return labels
+
+    def _load_bids(self):
+        tenders, suppliers, winners = array('q'), array('q'), array('b')
+        rows = TenderBid.objects.order_by().values_list('tender_id', 'bidder_id', 'is_winner')
+        for tender_id, bidder_id, is_winner in rows.iterator(chunk_size=self.BATCH_SIZE):
+            tenders.append(tender_id)
+            suppliers.append(bidder_id)
+            winners.append(is_winner)
+        return (
+            np.frombuffer(tenders, dtype=np.int64),
+            np.frombuffer(suppliers, dtype=np.int64),
+            np.frombuffer(winners, dtype=np.int8).astype(bool),
+        )
+
+    def _communities(self, labels, first, second, shared, tender_index, supplier_index, winners,
+                     supplier_ids, bids_per_supplier):
+        """Score each community on the tenders at least two members bid on"""
+        tied = np.unique(np.concatenate([first, second]))
+        label_ids, sizes = np.unique(labels[tied], return_counts=True)
+        label_ids = label_ids[sizes >= self.MIN_COMMUNITY_SIZE]
+        if not len(label_ids):
+            return []
+
+        # Community number of every supplier, -1 outside any community
+        community = np.full(len(labels), -1)
+        members = tied[np.isin(labels[tied], label_ids)]
+        community[members] = np.searchsorted(label_ids, labels[members])
+        n_communities = len(label_ids)
+
+        # Member bids on tenders where another member of the same community bid too
+        in_community = np.flatnonzero(community[supplier_index] >= 0)
+        keys = tender_index[in_community] * n_communities + community[supplier_index[in_community]]
+        tender_keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        together = in_community[counts[inverse] >= 2]
+        shared_tenders = np.bincount(tender_keys[counts >= 2] % n_communities, minlength=n_communities)
+        wins = np.bincount(supplier_index[together[winners[together]]], minlength=len(labels))
+
+        internal = community[first] == community[second]
+        internal_weight = np.bincount(
+            community[first[internal & (community[first] >= 0)]],
+            weights=shared[internal & (community[first] >= 0)], minlength=n_communities,
+        )
+
+        member_ids = supplier_ids[members].tolist()
+        names = dict(Organization.objects.filter(id__in=member_ids).values_list('id', 'name'))
+        results = []
+        for number in range(n_communities):
+            group = np.sort(members[community[members] == number])
+            group_wins = wins[group]
+            results.append({
+                'size': len(group),
+                'shared_tenders': int(shared_tenders[number]),
+                'co_bids': int(internal_weight[number]),
+                'member_wins': int(group_wins.sum()),
+                'distinct_winners': int(np.count_nonzero(group_wins)),
+                'win_rotation': self._rotation(group_wins),
+                'suppliers': [
+                    {
+                        'organization_id': int(supplier_ids[i]),
+                        'name': names.get(int(supplier_ids[i])),
+                        'bids': int(bids_per_supplier[i]),
+                        'wins_together': int(wins[i]),
+                    }
+                    for i in group
+                ],
+            })
+        results.sort(key=lambda item: (-item['shared_tenders'], -item['win_rotation'],
+                                        item['suppliers'][0]['organization_id']))
+        return results
+
+    def _rotation(self, wins):
+        """How evenly members split their wins: 0 for one winner, 1 for equal turns"""
+        total = wins.sum()
+        if len(wins) < 2 or not total:
+            return 0.0
+        shares = wins[wins > 0] / total
+        return round(float(-(shares * np.log(shares)).sum() / math.log(len(wins))), 4)
@@ -0,0 +1,210 @@
+"""
+Organization entity resolution for imports
+Matches incoming organization names to existing organizations despite
+legal-form, punctuation and Bangla transliteration differences
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+# Canonical token -> spellings seen in procurement exports, Latin and Bangla
+TOKEN_VARIANTS = {
+    'ltd': ('limited', 'ltd', 'lt', 'limitted', 'লিমিটেড', 'লিঃ', 'লি'),
+    'pvt': ('private', 'pvt', 'pvte', 'প্রাইভেট'),
+    'co': ('company', 'co', 'coy', 'কোম্পানি', 'কোং'),
+    'corp': ('corporation', 'corp', 'কর্পোরেশন'),
+    'inc': ('incorporated', 'inc'),
+    'and': ('and', 'এন্ড', 'অ্যান্ড', 'ও'),
+    'bros': ('brothers', 'bros', 'brother', 'ব্রাদার্স'),
+    'intl': ('international', 'intl', 'int', 'ইন্টারন্যাশনাল'),
+    'engg': ('engineering', 'engg', 'eng', 'engineers', 'ইঞ্জিনিয়ারিং'),
+    'enterprise': ('enterprise', 'enterprises', 'ent', 'entp', 'এন্টারপ্রাইজ'),
+    'trader': ('traders', 'trader', 'ট্রেডার্স'),
+    'trading': ('trading', 'ট্রেডিং'),
+    'construction': ('construction', 'constructions', 'const', 'কনস্ট্রাকশন'),
+    'builder': ('builders', 'builder', 'বিল্ডার্স'),
+    'associates': ('associates', 'associate', 'assoc', 'এসোসিয়েটস'),
+    'md': ('md', 'mohammad', 'mohammed', 'muhammad', 'muhammed', 'mohamed', 'mohd', 'mohamad', 'মোঃ',
+           'মোহাম্মদ', 'মুহাম্মদ'),
+    'abdul': ('abdul', 'abdur', 'abdus', 'abdun', 'abdel'),
+    'ahmed': ('ahmed', 'ahmad', 'ahamed', 'ahmmed', 'ahammed'),
+    'hossain': ('hossain', 'hussain', 'hosain', 'hussein', 'hossen', 'hosen', 'husain'),
+    'rahman': ('rahman', 'rahaman', 'rehman', 'rohman'),
+    'uddin': ('uddin', 'uddeen', 'udin', 'uddyn'),
+    'chowdhury': ('chowdhury', 'chowdhuri', 'choudhury', 'chowdury', 'chaudhury', 'chowdhery',
+                  'chaudhuri', 'চৌধুরী'),
+    'bhuiyan': ('bhuiyan', 'bhuiya', 'bhuyan', 'bhuiyen', 'bhuian'),
+    'sheikh': ('sheikh', 'shaikh', 'shekh', 'sk', 'শেখ'),
+    'haque': ('haque', 'hoque', 'huq', 'haq', 'hoq'),
+    'talukder': ('talukder', 'talukdar', 'talukdir'),
+    'majumder': ('majumder', 'mazumder', 'mozumder', 'majumdar', 'mojumder'),
+    'sarker': ('sarker', 'sarkar', 'sircar', 'sarkir'),
+    'mia': ('mia', 'miah', 'mian', 'mea', 'miya'),
+}
+
+# Honorifics that carry no identity
+IGNORED_TOKENS = ('messrs', 'mrs', 'ms')
+
+MESSRS = re.compile(r'\bm\s*/\s*s\b\.?')
+# Anything but letters, digits and the Bengali block (whose vowel signs are not \w)
+SEPARATORS = re.compile(r'[^\w\u0980-\u09ff]+|_')
+DOUBLED = re.compile(r'([a-z])\1+')
+SILENT = re.compile(r'[aeiouyh]')
+DIGITS = re.compile(r'\d')
+PHONETIC_REPLACEMENTS = (('ph', 'f'), ('ck', 'k'), ('q', 'k'), ('x', 'ks'), ('z', 'j'), ('v', 'b'), ('w', 'o'))
+
+
+def _fold(token):
+    """Spelling-insensitive form of a Latin token: long vowels and doubled letters collapsed"""
+    if not token.isascii():
+        return token
+    return DOUBLED.sub(r'\1', token.replace('ee', 'i').replace('oo', 'u'))
+
+
+def _phonetic(token):
+    """Sound of a token: its first letter and consonant skeleton, without h"""
+    if not token.isascii() or token.isdigit():
+        return token
+    for old, new in PHONETIC_REPLACEMENTS:
+        token = token.replace(old, new)
+    return DOUBLED.sub(r'\1', token[0] + SILENT.sub('', token[1:]))
+
+
+def _trigrams(text):
+    padded = f' {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+CANONICAL_TOKENS = {
+    _fold(variant): canonical
+    for canonical, variants in TOKEN_VARIANTS.items()
+    for variant in variants
+}
+
+
+class OrganizationResolver:
+    """Resolve organization names against an in-memory blocking index
+
+    Names are normalized to canonical tokens, so 'M/S. Rahaman Traders
+    Limited' and 'Rahman Traders Ltd' are the same name. Equal normalized
+    names match directly; otherwise candidates come from the blocks of
+    the name's tokens, keyed by their consonant skeletons, and only those
+    are scored by trigram Dice similarity. Blocks of tokens shared by too
+    many organizations are skipped, and names whose numbers differ never
+    match, so 'Supplier 12' is not 'Supplier 21'. Organizations with
+    different registration numbers never match either.
+
+    Only equal normalized names, and similar names in the same district,
+    are certain enough to merge. A similar name elsewhere, or one whose
+    tokens merely sound the same ('Rahim' and 'Rahima'), is returned as a
+    candidate for review.
+    """
+
+    # Lowest Dice similarity of a match, and of a same-sounding review candidate
+    MATCH_THRESHOLD = 0.92
+    PHONETIC_THRESHOLD = 0.8
+
+    # Tokens shared by more organizations than this are too common to block on
+    MAX_BLOCK_SIZE = 500
+
+    # Candidates scored per name, gathered from the smallest blocks first
+    MAX_CANDIDATES = 50
+
+    def __init__(self):
+        self.names = {}
+        self.registration_numbers = {}
+        self.districts = {}
+        self.exact = {}
+        self.blocks = defaultdict(list)
+
+    def __len__(self):
+        return len(self.names)
+
+    def normalize(self, name):
+        """Canonical lower-case tokens of a name, joined by spaces"""
+        text = MESSRS.sub(' ', unicodedata.normalize('NFKC', name).casefold().replace('&', ' and '))
+        tokens = []
+        for token in SEPARATORS.sub(' ', text).split():
+            token = _fold(token)
+            if token not in IGNORED_TOKENS:
+                tokens.append(CANONICAL_TOKENS.get(token, token))
+        return ' '.join(tokens)
+
+    def add(self, organization_id, name, registration_number='', district_id=None):
+        """Index an organization by its normalized name and blocking keys"""
+        normalized = self.normalize(name)
+        if not normalized:
+            return
+        self.names[organization_id] = normalized
+        self.registration_numbers[organization_id] = registration_number
+        self.districts[organization_id] = district_id
+        self.exact.setdefault(normalized, []).append(organization_id)
+        for key in self._block_keys(normalized):
+            self.blocks[key].append(organization_id)
+
+    def resolve(self, name, registration_number='', district_id=None):
+        """Best match of a raw name, see match()"""
+        return self.match(self.normalize(name), registration_number, district_id)
+
+    def match(self, normalized, registration_number='', district_id=None):
+        """Best existing organization for a normalized name, or None
+
+        Returns organization_id, score, method ('normalized', 'phonetic'
+        or 'fuzzy') and merge, False for a candidate that needs review.
+        """
+        if not normalized:
+            return None
+        # Equal names resolve to the oldest organization
+        equal = [
+            organization_id for organization_id in self.exact.get(normalized, ())
+            if self._compatible(organization_id, registration_number)
+        ]
+        if equal:
+            return {'organization_id': min(equal), 'score': 1.0, 'method': 'normalized', 'merge': True}
+
+        candidates = set()
+        blocks = sorted((self.blocks[key] for key in self._block_keys(normalized) if key in self.blocks), key=len)
+        for block in blocks:
+            if len(block) > self.MAX_BLOCK_SIZE:
+                break
+            candidates.update(block)
+            if len(candidates) >= self.MAX_CANDIDATES:
+                break
+
+        numbers = self._numbers(normalized)
+        sound = self._sound(normalized)
+        grams = _trigrams(normalized)
+        best = None
+        for organization_id in candidates:
+            other = self.names[organization_id]
+            if not self._compatible(organization_id, registration_number) or self._numbers(other) != numbers:
+                continue
+            other_grams = _trigrams(other)
+            score = 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+            if score >= self.MATCH_THRESHOLD:
+                method = 'fuzzy'
+                merge = district_id is not None and self.districts[organization_id] == district_id
+            elif self._sound(other) == sound and score >= self.PHONETIC_THRESHOLD:
+                method, merge = 'phonetic', False
+            else:
+                continue
+            # A match that can be merged beats a closer one that needs review
+            rank = (merge, score, -organization_id)
+            if best is None or rank > (best['merge'], best['score'], -best['organization_id']):
+                best = {'organization_id': organization_id, 'score': score, 'method': method, 'merge': merge}
+        if best:
+            best['score'] = round(best['score'], 4)
+        return best
+
+    def _block_keys(self, normalized):
+        return {_phonetic(token) for token in normalized.split()}
+
+    def _sound(self, normalized):
+        return [_phonetic(token) for token in normalized.split()]
+
+    def _numbers(self, normalized):
+        return [token for token in normalized.split() if DIGITS.search(token)]
+
+    def _compatible(self, organization_id, registration_number):
+        other = self.registration_numbers[organization_id]
+        return not (registration_number and other and registration_number != other)
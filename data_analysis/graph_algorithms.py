@@ -0,0 +1,464 @@
+"""
+Network statistics without NetworkX
+Density, connected components, triangles and clustering, computed with
+NumPy over a CSRGraphStore or in pure Python over an AdjacencyGraph,
+exactly or estimated from sampled wedges
+"""
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+import math
+import random
+import time
+from collections import Counter
+from .graph_store import CSRGraphStore
+
+# Wedges checked per NumPy batch when counting triangles
+WEDGE_BATCH = 2_000_000
+
+# Wedges drawn per round when estimating; the time budget is checked between rounds
+SAMPLE_BATCH = 20_000
+
+# Member pairs expanded per NumPy batch in co_occurrence without SciPy
+PAIR_BATCH = 2_000_000
+
+
+class AdjacencyGraph:
+    """Undirected weighted graph in plain dicts, for when NumPy is missing
+
+    Offers the same queries as CSRGraphStore. A self-loop is stored once
+    and counts twice towards the degree, as in NetworkX.
+    """
+
+    def __init__(self):
+        self.adjacency = {}
+
+    @classmethod
+    def from_edges(cls, node_ids, pairs):
+        """Build from node ids and (buyer_id, winner_id, count) rows"""
+        graph = cls()
+        for node_id in node_ids:
+            graph.adjacency[node_id] = {}
+        for buyer_id, winner_id, count in pairs:
+            if buyer_id not in graph.adjacency or winner_id not in graph.adjacency:
+                continue
+            # A pair and its reverse are the same undirected edge
+            weight = graph.adjacency[buyer_id].get(winner_id, 0) + count
+            graph.adjacency[buyer_id][winner_id] = weight
+            graph.adjacency[winner_id][buyer_id] = weight
+        return graph
+
+    @property
+    def number_of_nodes(self):
+        return len(self.adjacency)
+
+    @property
+    def number_of_edges(self):
+        loops = sum(1 for node, neighbors in self.adjacency.items() if node in neighbors)
+        return (sum(len(neighbors) for neighbors in self.adjacency.values()) - loops) // 2 + loops
+
+    def has_node(self, org_id):
+        return org_id in self.adjacency
+
+    def degree(self, org_id):
+        neighbors = self.adjacency[org_id]
+        return len(neighbors) + (1 if org_id in neighbors else 0)
+
+    def neighbors(self, org_id):
+        return sorted(self.adjacency[org_id])
+
+    def edge_weight(self, org_id, other_id):
+        return self.adjacency[org_id].get(other_id, 0)
+
+    def degree_items(self, min_degree=0):
+        """(org_id, degree) for nodes with at least min_degree, by id"""
+        for org_id in sorted(self.adjacency):
+            degree = self.degree(org_id)
+            if degree >= min_degree:
+                yield org_id, degree
+
+    def weighted_edges(self, min_weight=1):
+        """(org_id, other_id, weight) once per edge, with org_id <= other_id"""
+        for org_id in sorted(self.adjacency):
+            for other_id in sorted(self.adjacency[org_id]):
+                weight = self.adjacency[org_id][other_id]
+                if org_id <= other_id and weight >= min_weight:
+                    yield org_id, other_id, weight
+
+
+def density(graph):
+    """Edges over possible edges, as nx.density"""
+    n = graph.number_of_nodes
+    if n <= 1:
+        return 0
+    return 2 * graph.number_of_edges / (n * (n - 1))
+
+
+def connected_components(graph):
+    """Number of connected components, isolated nodes included"""
+    if isinstance(graph, CSRGraphStore):
+        return _csr_components(graph)
+    return _adjacency_components(graph)
+
+
+def average_clustering(graph):
+    """Mean local clustering coefficient over all nodes, as nx.average_clustering"""
+    if not graph.number_of_nodes:
+        return 0
+    if isinstance(graph, CSRGraphStore):
+        triangles, degrees = _csr_triangles(graph)
+        coefficients = np.zeros(len(degrees))
+        closed = degrees >= 2
+        coefficients[closed] = 2 * triangles[closed] / (degrees[closed] * (degrees[closed] - 1))
+        return float(coefficients.mean())
+
+    triangles, degrees = _adjacency_triangles(graph)
+    total = 0
+    for node, degree in degrees.items():
+        if degree >= 2:
+            total += 2 * triangles[node] / (degree * (degree - 1))
+    return total / len(degrees)
+
+
+def triangle_count(graph):
+    """Number of triangles, self-loops ignored"""
+    if isinstance(graph, CSRGraphStore):
+        triangles, _ = _csr_triangles(graph)
+        return int(triangles.sum()) // 3
+    triangles, _ = _adjacency_triangles(graph)
+    return sum(triangles.values()) // 3
+
+
+def degree_percentiles(graph, percentiles=(50, 90, 99)):
+    """Nearest-rank degree percentiles from the degree histogram
+
+    Degrees are small integers, so the histogram is an exact sketch no
+    larger than the maximum degree.
+    """
+    if isinstance(graph, CSRGraphStore):
+        histogram = Counter(dict(enumerate(np.bincount(graph.degrees).tolist())))
+    else:
+        histogram = Counter(degree for _, degree in graph.degree_items())
+    n = graph.number_of_nodes
+    results = {}
+    for q in percentiles:
+        rank = max(1, math.ceil(q / 100 * n))
+        seen = 0
+        for degree in sorted(histogram):
+            seen += histogram[degree]
+            if seen >= rank:
+                results[f'p{q}'] = degree
+                break
+        else:
+            results[f'p{q}'] = 0
+    return results
+
+
+def sample_size(error, confidence):
+    """Samples of a [0, 1] quantity for the given error at this confidence (Hoeffding)"""
+    return math.ceil(math.log(2 / (1 - confidence)) / (2 * error ** 2))
+
+
+def sampling_error(samples, confidence):
+    """Hoeffding error bound of a mean of samples in [0, 1]"""
+    if not samples:
+        return 1.0
+    return math.sqrt(math.log(2 / (1 - confidence)) / (2 * samples))
+
+
+def estimate_clustering(graph, error=0.01, confidence=0.95, time_budget=None, seed=None):
+    """Average clustering estimated from one random wedge per sampled node
+
+    Returns (estimate, samples, error bound). Sampling stops at the number
+    of samples the error needs or when time_budget seconds run out, and
+    the bound is for the samples actually drawn.
+    """
+    if not graph.number_of_nodes:
+        return 0, 0, 0
+    sampler = _CSRWedges(graph, seed) if isinstance(graph, CSRGraphStore) else _AdjacencyWedges(graph, seed)
+    closed, samples = _sample(sampler.node_wedges, sample_size(error, confidence), time_budget)
+    return closed / samples, samples, sampling_error(samples, confidence)
+
+
+def estimate_triangles(graph, error=0.01, confidence=0.95, time_budget=None, seed=None):
+    """Transitivity and triangle count estimated from uniformly sampled wedges
+
+    Returns (transitivity, triangles, samples, transitivity error bound,
+    triangles error bound). Every triangle closes three wedges, so the
+    triangle count is the closed share of all wedges divided by three.
+    """
+    sampler = _CSRWedges(graph, seed) if isinstance(graph, CSRGraphStore) else _AdjacencyWedges(graph, seed)
+    if not sampler.wedges:
+        return 0, 0, 0, 0, 0
+    closed, samples = _sample(sampler.uniform_wedges, sample_size(error, confidence), time_budget)
+    bound = sampling_error(samples, confidence)
+    transitivity = closed / samples
+    return transitivity, transitivity * sampler.wedges / 3, samples, bound, bound * sampler.wedges / 3
+
+
+def _sample(draw, target, time_budget):
+    """Draw batches of wedges until target samples or the time budget"""
+    started = time.perf_counter()
+    closed = samples = 0
+    while samples < target:
+        batch = min(SAMPLE_BATCH, target - samples)
+        closed += draw(batch)
+        samples += batch
+        if time_budget is not None and time.perf_counter() - started >= time_budget:
+            break
+    return closed, samples
+
+
+class _CSRWedges:
+    """Random wedges over the self-loop-free rows of a CSRGraphStore"""
+
+    def __init__(self, store, seed):
+        self.rng = np.random.default_rng(seed)
+        self.n = store.number_of_nodes
+        rows = store.row_indices()
+        cols = store.targets.astype(np.int64)
+        proper = rows != cols
+        self.cols = cols[proper]
+        self.degrees = np.bincount(rows[proper], minlength=self.n)
+        self.offsets = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(self.degrees, out=self.offsets[1:])
+        # Rows are sorted by (row, col), so these keys are sorted too
+        self.edge_keys = rows[proper] * self.n + self.cols
+
+        pairs = self.degrees * (self.degrees - 1) // 2
+        self.cumulative_wedges = np.cumsum(pairs)
+        self.wedges = int(self.cumulative_wedges[-1]) if self.n else 0
+
+    def node_wedges(self, count):
+        """Closed wedges among count uniform nodes, those of degree < 2 counting as open"""
+        centers = self.rng.integers(0, self.n, count)
+        return self._closed(centers[self.degrees[centers] >= 2])
+
+    def uniform_wedges(self, count):
+        """Closed wedges among count wedges drawn uniformly from all wedges"""
+        picks = self.rng.integers(0, self.wedges, count)
+        return self._closed(np.searchsorted(self.cumulative_wedges, picks, side='right'))
+
+    def _closed(self, centers):
+        degrees = self.degrees[centers]
+        first = (self.rng.random(len(centers)) * degrees).astype(np.int64)
+        second = (self.rng.random(len(centers)) * (degrees - 1)).astype(np.int64)
+        second += second >= first
+        v = self.cols[self.offsets[centers] + first]
+        w = self.cols[self.offsets[centers] + second]
+        keys = v * self.n + w
+        found = np.minimum(np.searchsorted(self.edge_keys, keys), max(len(self.edge_keys) - 1, 0))
+        return int(np.count_nonzero(self.edge_keys[found] == keys))
+
+
+class _AdjacencyWedges:
+    """Random wedges over an AdjacencyGraph"""
+
+    def __init__(self, graph, seed):
+        self.rng = random.Random(seed)
+        self.neighbors = {node: set(adjacent) - {node} for node, adjacent in graph.adjacency.items()}
+        self.nodes = list(self.neighbors)
+        self.lists = {node: sorted(adjacent) for node, adjacent in self.neighbors.items()}
+        self.centers = [node for node in self.nodes if len(self.lists[node]) >= 2]
+        self.weights = [len(self.lists[node]) * (len(self.lists[node]) - 1) // 2 for node in self.centers]
+        self.wedges = sum(self.weights)
+
+    def node_wedges(self, count):
+        return sum(self._is_closed(node) for node in self.rng.choices(self.nodes, k=count)
+                   if len(self.lists[node]) >= 2)
+
+    def uniform_wedges(self, count):
+        return sum(self._is_closed(node) for node in self.rng.choices(self.centers, weights=self.weights, k=count))
+
+    def _is_closed(self, node):
+        v, w = self.rng.sample(self.lists[node], 2)
+        return w in self.neighbors[v]
+
+
+def co_occurrence(groups, members, n_members):
+    """(first, second, shared groups) for every member pair with first < second
+
+    groups and members are the row and column indices of an incidence
+    matrix B (tenders x bidders, suppliers x buyers, ...); the counts are
+    the upper triangle of B.T @ B, a repeated (group, member) counting once.
+    """
+    if SCIPY_AVAILABLE:
+        incidence = sparse.csr_matrix(
+            (np.ones(len(groups), dtype=np.int64), (groups, members)),
+            shape=(int(groups.max(initial=-1)) + 1, n_members),
+        )
+        incidence.data[:] = 1
+        pairs = sparse.triu(incidence.T @ incidence, k=1).tocoo()
+        order = np.lexsort((pairs.col, pairs.row))
+        return (
+            pairs.row[order].astype(np.int64),
+            pairs.col[order].astype(np.int64),
+            pairs.data[order].astype(np.int64),
+        )
+    return _expand_pairs(groups, members, n_members)
+
+
+def _expand_pairs(groups, members, n_members):
+    """B.T @ B without SciPy: list each group's member pairs and count them"""
+    entries = np.unique(groups * n_members + members)
+    groups, members = entries // n_members, entries % n_members
+    # Entries are sorted by group, then member; pair each with the later entries of its group
+    ends = np.searchsorted(groups, groups, side='right')
+    later = ends - np.arange(len(entries)) - 1
+
+    keys, counts = [], []
+    cumulative = np.cumsum(later)
+    total = int(cumulative[-1]) if len(cumulative) else 0
+    bounds = np.searchsorted(cumulative, np.arange(PAIR_BATCH, total, PAIR_BATCH))
+    for batch in np.split(np.arange(len(entries)), bounds):
+        repeats = later[batch]
+        size = int(repeats.sum())
+        if not size:
+            continue
+        firsts = np.repeat(batch, repeats)
+        starts = np.repeat(np.cumsum(repeats) - repeats, repeats)
+        seconds = firsts + 1 + (np.arange(size) - starts)
+        batch_keys, batch_counts = np.unique(
+            members[firsts] * n_members + members[seconds], return_counts=True
+        )
+        keys.append(batch_keys)
+        counts.append(batch_counts)
+
+    if not keys:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    pair_keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    shared = np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+    return pair_keys // n_members, pair_keys % n_members, shared
+
+
+def _csr_components(store):
+    """Union-find with parallel hooking and pointer jumping over the edge arrays"""
+    n = store.number_of_nodes
+    if not n:
+        return 0
+    rows = store.row_indices()
+    cols = store.targets.astype(np.int64)
+    parent = np.arange(n)
+    while True:
+        root_rows, root_cols = parent[rows], parent[cols]
+        differ = root_rows != root_cols
+        if not differ.any():
+            break
+        # Hook the larger root of each crossing edge under the smaller one
+        np.minimum.at(
+            parent,
+            np.maximum(root_rows[differ], root_cols[differ]),
+            np.minimum(root_rows[differ], root_cols[differ]),
+        )
+        # Compress until every node points straight at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return int(np.count_nonzero(parent == np.arange(n)))
+
+
+def _adjacency_components(graph):
+    """Union-find with path halving"""
+    parent = {node: node for node in graph.adjacency}
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    components = len(parent)
+    for node, neighbors in graph.adjacency.items():
+        for neighbor in neighbors:
+            root, other = find(node), find(neighbor)
+            if root != other:
+                parent[other] = root
+                components -= 1
+    return components
+
+
+def _csr_triangles(store):
+    """Triangles through each node and its degree ignoring self-loops
+
+    Edges are oriented from lower to higher (degree, index) rank, so each
+    triangle is found once, from its lowest-ranked corner, and no node has
+    more than O(sqrt(edges)) outgoing edges to pair up.
+    """
+    n = store.number_of_nodes
+    rows = store.row_indices()
+    cols = store.targets.astype(np.int64)
+    proper = rows != cols
+    rows, cols = rows[proper], cols[proper]
+    degrees = np.bincount(rows, minlength=n)
+    triangles = np.zeros(n, dtype=np.int64)
+
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), degrees))] = np.arange(n)
+    forward = rank[rows] < rank[cols]
+    out_rows, out_cols = rows[forward], cols[forward]
+    if not len(out_rows):
+        return triangles, degrees
+
+    # Sorted keys of every undirected edge, for membership tests
+    edge_keys = np.unique(np.minimum(rows, cols) * n + np.maximum(rows, cols))
+
+    # Each outgoing edge pairs with the later outgoing edges of the same node
+    out_degrees = np.bincount(out_rows, minlength=n)
+    starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(out_degrees[:-1], out=starts[1:])
+    positions = np.arange(len(out_rows))
+    later = out_degrees[out_rows] - 1 - (positions - starts[out_rows])
+
+    cumulative = np.cumsum(later)
+    bounds = np.searchsorted(cumulative, np.arange(WEDGE_BATCH, cumulative[-1], WEDGE_BATCH))
+    for batch in np.split(positions, bounds):
+        counts = later[batch]
+        total = int(counts.sum())
+        if not total:
+            continue
+        first = np.repeat(batch, counts)
+        batch_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + (np.arange(total) - batch_starts)
+
+        u, v, w = out_rows[first], out_cols[first], out_cols[second]
+        keys = np.minimum(v, w) * n + np.maximum(v, w)
+        found = np.searchsorted(edge_keys, keys)
+        found = np.minimum(found, len(edge_keys) - 1)
+        closed = edge_keys[found] == keys
+        for corner in (u[closed], v[closed], w[closed]):
+            triangles += np.bincount(corner, minlength=n)
+    return triangles, degrees
+
+
+def _adjacency_triangles(graph):
+    """Triangles per node by the same rank-oriented forward algorithm"""
+    neighbors = {
+        node: set(adjacent) - {node} for node, adjacent in graph.adjacency.items()
+    }
+    degrees = {node: len(adjacent) for node, adjacent in neighbors.items()}
+    rank = {node: i for i, node in enumerate(sorted(neighbors, key=lambda node: (degrees[node], node)))}
+    forward = {
+        node: {other for other in adjacent if rank[other] > rank[node]}
+        for node, adjacent in neighbors.items()
+    }
+
+    triangles = dict.fromkeys(neighbors, 0)
+    for node, later in forward.items():
+        for other in later:
+            for third in later & forward[other]:
+                triangles[node] += 1
+                triangles[other] += 1
+                triangles[third] += 1
+    return triangles, degrees
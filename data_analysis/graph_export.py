@@ -0,0 +1,200 @@
+"""
+Streaming exports of the award and co-bidding networks
+Edge lists are generated from server-side cursors, so memory stays flat
+however large the graph is
+"""
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+import json
+from xml.sax.saxutils import escape
+from django.db.models import Count, F, Q, Sum
+from dashboard.models import Organization, Tender, TenderBid
+
+
+class _ChunkSink:
+    """Write-only file object that hands its bytes back between writes"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class GraphExporter:
+    """Stream one network as NDJSON, GraphML or Parquet
+
+    'award' is the directed buyer -> winner graph of awarded tenders,
+    weighted by tender count and awarded value. 'cobidding' is the
+    undirected graph of suppliers that bid on the same tenders, weighted
+    by shared tenders. Filters restrict the tenders behind the edges.
+    """
+
+    GRAPHS = ('award', 'cobidding')
+
+    FORMATS = {
+        'ndjson': ('application/x-ndjson', 'ndjson'),
+        'graphml': ('application/graphml+xml', 'graphml'),
+        'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    }
+
+    # Rows fetched per cursor round trip
+    CHUNK_SIZE = 5000
+
+    # Lines per yielded text chunk, rows per Parquet row group
+    LINES_PER_CHUNK = 1000
+    ROW_GROUP_SIZE = 50000
+
+    def __init__(self, graph='award', district=None, category=None, date_from=None, date_to=None):
+        if graph not in self.GRAPHS:
+            raise ValueError(f'Unknown graph: {graph}')
+        self.graph = graph
+        # Lookups on the tenders behind the edges
+        self.tender_lookups = {}
+        if district is not None:
+            self.tender_lookups['buyer__district_id'] = district
+        if category is not None:
+            self.tender_lookups['category_id'] = category
+        if date_from is not None:
+            self.tender_lookups['publication_date__date__gte'] = date_from
+        if date_to is not None:
+            self.tender_lookups['publication_date__date__lte'] = date_to
+
+    def stream(self, output_format):
+        """Chunks of the export in output_format"""
+        if output_format not in self.FORMATS:
+            raise ValueError(f'Unknown format: {output_format}')
+        if output_format == 'parquet' and not PYARROW_AVAILABLE:
+            raise ValueError('PyArrow not available. Install pyarrow for Parquet export.')
+        return getattr(self, output_format)()
+
+    def edges(self):
+        """(source, target, attributes) rows, ordered by source then target"""
+        if self.graph == 'award':
+            rows = Tender.objects.filter(
+                status='awarded', winner__isnull=False, **self.tender_lookups
+            ).order_by('buyer_id', 'winner_id').values_list('buyer_id', 'winner_id').annotate(
+                tenders=Count('id'), value=Sum('award_amount')
+            )
+            for buyer_id, winner_id, tenders, value in rows.iterator(chunk_size=self.CHUNK_SIZE):
+                yield buyer_id, winner_id, {'tenders': tenders, 'value': float(value or 0)}
+        else:
+            # Each pair of bids on one tender, the lower bidder id first
+            rows = TenderBid.objects.filter(
+                tender__bids__bidder_id__gt=F('bidder_id'), **self._bid_lookups()
+            ).order_by('bidder_id', 'tender__bids__bidder_id').values_list(
+                'bidder_id', 'tender__bids__bidder_id'
+            ).annotate(tenders=Count('tender_id'))
+            for bidder_id, other_id, tenders in rows.iterator(chunk_size=self.CHUNK_SIZE):
+                yield bidder_id, other_id, {'tenders': tenders}
+
+    def nodes(self):
+        """(id, name, type, district) of every organization on an edge"""
+        if self.graph == 'award':
+            tenders = Tender.objects.filter(status='awarded', winner__isnull=False, **self.tender_lookups)
+            members = Q(id__in=tenders.values('buyer_id')) | Q(id__in=tenders.values('winner_id'))
+        else:
+            bids = TenderBid.objects.filter(**self._bid_lookups())
+            members = Q(id__in=bids.values('bidder_id'))
+        rows = Organization.objects.filter(members).order_by('id').values_list(
+            'id', 'name', 'organization_type', 'district__name'
+        )
+        return rows.iterator(chunk_size=self.CHUNK_SIZE)
+
+    def ndjson(self):
+        lines = []
+        for source, target, attributes in self.edges():
+            lines.append(json.dumps({'source': source, 'target': target, **attributes}))
+            if len(lines) >= self.LINES_PER_CHUNK:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    def graphml(self):
+        edge_keys = [('tenders', 'int')]
+        if self.graph == 'award':
+            edge_keys.append(('value', 'double'))
+        header = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">',
+            '  <key id="name" for="node" attr.name="name" attr.type="string"/>',
+            '  <key id="type" for="node" attr.name="type" attr.type="string"/>',
+            '  <key id="district" for="node" attr.name="district" attr.type="string"/>',
+        ]
+        header += [
+            f'  <key id="{name}" for="edge" attr.name="{name}" attr.type="{kind}"/>'
+            for name, kind in edge_keys
+        ]
+        direction = 'directed' if self.graph == 'award' else 'undirected'
+        header.append(f'  <graph id="{self.graph}" edgedefault="{direction}">')
+        yield '\n'.join(header) + '\n'
+
+        lines = []
+        for org_id, name, org_type, district in self.nodes():
+            lines.append(
+                f'    <node id="n{org_id}"><data key="name">{escape(name)}</data>'
+                f'<data key="type">{org_type}</data><data key="district">{escape(district or "")}</data></node>'
+            )
+            if len(lines) >= self.LINES_PER_CHUNK:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        for source, target, attributes in self.edges():
+            data = ''.join(f'<data key="{name}">{attributes[name]}</data>' for name, _ in edge_keys)
+            lines.append(f'    <edge source="n{source}" target="n{target}">{data}</edge>')
+            if len(lines) >= self.LINES_PER_CHUNK:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        lines += ['  </graph>', '</graphml>']
+        yield '\n'.join(lines) + '\n'
+
+    def parquet(self):
+        fields = [('source', pa.int64()), ('target', pa.int64()), ('tenders', pa.int64())]
+        if self.graph == 'award':
+            fields.append(('value', pa.float64()))
+        schema = pa.schema(fields)
+        names = [name for name, _ in fields]
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        columns = {name: [] for name in names}
+        for source, target, attributes in self.edges():
+            columns['source'].append(source)
+            columns['target'].append(target)
+            for name in names[2:]:
+                columns[name].append(attributes[name])
+            if len(columns['source']) >= self.ROW_GROUP_SIZE:
+                writer.write_table(pa.table(columns, schema=schema))
+                columns = {name: [] for name in names}
+                yield sink.drain()
+        if columns['source']:
+            writer.write_table(pa.table(columns, schema=schema))
+        writer.close()
+        yield sink.drain()
+
+    def _bid_lookups(self):
+        return {f'tender__{lookup}': value for lookup, value in self.tender_lookups.items()}
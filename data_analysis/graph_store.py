@@ -0,0 +1,304 @@
+"""
+Compact buyer-supplier graph in CSR form
+Saved as one file that every worker memory-maps, so they share a single
+page-cached copy instead of rebuilding a NetworkX graph each
+"""
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import json
+import os
+import struct
+import tempfile
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from dashboard.models import NetworkEdge, Organization
+
+MAGIC = b'ACTSCSR1'
+
+# Array offsets in the file are multiples of this
+ALIGNMENT = 64
+
+
+class CSRGraphStore:
+    """Undirected weighted graph of organizations held in flat arrays
+
+    Nodes are sorted by organization id; node_types and node_districts are
+    parallel to node_ids. Row i of the adjacency matrix is
+    targets[offsets[i]:offsets[i + 1]] (node indices, ascending) with the
+    matching weights. Every edge appears in both endpoint rows, except a
+    self-loop which appears once but counts twice towards the degree, as
+    in NetworkX.
+
+    version is the NetworkSnapshotState.data_version the graph was built
+    for, and database the database it was read from, so a saved file is
+    only reused while both still match.
+    """
+
+    NODE_TYPES = ('buyer', 'supplier', 'both')
+
+    ARRAYS = ('node_ids', 'node_types', 'node_districts', 'degrees', 'offsets', 'targets', 'weights')
+
+    def __init__(self, node_ids, node_types, node_districts, degrees, offsets, targets, weights,
+                 built_at=None, version=None, database=None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError('NumPy not available. Install numpy for the CSR graph store.')
+        self.node_ids = node_ids
+        self.node_types = node_types
+        self.node_districts = node_districts
+        self.degrees = degrees
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.built_at = built_at
+        self.version = version
+        self.database = database
+
+    @classmethod
+    def from_database(cls):
+        """Build the graph from one node query and one edge index query"""
+        if not NUMPY_AVAILABLE:
+            raise ImportError('NumPy not available. Install numpy for the CSR graph store.')
+
+        nodes = list(Organization.objects.order_by('id').values_list(
+            'id', 'organization_type', 'district_id'
+        ))
+        type_codes = {name: code for code, name in enumerate(cls.NODE_TYPES)}
+        node_ids = np.array([row[0] for row in nodes], dtype=np.int64)
+        node_types = np.array([type_codes[row[1]] for row in nodes], dtype=np.int8)
+        node_districts = np.array([row[2] for row in nodes], dtype=np.int64)
+
+        pairs = np.array(list(
+            NetworkEdge.objects.order_by().values_list('organization_id', 'counterparty_id', 'weight')
+        ), dtype=np.int64).reshape(-1, 3)
+        return cls.from_edges(node_ids, node_types, node_districts, pairs)
+
+    @classmethod
+    def from_edges(cls, node_ids, node_types, node_districts, pairs):
+        """Build from (buyer_id, winner_id, count) rows over sorted node ids"""
+        n = len(node_ids)
+        # Drop pairs whose organizations are not nodes
+        pairs = pairs[np.isin(pairs[:, 0], node_ids) & np.isin(pairs[:, 1], node_ids)]
+        buyers = np.searchsorted(node_ids, pairs[:, 0])
+        winners = np.searchsorted(node_ids, pairs[:, 1])
+        low = np.minimum(buyers, winners)
+        high = np.maximum(buyers, winners)
+        counts = pairs[:, 2]
+
+        # A pair and its reverse are the same undirected edge
+        keys, inverse = np.unique(low * max(n, 1) + high, return_inverse=True)
+        weights = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+        low, high = keys // max(n, 1), keys % max(n, 1)
+
+        loops = low == high
+        rows = np.concatenate([low, high[~loops]])
+        cols = np.concatenate([high, low[~loops]])
+        edge_weights = np.concatenate([weights, weights[~loops]])
+
+        order = np.lexsort((cols, rows))
+        rows, cols, edge_weights = rows[order], cols[order], edge_weights[order]
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=offsets[1:])
+        degrees = np.bincount(rows, minlength=n) + np.bincount(low[loops], minlength=n)
+
+        return cls(
+            node_ids=node_ids,
+            node_types=node_types,
+            node_districts=node_districts,
+            degrees=degrees.astype(np.int64),
+            offsets=offsets,
+            targets=cols.astype(np.int32),
+            weights=edge_weights,
+            built_at=timezone.now().isoformat(),
+            database=_database_name(),
+        )
+
+    def save(self, path):
+        """Write the arrays to path, atomically replacing any previous file"""
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in self.ARRAYS}
+        relative = {}
+        offset = 0
+        for name, array in arrays.items():
+            relative[name] = offset
+            offset = _aligned(offset + array.nbytes)
+
+        # Array offsets are part of the header, so grow the data start until it fits
+        header = {
+            'built_at': self.built_at, 'version': self.version, 'database': self.database, 'arrays': {},
+        }
+        data_start = 0
+        while True:
+            header['arrays'] = {
+                name: {
+                    'dtype': array.dtype.str,
+                    'shape': list(array.shape),
+                    'offset': data_start + relative[name],
+                }
+                for name, array in arrays.items()
+            }
+            header_bytes = json.dumps(header).encode()
+            needed = _aligned(len(MAGIC) + 8 + len(header_bytes))
+            if needed <= data_start:
+                break
+            data_start = needed
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(MAGIC)
+                handle.write(struct.pack('<Q', len(header_bytes)))
+                handle.write(header_bytes)
+                for name, array in arrays.items():
+                    handle.seek(header['arrays'][name]['offset'])
+                    handle.write(array.tobytes())
+            # mkstemp creates the file private to this user
+            os.chmod(temp_path, 0o644)
+            # Workers that mapped the old file keep reading it until they reload
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved graph; arrays are read-only views into the file"""
+        if not NUMPY_AVAILABLE:
+            raise ImportError('NumPy not available. Install numpy for the CSR graph store.')
+        with open(path, 'rb') as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a CSR graph file')
+            header_length, = struct.unpack('<Q', handle.read(8))
+            header = json.loads(handle.read(header_length))
+
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        arrays = {}
+        for name, meta in header['arrays'].items():
+            dtype = np.dtype(meta['dtype'])
+            count = int(np.prod(meta['shape'], dtype=np.int64))
+            start = meta['offset']
+            arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(meta['shape'])
+        return cls(
+            built_at=header.get('built_at'),
+            version=header.get('version'),
+            database=header.get('database'),
+            **arrays,
+        )
+
+    def is_current(self, version):
+        """Whether the graph was built from this database at this data version"""
+        return self.version is not None and self.version == version and self.database == _database_name()
+
+    @property
+    def number_of_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def number_of_edges(self):
+        # Self-loops are stored once, every other edge twice
+        loops = int(np.count_nonzero(self.targets == self.row_indices()))
+        return (len(self.targets) - loops) // 2 + loops
+
+    def index_of(self, org_id):
+        """Node index of an organization id, or None if it is not in the graph"""
+        i = int(np.searchsorted(self.node_ids, org_id))
+        if i < len(self.node_ids) and self.node_ids[i] == org_id:
+            return i
+        return None
+
+    def has_node(self, org_id):
+        return self.index_of(org_id) is not None
+
+    def degree(self, org_id):
+        """Number of distinct counterparties, with a self-loop counted twice"""
+        i = self._require(org_id)
+        return int(self.degrees[i])
+
+    def neighbors(self, org_id):
+        """Organization ids connected to org_id, ascending"""
+        i = self._require(org_id)
+        return self.node_ids[self.targets[self.offsets[i]:self.offsets[i + 1]]]
+
+    def edge_weight(self, org_id, other_id):
+        """Awarded tenders between two organizations, 0 when not connected"""
+        i, j = self._require(org_id), self.index_of(other_id)
+        if j is None:
+            return 0
+        start, end = self.offsets[i], self.offsets[i + 1]
+        k = start + int(np.searchsorted(self.targets[start:end], j))
+        if k < end and self.targets[k] == j:
+            return int(self.weights[k])
+        return 0
+
+    def degree_items(self, min_degree=0):
+        """(org_id, degree) for nodes with at least min_degree, by id"""
+        selected = np.flatnonzero(self.degrees >= min_degree)
+        return zip(self.node_ids[selected].tolist(), self.degrees[selected].tolist())
+
+    def weighted_edges(self, min_weight=1):
+        """(org_id, other_id, weight) once per edge, with org_id <= other_id"""
+        rows = self.row_indices()
+        selected = np.flatnonzero((rows <= self.targets) & (self.weights >= min_weight))
+        return zip(
+            self.node_ids[rows[selected]].tolist(),
+            self.node_ids[self.targets[selected]].tolist(),
+            self.weights[selected].tolist(),
+        )
+
+    def node_type(self, org_id):
+        return self.NODE_TYPES[self.node_types[self._require(org_id)]]
+
+    def district_id(self, org_id):
+        return int(self.node_districts[self._require(org_id)])
+
+    def _require(self, org_id):
+        i = self.index_of(org_id)
+        if i is None:
+            raise KeyError(f'Organization {org_id} is not in the graph')
+        return i
+
+    def row_indices(self):
+        """Source node index of every stored edge"""
+        return np.repeat(np.arange(self.number_of_nodes), np.diff(self.offsets))
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _database_name():
+    # SQLite names are paths
+    return str(connection.settings_dict['NAME'])
+
+
+def default_graph_path():
+    return str(getattr(settings, 'NETWORK_GRAPH_PATH', settings.BASE_DIR / 'network_graph.csr'))
+
+
+# Per-process cache of mapped files: path -> ((inode, mtime), store)
+_mapped = {}
+
+
+def load_graph_store(path=None):
+    """The saved graph, mapped once per process and remapped when the file is replaced
+
+    Returns None when no graph has been saved yet.
+    """
+    path = path or default_graph_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+
+    cached = _mapped.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    store = CSRGraphStore.load(path)
+    _mapped[path] = (stamp, store)
+    return store
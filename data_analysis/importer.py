@@ -0,0 +1,774 @@
+"""
+Streaming import of procurement CSV exports
+Rows are validated in fixed-size chunks, loaded into staging tables with
+COPY (or batched INSERTs) and merged into the tender tables with set-based SQL
+"""
+import csv
+import hashlib
+from datetime import datetime, time, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from dashboard.models import (
+    District, TenderCategory, Organization, OrganizationMerge, Tender, TenderBid, RiskChange,
+    NetworkEdge, NetworkSnapshotState,
+)
+from .entity_resolution import OrganizationResolver
+from .network_index import network_index
+from .profiling import RunProfiler
+
+
+class RowError(ValueError):
+    """A row that cannot be imported, with the column at fault"""
+
+
+class DataImporter:
+    """Import tenders, bids and their organizations from a flat procurement export
+
+    The export has one row per bid, repeating the tender columns; a tender
+    without bids has a single row with empty bid columns. A tender's rows
+    must be consecutive, so a chunk boundary never splits them. Columns:
+
+        tender_id, title, description, category, buyer, buyer_district,
+        estimated_value, award_amount, currency, publication_date,
+        submission_deadline, opening_date, award_date, status, winner,
+        bidder, bidder_district, bid_amount, bid_submission_date,
+        is_winner, technical_score, financial_score, and optionally
+        buyer_, winner_ and bidder_registration_number
+
+    Districts and categories are resolved by name, organizations by
+    registration number or else by name, against id maps loaded once per
+    import. Names that match neither are resolved by an OrganizationResolver
+    to an organization with the same normalized name, or a similar name in
+    the same district, and every such merge is recorded as an
+    OrganizationMerge. Weaker matches get a new organization and a pending
+    OrganizationMerge for review. Unknown
+    categories and organizations are created; districts must already
+    exist. Each chunk is loaded into temporary staging tables, with COPY
+    FROM STDIN on PostgreSQL and batched executemany elsewhere, then
+    merged into the tender and bid tables by tender_id in one
+    transaction. Every chunk reports the rows it rejected, and the results
+    give rows per second for each stage.
+
+    Tenders and bids store a fingerprint of their imported values, so a
+    re-imported snapshot is compared in bulk: new rows are inserted,
+    rows whose fingerprint changed are updated in place and the rest are
+    left alone. Bids missing from a re-import are kept. Every new or
+    changed tender is logged as a RiskChange, with its old and new
+    buyer-winner pairs, for analyze_changed_tenders, and only the network
+    edges of those pairs are recounted.
+    """
+
+    # Rows per chunk, and per executemany batch
+    CHUNK_SIZE = 10000
+    BATCH_SIZE = 5000
+
+    STAGES = ('parse', 'organizations', 'stage', 'merge', 'index')
+
+    # Award pairs touched by one import above which the edge index is rebuilt, not refreshed
+    FULL_INDEX_PAIRS = 50000
+
+    # Staged columns, named as in the target tables; bids carry the tender's natural key
+    TENDER_COLUMNS = (
+        'tender_id', 'title', 'description', 'category_id', 'buyer_id', 'estimated_value',
+        'award_amount', 'currency', 'publication_date', 'submission_deadline', 'opening_date',
+        'award_date', 'status', 'winner_id', 'import_fingerprint',
+    )
+    BID_COLUMNS = (
+        'tender_id', 'bidder_id', 'bid_amount', 'submission_date', 'is_winner',
+        'technical_score', 'financial_score', 'import_fingerprint',
+    )
+    ORGANIZATION_COLUMNS = ('name', 'registration_number', 'organization_type', 'district_id')
+
+    # Rejected rows listed per chunk; the rest are only counted
+    MAX_CHUNK_ERRORS = 100
+
+    REQUIRED_COLUMNS = (
+        'tender_id', 'title', 'category', 'buyer', 'buyer_district',
+        'estimated_value', 'publication_date', 'submission_deadline',
+    )
+
+    # Errors reading the source itself, which end the import after the chunks already written
+    STREAM_ERRORS = (csv.Error, UnicodeDecodeError)
+
+    TRUE_VALUES = ('1', '1.0', 'true', 'yes', 'y', 't')
+    FALSE_VALUES = ('', '0', '0.0', 'false', 'no', 'n', 'f')
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.districts = {}
+        self.categories = {}
+        self.organization_ids = {}
+        self.organization_types = {}
+        self.resolver = OrganizationResolver()
+        self.load_method = None
+        # Naive export times are local; looked up once, not per value
+        self.timezone = timezone.get_default_timezone()
+        self.profiler = RunProfiler()
+        self.stage_rows = dict.fromkeys(self.STAGES, 0)
+
+    def import_from_csv(self, csv_file_path, on_chunk=None):
+        """Import tender data from a CSV file, one chunk at a time
+
+        on_chunk(summary) is called after every chunk.
+        """
+        try:
+            with open(csv_file_path, newline='', encoding='utf-8-sig') as csv_file:
+                reader = csv.DictReader(csv_file)
+                missing = self._missing_columns(reader.fieldnames or ())
+                if missing:
+                    return {'success': False, 'error': f'Missing columns: {", ".join(missing)}'}
+                rows = ((reader.line_num, row) for row in reader)
+                return self._import_chunks(rows, on_chunk)
+        except (OSError, UnicodeDecodeError) as e:
+            return {'success': False, 'error': str(e)}
+
+    def import_from_dataframe(self, df, on_chunk=None):
+        """Import tender data from a pandas DataFrame with the CSV columns"""
+        missing = self._missing_columns(df.columns)
+        if missing:
+            return {'success': False, 'error': f'Missing columns: {", ".join(missing)}'}
+        return self._import_chunks(self._dataframe_rows(df), on_chunk)
+
+    def _import_chunks(self, rows, on_chunk=None):
+        """Import (row number, row) pairs chunk by chunk and total the results"""
+        results = {
+            'success': True,
+            'imported_tenders': 0,
+            'imported_organizations': 0,
+            'resolved_organizations': 0,
+            'pending_merges': 0,
+            'imported_bids': 0,
+            'updated_tenders': 0,
+            'updated_bids': 0,
+            'unchanged_tenders': 0,
+            'changed_tenders': 0,
+            'rejected_rows': 0,
+            'chunks': [],
+            'errors': [],
+        }
+        self._load_maps()
+        # (buyer_id, winner_id) award pairs gained or lost by written tenders
+        self.award_pairs = set()
+        self.load_method = 'copy' if self._copy_supported() else 'executemany'
+        self._create_staging_tables()
+        try:
+            for number, chunk in enumerate(self._chunks(rows), 1):
+                summary = self._import_chunk(number, chunk)
+                results['imported_tenders'] += summary['tenders']
+                results['imported_organizations'] += summary['organizations']
+                results['imported_bids'] += summary['bids']
+                for key in ('resolved_organizations', 'pending_merges', 'updated_tenders', 'updated_bids',
+                            'unchanged_tenders', 'changed_tenders', 'rejected_rows'):
+                    results[key] += summary[key]
+                results['chunks'].append(summary)
+                if on_chunk:
+                    on_chunk(summary)
+        except self.STREAM_ERRORS as e:
+            # The file itself is unreadable from here on; earlier chunks stay imported
+            results['success'] = False
+            results['errors'].append(str(e))
+
+        if self.award_pairs:
+            # Set-based writes skip the Tender signals that maintain the edge index
+            with self.profiler.measure('index'):
+                self.stage_rows['index'] += self._refresh_network_index()
+        if results['changed_tenders']:
+            NetworkSnapshotState.invalidate()
+        results['load_method'] = self.load_method
+        results['stages'] = self._stage_rates()
+        return results
+
+    def _chunks(self, rows):
+        """Lists of about chunk_size rows that never split one tender's rows"""
+        chunk = []
+        for number, row in rows:
+            if len(chunk) >= self.chunk_size and row.get('tender_id') != chunk[-1][1].get('tender_id'):
+                yield chunk
+                chunk = []
+            chunk.append((number, row))
+        if chunk:
+            yield chunk
+
+    def _import_chunk(self, number, chunk):
+        """Validate and write one chunk in a single transaction"""
+        summary = {
+            'chunk': number,
+            'first_row': chunk[0][0],
+            'rows': len(chunk),
+            'tenders': 0,
+            'organizations': 0,
+            'resolved_organizations': 0,
+            'pending_merges': 0,
+            'bids': 0,
+            'updated_tenders': 0,
+            'updated_bids': 0,
+            'unchanged_tenders': 0,
+            'changed_tenders': 0,
+            'rejected_rows': 0,
+            'errors': [],
+        }
+        with self.profiler.measure('parse', sql=False):
+            tenders = self._parse_tenders(chunk, summary)
+        self.stage_rows['parse'] += len(chunk)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for sql in self._sql['clear']:
+                    cursor.execute(sql)
+                with self.profiler.measure('organizations'):
+                    self._import_organizations(cursor, tenders, summary)
+                with self.profiler.measure('stage'):
+                    staged = self._stage_tenders(cursor, tenders, summary)
+                with self.profiler.measure('merge'):
+                    award_pairs = self._merge_tenders(cursor, summary)
+            self.award_pairs.update(award_pairs)
+            self.stage_rows['organizations'] += summary['organizations']
+            self.stage_rows['stage'] += staged
+            self.stage_rows['merge'] += (
+                summary['tenders'] + summary['updated_tenders'] + summary['bids'] + summary['updated_bids']
+            )
+        except DatabaseError as e:
+            # The id maps may hold rows that were just rolled back
+            self._load_maps()
+            summary.update(
+                tenders=0, organizations=0, resolved_organizations=0, pending_merges=0, bids=0,
+                updated_tenders=0, updated_bids=0, unchanged_tenders=0, changed_tenders=0,
+                rejected_rows=len(chunk),
+            )
+            self._reject(summary, chunk[0][0], None, f'Chunk rolled back: {e}', rows=0)
+        return summary
+
+    def _parse_tenders(self, chunk, summary):
+        """Tender and bid values of every valid row, by tender_id"""
+        tenders = {}
+        rejected = set()
+        for number, row in chunk:
+            tender_id = self._text(row, 'tender_id')
+            if tender_id in rejected:
+                summary['rejected_rows'] += 1
+                continue
+            try:
+                if tender_id not in tenders:
+                    tenders[tender_id] = self._parse_tender(row)
+                tender = tenders[tender_id]
+                if self._text(row, 'bidder'):
+                    bid = self._parse_bid(number, row, tender)
+                    bidder = self._organization_key(*bid['bidder'])
+                    if bidder in tender['bidders']:
+                        raise RowError(f'Duplicate bid from {bid["bidder"][0]!r}')
+                    tender['bids'].append(bid)
+                    tender['bidders'].add(bidder)
+            except RowError as e:
+                if tender_id not in tenders:
+                    # The tender itself is invalid, so are all its rows
+                    rejected.add(tender_id)
+                self._reject(summary, number, tender_id, str(e))
+
+        for tender in tenders.values():
+            self._resolve_winner(tender)
+        return tenders
+
+    def _parse_tender(self, row):
+        tender_id = self._text(row, 'tender_id', required=True, max_length=50)
+        district = self._text(row, 'buyer_district', required=True)
+        if district not in self.districts:
+            raise RowError(f'Unknown district: {district!r}')
+        submission_deadline = self._datetime(row, 'submission_deadline', required=True)
+        tender = {
+            'tender_id': tender_id,
+            'title': self._text(row, 'title', required=True, max_length=300),
+            'description': self._text(row, 'description'),
+            'category': self._text(row, 'category', required=True, max_length=100),
+            'buyer': self._organization(row, 'buyer', required=True),
+            'buyer_district_id': self.districts[district],
+            'estimated_value': self._decimal(row, 'estimated_value', required=True),
+            'award_amount': self._decimal(row, 'award_amount'),
+            'currency': self._text(row, 'currency', max_length=3) or 'BDT',
+            'publication_date': self._datetime(row, 'publication_date', required=True),
+            'submission_deadline': submission_deadline,
+            'opening_date': self._datetime(row, 'opening_date') or submission_deadline,
+            'award_date': self._datetime(row, 'award_date'),
+            'status': self._text(row, 'status').lower(),
+            'winner': self._organization(row, 'winner'),
+            # Exports without one of the two columns get it from the other
+            'flags_winner': 'winner' not in row,
+            'winner_flags': 'is_winner' not in row,
+            'bids': [],
+            'bidders': set(),
+        }
+        if tender['status'] and tender['status'] not in dict(Tender.STATUS_CHOICES):
+            raise RowError(f'Unknown status: {tender["status"]!r}')
+        return tender
+
+    def _parse_bid(self, number, row, tender):
+        district = self._text(row, 'bidder_district')
+        if district and district not in self.districts:
+            raise RowError(f'Unknown district: {district!r}')
+        return {
+            'row': number,
+            'bidder': self._organization(row, 'bidder'),
+            # Suppliers without a district are placed in their buyer's
+            'district_id': self.districts[district] if district else tender['buyer_district_id'],
+            'bid_amount': self._decimal(row, 'bid_amount', required=True),
+            'submission_date': self._datetime(row, 'bid_submission_date') or tender['submission_deadline'],
+            'is_winner': self._flag(row, 'is_winner'),
+            'technical_score': self._decimal(row, 'technical_score', max_digits=5),
+            'financial_score': self._decimal(row, 'financial_score', max_digits=5),
+        }
+
+    def _resolve_winner(self, tender):
+        if tender.pop('flags_winner'):
+            flagged = [bid['bidder'] for bid in tender['bids'] if bid['is_winner']]
+            tender['winner'] = flagged[0] if flagged else None
+        elif tender['winner'] and not tender['winner'][1]:
+            # A winner named without a registration number is the bidder of that name
+            for bid in tender['bids']:
+                if bid['bidder'][0] == tender['winner'][0]:
+                    tender['winner'] = bid['bidder']
+                    break
+        if tender.pop('winner_flags'):
+            for bid in tender['bids']:
+                bid['is_winner'] = bid['bidder'] == tender['winner']
+        if not tender['status']:
+            tender['status'] = 'awarded' if tender['winner'] else 'published'
+
+    def _import_organizations(self, cursor, tenders, summary):
+        """Resolve or create missing organizations and categories, then widen changed roles to 'both'"""
+        for tender in tenders.values():
+            name = tender['category']
+            if name not in self.categories:
+                category, _ = TenderCategory.objects.get_or_create(name=name)
+                self.categories[name] = category.id
+
+        # Roles, name, registration number and district of every organization in the chunk
+        roles = {}
+        for tender in tenders.values():
+            self._add_role(roles, tender['buyer'], 'buyer', tender['buyer_district_id'])
+            for bid in tender['bids']:
+                self._add_role(roles, bid['bidder'], 'supplier', bid['district_id'])
+            if tender['winner']:
+                # A winner that also bid was already added with its district
+                self._add_role(roles, tender['winner'], 'supplier', tender['buyer_district_id'])
+
+        merges, groups, pending = [], {}, {}
+        for key, (types, name, number, district_id) in roles.items():
+            if key in self.organization_ids:
+                continue
+            normalized = self.resolver.normalize(name)
+            match = self.resolver.match(normalized, number, district_id)
+            if match and match['merge']:
+                self.organization_ids[key] = match['organization_id']
+                merges.append(self._merge(key, roles, normalized, match))
+            else:
+                if match:
+                    pending[key] = (normalized, match)
+                # Variants of one new name in the chunk become one organization
+                groups.setdefault((normalized, number) if normalized else key, []).append(key)
+
+        new = []
+        for first, *_ in groups.values():
+            types, name, number, district_id = roles[first]
+            new.append((name, number, 'both' if len(types) > 1 else next(iter(types)), district_id))
+        if new:
+            self._stage(cursor, 'import_organization', self.ORGANIZATION_COLUMNS, new)
+            now = connection.ops.adapt_datetimefield_value(timezone.now())
+            cursor.execute(self._sql['organizations'], [now, now])
+            for org_id, name, number, org_type, district_id in cursor.fetchall():
+                self.organization_types[org_id] = org_type
+                self.organization_ids[self._organization_key(name, number)] = org_id
+                self.organization_ids.setdefault(('name', name), org_id)
+                self.resolver.add(org_id, name, number, district_id)
+            for first, *variants in groups.values():
+                match = {'organization_id': self.organization_ids[first], 'score': 1.0, 'method': 'normalized'}
+                for key in variants:
+                    self.organization_ids[key] = match['organization_id']
+                    merges.append(self._merge(key, roles, self.resolver.normalize(roles[key][1]), match))
+            for key, (normalized, match) in pending.items():
+                merges.append(self._merge(
+                    key, roles, normalized, match,
+                    status='pending', imported_as_id=self.organization_ids[key],
+                ))
+        if merges:
+            OrganizationMerge.objects.bulk_create(merges, ignore_conflicts=True)
+        summary['organizations'] = len(new)
+        summary['resolved_organizations'] = len(merges) - len(pending)
+        summary['pending_merges'] = len(pending)
+
+        widened = []
+        for key, (types, *_) in roles.items():
+            org_id = self.organization_ids[key]
+            if self.organization_types[org_id] != 'both' and types != {self.organization_types[org_id]}:
+                widened.append(org_id)
+        if widened:
+            Organization.objects.filter(id__in=widened).update(organization_type='both')
+            for org_id in widened:
+                self.organization_types[org_id] = 'both'
+
+    def _merge(self, key, roles, normalized, match, **fields):
+        """Audit row of an imported organization resolved, or possibly resolved, to an existing one"""
+        _, name, number, _ = roles[key]
+        return OrganizationMerge(
+            organization_id=match['organization_id'],
+            name=name,
+            registration_number=number,
+            normalized_name=normalized[:200],
+            method=match['method'],
+            score=match['score'],
+            **fields,
+        )
+
+    def _stage_tenders(self, cursor, tenders, summary):
+        """Load the chunk's tenders and bids into the staging tables, returning the row count"""
+        tender_rows, bid_rows = [], []
+        for tender_id, tender in tenders.items():
+            winner = self._organization_id(tender['winner']) if tender['winner'] else None
+            values = (
+                tender['title'],
+                tender['description'],
+                self.categories[tender['category']],
+                self._organization_id(tender['buyer']),
+                tender['estimated_value'],
+                tender['award_amount'],
+                tender['currency'],
+                tender['publication_date'],
+                tender['submission_deadline'],
+                tender['opening_date'],
+                tender['award_date'],
+                tender['status'],
+                winner,
+            )
+            tender_rows.append((tender_id, *self._adapt(values), self._fingerprint(values)))
+
+            bidder_ids = set()
+            for bid in tender['bids']:
+                bidder_id = self._organization_id(bid['bidder'])
+                if bidder_id in bidder_ids:
+                    # A name-only bid from an organization that also bid by registration number
+                    self._reject(summary, bid['row'], tender_id, f'Duplicate bid from {bid["bidder"][0]!r}')
+                    continue
+                bidder_ids.add(bidder_id)
+                values = (
+                    bid['bid_amount'],
+                    bid['submission_date'],
+                    bid['is_winner'],
+                    bid['technical_score'],
+                    bid['financial_score'],
+                )
+                bid_rows.append((tender_id, bidder_id, *self._adapt(values), self._fingerprint(values)))
+        self._stage(cursor, 'import_tender', self.TENDER_COLUMNS, tender_rows)
+        self._stage(cursor, 'import_bid', self.BID_COLUMNS, bid_rows)
+        return len(tender_rows) + len(bid_rows)
+
+    def _merge_tenders(self, cursor, summary):
+        """Insert new tenders and bids, update the changed ones and log the changed tenders
+
+        Staged rows are matched to stored ones by tender_id, and bids by
+        tender and bidder; a fingerprint that differs from the stored one
+        marks the row as changed. Returns the award pairs of the new and
+        changed tenders, before and after the change.
+        """
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        sql = self._sql
+        cursor.execute(sql['match_tenders'])
+        cursor.execute(sql['insert_tenders'], [now, now])
+        summary['tenders'] = cursor.rowcount
+        cursor.execute(sql['update_tenders'], [now])
+        summary['updated_tenders'] = cursor.rowcount
+        cursor.execute(sql['match_bids'])
+        cursor.execute(sql['insert_bids'], [now, now])
+        summary['bids'] = cursor.rowcount
+        cursor.execute(sql['update_bids'], [now])
+        summary['updated_bids'] = cursor.rowcount
+
+        cursor.execute(sql['log_tenders'], [now])
+        changed = cursor.rowcount
+        cursor.execute(sql['log_previous_awards'], [now])
+        cursor.execute(sql['log_bids'], [now])
+        summary['changed_tenders'] = changed + cursor.rowcount
+        cursor.execute(sql['unchanged'])
+        summary['unchanged_tenders'] = cursor.fetchone()[0]
+        cursor.execute(sql['award_pairs'])
+        return cursor.fetchall()
+
+    def _refresh_network_index(self):
+        """Recount the edges of the award pairs this import touched, returning the edges written
+
+        A first load, or one touching more pairs than FULL_INDEX_PAIRS,
+        rebuilds the whole index instead.
+        """
+        if len(self.award_pairs) > self.FULL_INDEX_PAIRS or not NetworkEdge.objects.exists():
+            return network_index.rebuild()['edges']
+        return network_index.refresh(self.award_pairs)
+
+    def _stage(self, cursor, table, columns, rows):
+        """Load rows into a staging table with COPY, or batched executemany"""
+        column_list = ', '.join(columns)
+        if self.load_method == 'copy':
+            with cursor.cursor.copy(f'COPY {table} ({column_list}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+            return
+        sql = f'INSERT INTO {table} ({column_list}) VALUES ({", ".join(["%s"] * len(columns))})'
+        for start in range(0, len(rows), self.BATCH_SIZE):
+            cursor.executemany(sql, rows[start:start + self.BATCH_SIZE])
+
+    def _create_staging_tables(self):
+        """Session-local tables shaped like their targets, and the merge statements"""
+        qn = connection.ops.quote_name
+        tender_table = qn(Tender._meta.db_table)
+        bid_table = qn(TenderBid._meta.db_table)
+        organization_table = qn(Organization._meta.db_table)
+        change_table = qn(RiskChange._meta.db_table)
+        tender_columns = ', '.join(self.TENDER_COLUMNS)
+        # The natural key is never updated
+        tender_values = ', '.join(self.TENDER_COLUMNS[1:])
+        bid_values = ', '.join(self.BID_COLUMNS[2:])
+        organization_columns = ', '.join(self.ORGANIZATION_COLUMNS)
+        changed = 'previous_fingerprint <> import_fingerprint'
+
+        with connection.cursor() as cursor:
+            # WHERE 1 = 0 copies the column types without any rows; the stored
+            # row's id, fingerprint and award are matched in after staging
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS import_tender AS '
+                f'SELECT {tender_columns}, id AS existing_id, import_fingerprint AS previous_fingerprint, '
+                f'buyer_id AS previous_buyer_id, winner_id AS previous_winner_id, '
+                f'status AS previous_status FROM {tender_table} WHERE 1 = 0'
+            )
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS import_bid AS '
+                f'SELECT tender.tender_id, {", ".join(f"bid.{c}" for c in self.BID_COLUMNS[1:])}, '
+                f'tender.id AS tender_pk, bid.id AS existing_id, bid.import_fingerprint AS previous_fingerprint '
+                f'FROM {bid_table} bid JOIN {tender_table} tender ON tender.id = bid.tender_id WHERE 1 = 0'
+            )
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE IF NOT EXISTS import_organization AS '
+                f'SELECT {organization_columns} FROM {organization_table} WHERE 1 = 0'
+            )
+
+        # WHERE clauses keep SQLite from reading ON CONFLICT as a join constraint
+        self._sql = {
+            'clear': ['DELETE FROM import_tender', 'DELETE FROM import_bid', 'DELETE FROM import_organization'],
+            'organizations': (
+                f'INSERT INTO {organization_table} ({organization_columns}, contact_email, contact_phone, '
+                f'address, is_active, created_at, updated_at) '
+                f"SELECT {organization_columns}, '', '', '', TRUE, %s, %s FROM import_organization WHERE 1 = 1 "
+                f'RETURNING id, name, registration_number, organization_type, district_id'
+            ),
+            'match_tenders': (
+                f'UPDATE import_tender SET (existing_id, previous_fingerprint, previous_buyer_id, '
+                f'previous_winner_id, previous_status) = ('
+                f'SELECT id, import_fingerprint, buyer_id, winner_id, status FROM {tender_table} tender '
+                f'WHERE tender.tender_id = import_tender.tender_id)'
+            ),
+            'insert_tenders': (
+                f'INSERT INTO {tender_table} ({tender_columns}, created_at, updated_at) '
+                f'SELECT {tender_columns}, %s, %s FROM import_tender WHERE existing_id IS NULL '
+                f'ON CONFLICT (tender_id) DO NOTHING'
+            ),
+            'update_tenders': (
+                f'UPDATE {tender_table} SET ({tender_values}, updated_at) = ('
+                f'SELECT {tender_values}, %s FROM import_tender WHERE existing_id = {tender_table}.id) '
+                f'WHERE id IN (SELECT existing_id FROM import_tender WHERE {changed})'
+            ),
+            'match_bids': (
+                f'UPDATE import_bid SET (tender_pk, existing_id, previous_fingerprint) = ('
+                f'SELECT tender.id, bid.id, bid.import_fingerprint FROM {tender_table} tender '
+                f'LEFT JOIN {bid_table} bid ON bid.tender_id = tender.id AND bid.bidder_id = import_bid.bidder_id '
+                f'WHERE tender.tender_id = import_bid.tender_id)'
+            ),
+            'insert_bids': (
+                f'INSERT INTO {bid_table} (tender_id, bidder_id, {bid_values}, created_at, updated_at) '
+                f'SELECT tender_pk, bidder_id, {bid_values}, %s, %s FROM import_bid '
+                f'WHERE existing_id IS NULL AND tender_pk IS NOT NULL '
+                f'ON CONFLICT (tender_id, bidder_id) DO NOTHING'
+            ),
+            'update_bids': (
+                f'UPDATE {bid_table} SET ({bid_values}, updated_at) = ('
+                f'SELECT {bid_values}, %s FROM import_bid WHERE existing_id = {bid_table}.id) '
+                f'WHERE id IN (SELECT existing_id FROM import_bid WHERE {changed})'
+            ),
+            # New and changed tenders with their current pair, as the Tender signals log them
+            'log_tenders': (
+                f'INSERT INTO {change_table} (tender_id, buyer_id, winner_id, created_at) '
+                f'SELECT tender.id, CASE WHEN staged.winner_id IS NULL THEN NULL ELSE staged.buyer_id END, '
+                f'staged.winner_id, %s FROM import_tender staged '
+                f'JOIN {tender_table} tender ON tender.tender_id = staged.tender_id '
+                f'WHERE staged.existing_id IS NULL OR staged.previous_fingerprint <> staged.import_fingerprint'
+            ),
+            # The pair a changed tender had before, if its award fields moved
+            'log_previous_awards': (
+                f'INSERT INTO {change_table} (tender_id, buyer_id, winner_id, created_at) '
+                f'SELECT existing_id, previous_buyer_id, previous_winner_id, %s FROM import_tender '
+                f'WHERE {changed} AND previous_winner_id IS NOT NULL AND ('
+                f'previous_buyer_id <> buyer_id OR previous_winner_id <> COALESCE(winner_id, 0) '
+                f'OR previous_status <> status)'
+            ),
+            # Unchanged tenders that gained or changed a bid
+            'log_bids': (
+                f'INSERT INTO {change_table} (tender_id, created_at) '
+                f'SELECT DISTINCT staged.tender_pk, %s FROM import_bid staged '
+                f'JOIN import_tender ON import_tender.tender_id = staged.tender_id '
+                f'WHERE import_tender.previous_fingerprint = import_tender.import_fingerprint '
+                f'AND (staged.existing_id IS NULL OR staged.previous_fingerprint <> staged.import_fingerprint)'
+            ),
+            'unchanged': (
+                'SELECT COUNT(*) FROM import_tender WHERE previous_fingerprint = import_fingerprint'
+            ),
+            # Award pairs of new and changed tenders, and the pairs changed tenders had before
+            'award_pairs': (
+                f"SELECT buyer_id, winner_id FROM import_tender WHERE status = 'awarded' "
+                f'AND winner_id IS NOT NULL AND (existing_id IS NULL OR {changed}) '
+                f'UNION SELECT previous_buyer_id, previous_winner_id FROM import_tender '
+                f"WHERE {changed} AND previous_status = 'awarded' AND previous_winner_id IS NOT NULL"
+            ),
+        }
+
+    def _stage_rates(self):
+        """Rows, seconds and rows per second of every stage so far"""
+        sections = self.profiler.as_dict()
+        stages = {}
+        for name in self.STAGES:
+            seconds = sections.get(name, {}).get('wall_seconds', 0.0)
+            rows = self.stage_rows[name]
+            stages[name] = {
+                'rows': rows,
+                'seconds': round(seconds, 3),
+                'rows_per_second': round(rows / seconds) if seconds else None,
+            }
+        return stages
+
+    def _copy_supported(self):
+        """COPY FROM STDIN needs PostgreSQL through psycopg 3"""
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            return hasattr(cursor.cursor, 'copy')
+
+    def _load_maps(self):
+        self.districts = dict(District.objects.values_list('name', 'id'))
+        self.categories = dict(TenderCategory.objects.values_list('name', 'id'))
+        # Organizations by registration number and by name; duplicates resolve to the oldest
+        self.organization_ids = {}
+        self.organization_types = {}
+        self.resolver = OrganizationResolver()
+        rows = Organization.objects.order_by('-id').values_list(
+            'id', 'name', 'registration_number', 'organization_type', 'district_id'
+        )
+        for org_id, name, number, org_type, district_id in rows.iterator(chunk_size=self.BATCH_SIZE):
+            self.organization_types[org_id] = org_type
+            self.organization_ids[('name', name)] = org_id
+            if number:
+                self.organization_ids[('registration_number', number)] = org_id
+            self.resolver.add(org_id, name, number, district_id)
+        # Names resolved by earlier imports
+        merges = OrganizationMerge.objects.filter(status='merged').values_list(
+            'name', 'registration_number', 'organization_id'
+        )
+        for name, number, org_id in merges.iterator(chunk_size=self.BATCH_SIZE):
+            self.organization_ids.setdefault(self._organization_key(name, number), org_id)
+
+    def _organization_key(self, name, number):
+        return ('registration_number', number) if number else ('name', name)
+
+    def _organization_id(self, organization):
+        return self.organization_ids[self._organization_key(*organization)]
+
+    def _add_role(self, roles, organization, role, district_id):
+        types, *_ = roles.setdefault(
+            self._organization_key(*organization), (set(), *organization, district_id)
+        )
+        types.add(role)
+
+    def _adapt(self, values):
+        """Decimals and datetimes as the database driver takes them"""
+        ops = connection.ops
+        return tuple(
+            ops.adapt_datetimefield_value(value) if isinstance(value, datetime)
+            else ops.adapt_decimalfield_value(value) if isinstance(value, Decimal)
+            else value
+            for value in values
+        )
+
+    def _fingerprint(self, values):
+        """Hash of the parsed values, independent of the database and time zone"""
+        parts = []
+        for value in values:
+            if value is None:
+                parts.append('\x00')
+            elif isinstance(value, datetime):
+                parts.append(value.astimezone(dt_timezone.utc).isoformat())
+            else:
+                parts.append(str(value))
+        return hashlib.blake2b('\x1f'.join(parts).encode(), digest_size=16).hexdigest()
+
+    def _reject(self, summary, number, tender_id, error, rows=1):
+        summary['rejected_rows'] += rows
+        if len(summary['errors']) < self.MAX_CHUNK_ERRORS:
+            summary['errors'].append({'row': number, 'tender_id': tender_id, 'error': error})
+
+    def _missing_columns(self, columns):
+        return [column for column in self.REQUIRED_COLUMNS if column not in columns]
+
+    def _dataframe_rows(self, df):
+        """(row number, row) pairs of a DataFrame, converted one chunk at a time"""
+        for start in range(0, len(df), self.chunk_size):
+            part = df.iloc[start:start + self.chunk_size]
+            part = part.astype(object).where(part.notna(), '')
+            for offset, row in enumerate(part.to_dict('records')):
+                yield start + offset, row
+
+    def _organization(self, row, column, required=False):
+        """(name, registration number) of the organization in a column, or None"""
+        name = self._text(row, column, required, max_length=200)
+        if not name:
+            return None
+        return (name, self._text(row, f'{column}_registration_number', max_length=50))
+
+    def _text(self, row, column, required=False, max_length=None):
+        value = row.get(column)
+        value = '' if value is None else str(value).strip()
+        if required and not value:
+            raise RowError(f'Missing {column}')
+        if max_length and len(value) > max_length:
+            raise RowError(f'{column} is longer than {max_length} characters')
+        return value
+
+    def _decimal(self, row, column, required=False, max_digits=15):
+        value = self._text(row, column, required).replace(',', '')
+        if not value:
+            return None
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            raise RowError(f'Invalid {column}: {value!r}')
+        # Two of the field's digits are decimal places
+        if not number.is_finite() or number < 0 or abs(number) >= 10 ** (max_digits - 2):
+            raise RowError(f'Invalid {column}: {value!r}')
+        return number.quantize(Decimal('0.01'))
+
+    def _datetime(self, row, column, required=False):
+        value = self._text(row, column, required)
+        if not value:
+            return None
+        try:
+            moment = parse_datetime(value)
+            if moment is None:
+                day = parse_date(value)
+                moment = datetime.combine(day, time.min) if day else None
+        except ValueError:
+            moment = None
+        if moment is None:
+            raise RowError(f'Invalid {column}: {value!r}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, self.timezone)
+        return moment
+
+    def _flag(self, row, column):
+        value = self._text(row, column).lower()
+        if value in self.TRUE_VALUES:
+            return True
+        if value in self.FALSE_VALUES:
+            return False
+        raise RowError(f'Invalid {column}: {value!r}')
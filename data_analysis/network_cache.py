@@ -0,0 +1,81 @@
+"""
+Versioned cache of the buyer-supplier network statistics and co-bidding communities
+Snapshots are rebuilt out of band by one process at a time; requests keep
+serving the previous version until the new one is stored
+"""
+import time
+from django.db import transaction
+from django.utils import timezone
+from dashboard.models import NetworkSnapshot, NetworkSnapshotState
+from .cobidding import CoBiddingAnalyzer
+from .graph_store import CSRGraphStore, default_graph_path
+from .risk_analyzer import NetworkAnalyzer
+
+
+class NetworkSnapshotCache:
+    """Serve network stats and suspicious patterns from the latest snapshot
+
+    NetworkSnapshotState.data_version is bumped whenever an award or a bid
+    changes or a risk run completes. A snapshot built for an older version is
+    stale. Requests never build one: they get the latest snapshot, stale
+    or not, and refresh() rebuilds it from the process_risk_jobs worker
+    under a lease, so a single process pays for each rebuild.
+    """
+
+    def get(self):
+        """Return (snapshot, is_current); the snapshot is None until one has been built"""
+        state = NetworkSnapshotState.current()
+        latest = NetworkSnapshot.objects.first()
+        return latest, latest is not None and latest.version == state.data_version
+
+    def refresh(self):
+        """Rebuild a stale snapshot unless another process holds the lease
+
+        Returns the new snapshot, or None if nothing needed building.
+        """
+        latest, is_current = self.get()
+        if is_current or not NetworkSnapshotState.claim_rebuild():
+            return None
+        try:
+            # Another process may have finished a rebuild since we looked
+            latest, is_current = self.get()
+            if is_current:
+                return None
+            return self.rebuild(NetworkSnapshotState.current().data_version)
+        finally:
+            NetworkSnapshotState.release_rebuild()
+
+    def rebuild(self, version):
+        """Build and store the snapshot for version, replacing older ones
+
+        The graph file is saved alongside, stamped with version, so
+        NetworkAnalyzer.build_network in every worker maps it instead of
+        building the graph itself until the data changes again.
+        """
+        snapshot, graph = self._build(version)
+        with transaction.atomic():
+            NetworkSnapshot.objects.filter(version__lte=version).delete()
+            snapshot.save()
+        # A graph mapped from a file that is already current needs no saving
+        if isinstance(graph, CSRGraphStore) and graph.version is None:
+            graph.version = version
+            graph.save(default_graph_path())
+        return snapshot
+
+    def _build(self, version):
+        """The unsaved snapshot and the graph it was computed from"""
+        started = time.perf_counter()
+        analyzer = NetworkAnalyzer()
+        analyzer.build_network()
+        snapshot = NetworkSnapshot(
+            version=version,
+            stats=analyzer.get_network_stats(),
+            patterns=analyzer.find_suspicious_patterns(limit=analyzer.PATTERN_PAGE_SIZE),
+            cobidding=CoBiddingAnalyzer().analyze(),
+            build_seconds=round(time.perf_counter() - started, 3),
+            built_at=timezone.now(),
+        )
+        return snapshot, analyzer.graph
+
+
+network_snapshots = NetworkSnapshotCache()
@@ -0,0 +1,208 @@
+"""
+Persistent buyer-supplier edge and degree index
+Kept current award by award, so pattern queries read only their results
+"""
+from collections import Counter
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest, Least
+from dashboard.models import NetworkEdge, NetworkNode, Tender
+
+
+class NetworkIndex:
+    """Edge weights and node degrees of the award network, stored in the database
+
+    NetworkEdge holds one row per connected pair and NetworkNode one row per
+    connected organization, both indexed on their counts so threshold
+    queries (weight >= 3, degree >= 5) are index range scans. The Tender
+    signals move one unit of weight per award change. Set-based writes that
+    bypass the signals call refresh() with the pairs they touched, or
+    rebuild() to recompute everything after a first bulk load.
+    """
+
+    # Pairs, and organizations, recounted per query by refresh()
+    BATCH_SIZE = 500
+
+    def record_award(self, previous, current):
+        """Move one award from the previous (buyer_id, winner_id) pair to the current one
+
+        Either pair may be None when the tender was not, or is no longer,
+        an awarded network edge.
+        """
+        if previous == current:
+            return
+        with transaction.atomic():
+            if previous:
+                self._remove_award(*previous)
+            if current:
+                self._add_award(*current)
+
+    def remove_organization(self, org_id):
+        """Drop an organization's edges before it is deleted, fixing its neighbours' degrees"""
+        with transaction.atomic():
+            edges = NetworkEdge.objects.filter(organization_id=org_id) | \
+                NetworkEdge.objects.filter(counterparty_id=org_id)
+            for organization_id, counterparty_id in edges.values_list('organization_id', 'counterparty_id'):
+                other_id = counterparty_id if organization_id == org_id else organization_id
+                if other_id != org_id:
+                    self._change_degree(other_id, -1)
+            edges.delete()
+            NetworkNode.objects.filter(organization_id=org_id).delete()
+
+    def rebuild(self):
+        """Recompute every edge and degree from the awarded tenders, in SQL"""
+        qn = connection.ops.quote_name
+        edge_table = qn(NetworkEdge._meta.db_table)
+        node_table = qn(NetworkNode._meta.db_table)
+        # A pair and its reverse are the same undirected edge
+        pairs_sql, params = Tender.objects.filter(
+            status='awarded',
+            winner__isnull=False
+        ).order_by().annotate(
+            low=Least('buyer_id', 'winner_id'), high=Greatest('buyer_id', 'winner_id')
+        ).values('low', 'high').annotate(weight=Count('id')).query.sql_with_params()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            NetworkEdge.objects.all().delete()
+            NetworkNode.objects.all().delete()
+            # Select by name: Django does not keep values() order in the SQL
+            cursor.execute(
+                f'INSERT INTO {edge_table} (organization_id, counterparty_id, weight) '
+                f'SELECT pairs.{qn("low")}, pairs.{qn("high")}, pairs.{qn("weight")} FROM ({pairs_sql}) pairs',
+                params,
+            )
+            edges = cursor.rowcount
+            cursor.execute(
+                f'INSERT INTO {node_table} (organization_id, degree) '
+                f'SELECT ends.organization_id, COUNT(*) FROM ('
+                f'SELECT organization_id FROM {edge_table} '
+                f'UNION ALL SELECT counterparty_id FROM {edge_table}'
+                f') ends GROUP BY ends.organization_id'
+            )
+            nodes = cursor.rowcount
+        return {'edges': edges, 'nodes': nodes}
+
+    def refresh(self, pairs):
+        """Recount the edges of (buyer_id, winner_id) pairs and their organizations' degrees
+
+        Weights are counted again from the awarded tenders, so a pair whose
+        awards did not change is left as it was. Returns the number of
+        edges created, updated or deleted.
+        """
+        keys = sorted({self._key(*pair) for pair in pairs})
+        organizations = sorted({org_id for key in keys for org_id in key})
+        written = 0
+        with transaction.atomic():
+            for start in range(0, len(keys), self.BATCH_SIZE):
+                written += self._refresh_edges(keys[start:start + self.BATCH_SIZE])
+            for start in range(0, len(organizations), self.BATCH_SIZE):
+                self._refresh_degrees(organizations[start:start + self.BATCH_SIZE])
+        return written
+
+    def _refresh_edges(self, keys):
+        wanted = set(keys)
+        lows = {low for low, _ in keys}
+        highs = {high for _, high in keys}
+        # A superset of the pairs, narrowed to the wanted ones below
+        counts = Tender.objects.filter(status='awarded', winner__isnull=False).filter(
+            Q(buyer_id__in=lows, winner_id__in=highs) | Q(buyer_id__in=highs, winner_id__in=lows)
+        ).order_by().annotate(
+            low=Least('buyer_id', 'winner_id'), high=Greatest('buyer_id', 'winner_id')
+        ).values_list('low', 'high').annotate(weight=Count('id'))
+        weights = {(low, high): weight for low, high, weight in counts if (low, high) in wanted}
+
+        stored = {
+            (edge.organization_id, edge.counterparty_id): edge
+            for edge in NetworkEdge.objects.filter(organization_id__in=lows, counterparty_id__in=highs)
+            if (edge.organization_id, edge.counterparty_id) in wanted
+        }
+        removed = [edge.pk for key, edge in stored.items() if key not in weights]
+        changed = []
+        for key, edge in stored.items():
+            if key in weights and edge.weight != weights[key]:
+                edge.weight = weights[key]
+                changed.append(edge)
+        created = [
+            NetworkEdge(organization_id=low, counterparty_id=high, weight=weight)
+            for (low, high), weight in weights.items() if (low, high) not in stored
+        ]
+        NetworkEdge.objects.filter(pk__in=removed).delete()
+        NetworkEdge.objects.bulk_update(changed, ['weight'])
+        NetworkEdge.objects.bulk_create(created)
+        return len(removed) + len(changed) + len(created)
+
+    def _refresh_degrees(self, org_ids):
+        selected = set(org_ids)
+        degrees = Counter()
+        edges = NetworkEdge.objects.filter(
+            Q(organization_id__in=selected) | Q(counterparty_id__in=selected)
+        ).values_list('organization_id', 'counterparty_id')
+        for organization_id, counterparty_id in edges:
+            # Both ends count, so a self-loop counts twice
+            for end in (organization_id, counterparty_id):
+                if end in selected:
+                    degrees[end] += 1
+
+        stored = {
+            node.organization_id: node for node in NetworkNode.objects.filter(organization_id__in=selected)
+        }
+        changed = []
+        for org_id, node in stored.items():
+            if degrees[org_id] and node.degree != degrees[org_id]:
+                node.degree = degrees[org_id]
+                changed.append(node)
+        NetworkNode.objects.filter(organization_id__in=[
+            org_id for org_id in stored if not degrees[org_id]
+        ]).delete()
+        NetworkNode.objects.bulk_update(changed, ['degree'])
+        NetworkNode.objects.bulk_create([
+            NetworkNode(organization_id=org_id, degree=degree)
+            for org_id, degree in degrees.items() if org_id not in stored
+        ])
+
+    def _add_award(self, buyer_id, winner_id):
+        low, high = self._key(buyer_id, winner_id)
+        edge = NetworkEdge.objects.filter(organization_id=low, counterparty_id=high)
+        if edge.update(weight=F('weight') + 1):
+            return
+        try:
+            with transaction.atomic():
+                NetworkEdge.objects.create(organization_id=low, counterparty_id=high, weight=1)
+        except IntegrityError:
+            # Another process created the edge first
+            edge.update(weight=F('weight') + 1)
+            return
+        self._change_degree(low, 1)
+        self._change_degree(high, 1)
+
+    def _remove_award(self, buyer_id, winner_id):
+        low, high = self._key(buyer_id, winner_id)
+        edge = NetworkEdge.objects.filter(organization_id=low, counterparty_id=high)
+        # The update locks the row, so only one process sees it reach zero
+        if not edge.filter(weight__gt=1).update(weight=F('weight') - 1):
+            deleted, _ = edge.delete()
+            if deleted:
+                self._change_degree(low, -1)
+                self._change_degree(high, -1)
+
+    def _change_degree(self, org_id, delta):
+        node = NetworkNode.objects.filter(organization_id=org_id)
+        if delta < 0:
+            node.update(degree=F('degree') + delta)
+            # Organizations without counterparties have no node, as after rebuild()
+            node.filter(degree=0).delete()
+            return
+        if node.update(degree=F('degree') + delta):
+            return
+        try:
+            with transaction.atomic():
+                NetworkNode.objects.create(organization_id=org_id, degree=delta)
+        except IntegrityError:
+            node.update(degree=F('degree') + delta)
+
+    def _key(self, org_id, other_id):
+        return (org_id, other_id) if org_id <= other_id else (other_id, org_id)
+
+
+# Shared index used by the network analyzer and the Tender signals
+network_index = NetworkIndex()
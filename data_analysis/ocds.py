@@ -0,0 +1,319 @@
+"""
+Streaming import of Open Contracting Data Standard (OCDS) exports
+Release packages, record packages and JSON Lines of releases are decoded
+one release at a time, gzipped or not, and loaded through DataImporter
+"""
+import gzip
+import json
+import re
+import zlib
+from decimal import Decimal
+from .importer import DataImporter
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class OCDSError(ValueError):
+    """A file that is not OCDS JSON"""
+
+
+def open_ocds(path):
+    """Text stream of an OCDS file, decompressed if it is gzipped"""
+    with open(path, 'rb') as raw:
+        magic = raw.read(2)
+    if magic == b'\x1f\x8b':
+        return gzip.open(path, 'rt', encoding='utf-8-sig')
+    return open(path, encoding='utf-8-sig')
+
+
+class ReleaseStream:
+    """Iterate the releases of an OCDS text stream without loading the document
+
+    The stream may hold release packages, record packages, bare releases,
+    arrays of any of these, or several of them one after another as in
+    JSON Lines. Package metadata is decoded key by key, and the
+    'releases' and 'records' arrays one element at a time, so memory is
+    bounded by the largest release rather than the file. Records give
+    their compiledRelease, or else their releases.
+    """
+
+    # Characters read per refill; a value larger than the buffer doubles it
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ''
+        self.pos = 0
+        self.offset = 0
+        self.eof = False
+        # Amounts keep their exact decimal value
+        self.decoder = json.JSONDecoder(parse_float=Decimal)
+
+    def __iter__(self):
+        while self._peek():
+            yield from self._value()
+
+    def _value(self):
+        char = self._peek()
+        if char == '[':
+            yield from self._array(self._value)
+        elif char == '{':
+            yield from self._object()
+        else:
+            raise OCDSError(f'Expected a release or package at character {self.offset + self.pos}')
+
+    def _object(self):
+        """Stream a package's release or record arrays; any other object is a release"""
+        self.pos += 1
+        fields = {}
+        package = False
+        while True:
+            char = self._peek()
+            if char == '}':
+                self.pos += 1
+                break
+            if char == ',':
+                self.pos += 1
+                continue
+            key = self._decode()
+            if not isinstance(key, str):
+                raise OCDSError(f'Expected an object key at character {self.offset + self.pos}')
+            self._expect(':')
+            if key in ('releases', 'records') and self._peek() == '[':
+                package = True
+                yield from self._array(self._release if key == 'releases' else self._record)
+            else:
+                fields[key] = self._decode()
+        if not package and 'publisher' not in fields:
+            yield fields
+
+    def _array(self, element):
+        self.pos += 1
+        while True:
+            char = self._peek()
+            if char == ']':
+                self.pos += 1
+                return
+            if char == ',':
+                self.pos += 1
+                continue
+            if not char:
+                raise OCDSError('Unexpected end of file inside an array')
+            yield from element()
+
+    def _release(self):
+        yield self._decode()
+
+    def _record(self):
+        record = self._decode()
+        if not isinstance(record, dict):
+            yield record
+        elif record.get('compiledRelease'):
+            yield record['compiledRelease']
+        else:
+            yield from record.get('releases') or ()
+
+    def _decode(self):
+        """The next JSON value, reading until it is complete"""
+        while True:
+            self._peek()
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next block
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise OCDSError(f'{e.msg} at character {self.offset + e.pos}') from e
+            self._read()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise OCDSError(f'Expected {char!r} at character {self.offset + self.pos}')
+        self.pos += 1
+
+    def _peek(self):
+        """The next non-whitespace character, or '' at the end"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._read()
+
+    def _read(self):
+        if self.pos:
+            self.offset += self.pos
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        data = self.stream.read(max(self.BLOCK_SIZE, len(self.buffer)))
+        if not data:
+            self.eof = True
+        self.buffer += data
+
+
+class OCDSImporter(DataImporter):
+    """Import OCDS releases as tenders, bids and organizations
+
+    Each release becomes rows in the CSV layout, one per bid in the bids
+    extension, and goes through the same chunked staging, fingerprints
+    and entity resolution. The tender_id is the release's ocid; buyer,
+    winner and bidders come from the parties, with their identifier as
+    the registration number and their address locality or region as the
+    district. The winner is the first supplier of the first active
+    award. Consecutive releases of one ocid are merged, later top-level
+    fields winning, so the latest release of a process is imported.
+    """
+
+    STREAM_ERRORS = DataImporter.STREAM_ERRORS + (OCDSError, OSError, EOFError, zlib.error)
+
+    # OCDS tender status -> Tender status, before awards are considered
+    TENDER_STATUSES = {
+        'planning': 'published',
+        'planned': 'published',
+        'active': 'published',
+        'complete': 'closed',
+        'cancelled': 'cancelled',
+        'unsuccessful': 'cancelled',
+        'withdrawn': 'cancelled',
+    }
+
+    # Bids that were never submitted
+    SKIPPED_BID_STATUSES = ('invited', 'withdrawn')
+
+    def import_from_file(self, path, on_chunk=None):
+        """Import an OCDS .json, .jsonl or gzipped file, one chunk at a time"""
+        try:
+            with open_ocds(path) as stream:
+                return self.import_releases(ReleaseStream(stream), on_chunk)
+        except OSError as e:
+            return {'success': False, 'error': str(e)}
+
+    def import_releases(self, releases, on_chunk=None):
+        """Import an iterable of release dicts"""
+        return self._import_chunks(self._rows(releases), on_chunk)
+
+    def _rows(self, releases):
+        """(release number, row) pairs of every release"""
+        for number, release in enumerate(self._merged(releases), 1):
+            for row in self._release_rows(release):
+                yield number, row
+
+    def _merged(self, releases):
+        pending = None
+        for release in releases:
+            if not isinstance(release, dict):
+                # Rejected as a row without a tender_id
+                release = {}
+            if pending is not None and release.get('ocid') and release.get('ocid') == pending.get('ocid'):
+                pending = {**pending, **release}
+                continue
+            if pending is not None:
+                yield pending
+            pending = release
+        if pending is not None:
+            yield pending
+
+    def _release_rows(self, release):
+        """Rows of one release: one per bid, or one without bid columns"""
+        parties = {
+            party.get('id'): party for party in self._list(release.get('parties')) if isinstance(party, dict)
+        }
+        tender = self._dict(release.get('tender'))
+        buyer = self._party(parties, release.get('buyer') or tender.get('procuringEntity'), strict=True)
+        award = next(
+            (a for a in self._list(release.get('awards'))
+             if isinstance(a, dict) and a.get('status', 'active') == 'active'),
+            {},
+        )
+        suppliers = [s for s in self._list(award.get('suppliers')) if isinstance(s, dict)]
+        winner = self._party(parties, suppliers[0] if suppliers else None)
+        tender_period = self._dict(tender.get('tenderPeriod'))
+        value = self._dict(tender.get('value')) or self._dict(self._dict(
+            self._dict(release.get('planning')).get('budget')).get('amount'))
+
+        status = self.TENDER_STATUSES.get(tender.get('status'), 'published')
+        if status != 'cancelled' and winner['name']:
+            status = 'awarded'
+
+        row = {
+            'tender_id': release.get('ocid'),
+            'title': tender.get('title'),
+            'description': tender.get('description'),
+            'category': self._category(tender),
+            'buyer': buyer['name'],
+            'buyer_registration_number': buyer['identifier'],
+            'buyer_district': buyer['district'],
+            'estimated_value': value.get('amount'),
+            'award_amount': self._dict(award.get('value')).get('amount'),
+            'currency': value.get('currency'),
+            'publication_date': (
+                tender.get('datePublished') or tender_period.get('startDate') or release.get('date')
+            ),
+            'submission_deadline': tender_period.get('endDate'),
+            'opening_date': self._dict(tender.get('bidOpening')).get('date'),
+            'award_date': award.get('date'),
+            'status': status,
+            'winner': winner['name'],
+            'winner_registration_number': winner['identifier'],
+            'is_winner': '',
+        }
+        winner_ids = {supplier.get('id') for supplier in suppliers}
+
+        bids = [
+            bid for bid in self._list(self._dict(release.get('bids')).get('details'))
+            if isinstance(bid, dict) and bid.get('status') not in self.SKIPPED_BID_STATUSES
+        ]
+        if not bids:
+            yield row
+            return
+        for bid in bids:
+            tenderers = [t for t in self._list(bid.get('tenderers')) if isinstance(t, dict)]
+            bidder = self._party(parties, tenderers[0] if tenderers else None)
+            yield {
+                **row,
+                'bidder': bidder['name'],
+                'bidder_registration_number': bidder['identifier'],
+                'bidder_district': bidder['district'],
+                'bid_amount': self._dict(bid.get('value')).get('amount'),
+                'bid_submission_date': bid.get('date'),
+                'is_winner': bool(tenderers) and tenderers[0].get('id') in winner_ids,
+            }
+
+    def _party(self, parties, reference, strict=False):
+        """Name, identifier and district of an organization reference
+
+        Bidders in an unknown district fall back to their buyer's; a
+        buyer's unknown district rejects the tender, as in CSV imports.
+        """
+        reference = self._dict(reference)
+        party = self._dict(parties.get(reference.get('id')))
+        identifier = self._dict(party.get('identifier')) or self._dict(reference.get('identifier'))
+        address = self._dict(party.get('address'))
+        places = [address.get('locality'), address.get('region')]
+        district = next((place for place in places if place in self.districts), '')
+        if strict and not district:
+            district = next((place for place in places if place), '')
+        return {
+            'name': party.get('name') or reference.get('name') or identifier.get('legalName') or '',
+            'identifier': identifier.get('id') or '',
+            'district': district,
+        }
+
+    def _category(self, tender):
+        category = tender.get('mainProcurementCategory')
+        if category:
+            return str(category).capitalize()
+        for item in self._list(tender.get('items')):
+            description = self._dict(self._dict(item).get('classification')).get('description')
+            if description:
+                return description
+        return ''
+
+    def _dict(self, value):
+        return value if isinstance(value, dict) else {}
+
+    def _list(self, value):
+        return value if isinstance(value, list) else []
@@ -0,0 +1,116 @@
+"""
+Multi-process sharded risk analysis
+Splits tenders into buyer shards and scores them in a process pool
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connections
+from django.db.models import Count
+from dashboard.models import Tender
+from .risk_analyzer import RiskAnalyzer
+
+
+class ShardedRiskRunner:
+    """Score all tenders across worker processes, sharded by buyer
+
+    Every tender of a buyer lands in the same shard, so buyer-winner pair
+    counts stay shard-local. Table-wide inputs (total awards, supplier
+    wins, medians) are loaded once and handed to every worker as a
+    snapshot. Workers only read and score; the parent process writes all
+    RiskScore rows in bulk, so there is a single writer on the database.
+    With profile=True, worker sections are summed into the parent's
+    profile, so their wall and CPU times add up across processes. Since a
+    run scores every tender, it also refreshes the RiskBaseline and drops
+    the RiskChange rows it covered, as a full incremental run does.
+    """
+
+    def __init__(self, workers=1, vectorized=False, **analyzer_options):
+        self.workers = max(1, workers)
+        self.vectorized = vectorized
+        self.analyzer_options = analyzer_options
+        self.analyzer = RiskAnalyzer(**analyzer_options)
+
+    def run(self, shard_count=None, on_shard=None):
+        """Score every tender in shard_count shards and write the results
+
+        shard_count defaults to one shard per worker. on_shard, if given, is
+        called with each shard's timing dict as soon as the shard finishes.
+        """
+        # Changes recorded after this point are left for the next run. The
+        # shards are built afterwards, so every tender those changes cover
+        # belongs to a buyer in some shard.
+        last_change = self.analyzer.last_change_id()
+        context = self.analyzer.load_context()
+        shards = self.make_shards(shard_count or self.workers)
+        results = self.analyzer.summarize_scores([])
+        results['shards'] = []
+
+        tasks = [
+            (index, buyer_ids, context, self.vectorized, self.analyzer_options)
+            for index, buyer_ids in enumerate(shards)
+        ]
+
+        if self.workers == 1:
+            finished = map(_score_shard, tasks)
+            self._collect(finished, results, on_shard)
+        else:
+            # Workers must open their own connections instead of sharing ours
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+                self._collect(pool.map(_score_shard, tasks), results, on_shard)
+
+        results['shards'].sort(key=lambda shard: shard['shard'])
+        self.analyzer.record_baseline(last_change, context)
+        return self.analyzer.finish_results(results)
+
+    def make_shards(self, count):
+        """Split buyers into count shards of roughly equal tender counts"""
+        buyer_sizes = Tender.objects.order_by().values_list('buyer_id').annotate(
+            tenders=Count('id')
+        ).order_by('-tenders')
+
+        shards = [[] for _ in range(count)]
+        loads = [0] * count
+        # Largest buyers first, each to the least loaded shard
+        for buyer_id, tenders in buyer_sizes:
+            target = loads.index(min(loads))
+            shards[target].append(buyer_id)
+            loads[target] += tenders
+        return [shard for shard in shards if shard]
+
+    def _collect(self, finished, results, on_shard):
+        for index, scores, score_seconds, buyer_count, profile in finished:
+            self.analyzer.profiler.merge(profile)
+            write_started = time.perf_counter()
+            self.analyzer.write_scores(scores)
+            self.analyzer.summarize_scores(scores, results)
+
+            shard = {
+                'shard': index,
+                'buyers': buyer_count,
+                'tenders': len(scores),
+                'score_seconds': round(score_seconds, 3),
+                'write_seconds': round(time.perf_counter() - write_started, 3),
+            }
+            results['shards'].append(shard)
+            if on_shard:
+                on_shard(shard)
+
+
+def _init_worker():
+    import django
+    # Needed on platforms that spawn rather than fork workers
+    django.setup()
+
+
+def _score_shard(task):
+    index, buyer_ids, context, vectorized, analyzer_options = task
+    started = time.perf_counter()
+    analyzer = RiskAnalyzer(**analyzer_options)
+    scores = analyzer.score_tenders(
+        Tender.objects.filter(buyer_id__in=buyer_ids), context, vectorized
+    )
+    return (
+        index, scores, time.perf_counter() - started, len(buyer_ids),
+        analyzer.profiler.as_dict(),
+    )
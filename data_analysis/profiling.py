@@ -0,0 +1,113 @@
+"""
+Run instrumentation for the risk analyzer
+Records wall time, CPU time and SQL activity per phase and per rule
+"""
+import json
+import platform
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+import django
+from django.db import connection
+from django.utils import timezone
+
+# Bumped when the layout of a written profile changes
+PROFILE_FORMAT_VERSION = 1
+
+# Shared no-op section handed out by disabled profilers
+_DISABLED = nullcontext()
+
+
+class RunProfiler:
+    """Accumulate timing and query statistics for named sections
+
+    Sections are inclusive: a query issued inside a rule that runs inside
+    a phase counts towards both. A disabled profiler hands out a shared
+    no-op context, so instrumented code costs next to nothing by default.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.sections = {}
+
+    def measure(self, name, sql=True):
+        """Time a block; with sql=True also count the queries it runs"""
+        if not self.enabled:
+            return _DISABLED
+        return self._measure(name, sql)
+
+    @contextmanager
+    def _measure(self, name, sql):
+        queries = {'count': 0, 'seconds': 0.0}
+
+        def record_query(execute, sql_text, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql_text, params, many, context)
+            finally:
+                queries['count'] += 1
+                queries['seconds'] += time.perf_counter() - started
+
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            with ExitStack() as stack:
+                if sql:
+                    stack.enter_context(connection.execute_wrapper(record_query))
+                yield
+        finally:
+            self.add(
+                name,
+                wall_seconds=time.perf_counter() - wall_started,
+                cpu_seconds=time.process_time() - cpu_started,
+                queries=queries['count'],
+                sql_seconds=queries['seconds'],
+            )
+
+    def add(self, name, calls=1, wall_seconds=0.0, cpu_seconds=0.0, queries=0, sql_seconds=0.0):
+        """Add measurements to a section, e.g. ones taken in another process"""
+        section = self.sections.setdefault(name, {
+            'calls': 0,
+            'wall_seconds': 0.0,
+            'cpu_seconds': 0.0,
+            'queries': 0,
+            'sql_seconds': 0.0,
+        })
+        section['calls'] += calls
+        section['wall_seconds'] += wall_seconds
+        section['cpu_seconds'] += cpu_seconds
+        section['queries'] += queries
+        section['sql_seconds'] += sql_seconds
+
+    def merge(self, sections):
+        """Fold in the sections of another profiler's as_dict()"""
+        for name, section in sections.items():
+            self.add(name, **section)
+
+    def as_dict(self):
+        """Sections with times rounded for JSON output"""
+        return {
+            name: {
+                key: round(value, 6) if isinstance(value, float) else value
+                for key, value in section.items()
+            }
+            for name, section in sorted(self.sections.items())
+        }
+
+    def write(self, path, results=None, mode=None):
+        """Write a machine-readable run profile that can be diffed across versions"""
+        profile = {
+            'format_version': PROFILE_FORMAT_VERSION,
+            'created_at': timezone.now().isoformat(),
+            'mode': mode,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'results': {
+                key: value for key, value in (results or {}).items()
+                if key in ('total_analyzed', 'high_risk_found', 'flags_detected')
+            },
+            'sections': self.as_dict(),
+        }
+        with open(path, 'w') as handle:
+            json.dump(profile, handle, indent=2, sort_keys=True)
+        return profile
@@ -3,66 +3,114 @@ Risk Analysis Engine for ACTS
 Detects corruption red flags in procurement data
 """
 try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
 except ImportError:
-    PANDAS_AVAILABLE = False
-    
-try:
-    import networkx as nx
-    NETWORKX_AVAILABLE = True
-except ImportError:
-    NETWORKX_AVAILABLE = False
+    NUMPY_AVAILABLE = False
     
+import base64
+import json
 from collections import defaultdict
-from dashboard.models import Tender, TenderBid, RiskScore, Organization
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+from dashboard.models import (
+    Tender, TenderBid, RiskScore, Organization, RiskChange, RiskBaseline,
+    RiskAnalysisCheckpoint, NetworkEdge, NetworkNode, NetworkSnapshotState, OrganizationSimilarity
+)
+from . import graph_algorithms
+from .graph_algorithms import AdjacencyGraph
+from .graph_store import CSRGraphStore, load_graph_store
+from .importer import DataImporter  # noqa: F401 - re-exported for existing callers
+from .profiling import RunProfiler
+from .rules import (
+    SINGLE_BID_RULE, SHORT_WINDOW_RULE, REPEATED_PAIR_RULE, NETWORK_RISK_RULE, HIGH_VALUE_RULE
+)
+from .scoring_kernel import VectorizedScorer
+from .sql_scoring import DatabaseRiskScorer
+from .value_index import value_index
 
 
 class RiskAnalyzer:
     """Main risk analysis engine"""
     
-    def __init__(self):
+    # RiskScore fields written by a scoring run
+    SCORE_FIELDS = (
+        'single_bid_flag', 'short_window_flag', 'repeated_pair_flag', 'high_value_flag',
+        'single_bid_score', 'short_window_score', 'repeated_pair_score', 'network_risk_score',
+        'total_risk_score', 'risk_level',
+    )
+    
+    # Tender columns needed to score a tender without touching the model
+    TENDER_FIELDS = (
+        'id', 'buyer_id', 'winner_id', 'status', 'estimated_value',
+        'publication_date', 'submission_deadline', 'category_id', 'buyer__district_id',
+    )
+    
+    # Peer groups the high-value rule can compare a tender against
+    PEER_FIELDS = {
+        'category': 'category_id',
+        'district': 'buyer__district_id',
+    }
+    
+    # Smallest peer group whose median is trusted over the global one
+    MIN_PEER_TENDERS = 5
+    
+    def __init__(self, batch_size=500, drift_tolerance=0.1, high_value_scope='global',
+                 profile=False):
         self.risk_weights = {
             'single_bid': 40,
             'short_window': 25,
             'repeated_pair': 30,
             'network_risk': 5,
         }
+        self.batch_size = batch_size
+        # Relative change in global inputs that forces a full re-score
+        self.drift_tolerance = drift_tolerance
+        
+        if high_value_scope != 'global' and high_value_scope not in self.PEER_FIELDS:
+            raise ValueError(f"Unknown high value scope: {high_value_scope}")
+        self.high_value_scope = high_value_scope
+        
+        # Per-phase and per-rule timings, added to results as 'profile'
+        self.profiler = RunProfiler(enabled=profile)
     
-    def analyze_all_tenders(self):
+    def analyze_all_tenders(self, batch=False, vectorized=False, in_database=False):
         """Analyze all tenders and update risk scores"""
+        if in_database:
+            return self.analyze_tenders_in_database()
+        if batch or vectorized:
+            return self.analyze_tenders_batch(vectorized=vectorized)
+        
         tenders = Tender.objects.all()
-        results = {
-            'total_analyzed': 0,
-            'high_risk_found': 0,
-            'flags_detected': defaultdict(int),
-        }
+        results = self._new_results()
+        with self.profiler.measure('phase.load'):
+            value_index.ensure_current(force=True)
         
-        for tender in tenders:
+        # iterator() keeps the queryset cache from holding every tender
+        for tender in tenders.iterator(chunk_size=self.batch_size):
             risk_score = self.analyze_tender(tender)
-            
-            results['total_analyzed'] += 1
-            if risk_score.risk_level in ['high', 'critical']:
-                results['high_risk_found'] += 1
-            
-            # Count flags
-            if risk_score.single_bid_flag:
-                results['flags_detected']['single_bid'] += 1
-            if risk_score.short_window_flag:
-                results['flags_detected']['short_window'] += 1
-            if risk_score.repeated_pair_flag:
-                results['flags_detected']['repeated_pair'] += 1
+            self._record_result(
+                results,
+                risk_score.risk_level,
+                risk_score.single_bid_flag,
+                risk_score.short_window_flag,
+                risk_score.repeated_pair_flag,
+            )
         
-        return results
+        return self.finish_results(results)
     
     def analyze_tender(self, tender):
         """Analyze a single tender for risk factors"""
-        risk_score, created = RiskScore.objects.get_or_create(
-            tender=tender,
-            defaults={
-                'analysis_version': '1.0'
-            }
-        )
+        with self.profiler.measure('phase.load'):
+            risk_score, created = RiskScore.objects.get_or_create(
+                tender=tender,
+                defaults={
+                    'analysis_version': '1.0'
+                }
+            )
         
         # Reset scores
         risk_score.single_bid_score = 0
@@ -76,74 +124,588 @@ class RiskAnalyzer:
         risk_score.repeated_pair_flag = False
         risk_score.high_value_flag = False
         
-        # 1. Single Bid Analysis
-        self._analyze_single_bid(tender, risk_score)
+        with self.profiler.measure('phase.score'):
+            # 1. Single Bid Analysis
+            with self.profiler.measure('rule.single_bid'):
+                self._analyze_single_bid(tender, risk_score)
+            
+            # 2. Short Tender Window Analysis
+            with self.profiler.measure('rule.short_window'):
+                self._analyze_short_window(tender, risk_score)
+            
+            # 3. Repeated Buyer-Supplier Pairs
+            with self.profiler.measure('rule.repeated_pair'):
+                self._analyze_repeated_pairs(tender, risk_score)
+            
+            # 4. Network Risk Analysis
+            with self.profiler.measure('rule.network_risk'):
+                self._analyze_network_risk(tender, risk_score)
+            
+            # 5. High Value Flag
+            with self.profiler.measure('rule.high_value'):
+                self._analyze_high_value(tender, risk_score)
+            
+            # Calculate total risk score
+            risk_score.total_risk_score = self._total_risk_score(
+                risk_score.single_bid_score,
+                risk_score.short_window_score,
+                risk_score.repeated_pair_score,
+                risk_score.network_risk_score,
+            )
+        
+        with self.profiler.measure('phase.write'):
+            risk_score.save()
+        return risk_score
+    
+    def analyze_tenders_batch(self, tenders=None, vectorized=False, context=None, progress=None):
+        """
+        Analyze tenders set-wise and write their risk scores in bulk.
+        
+        Gives the same scores and flags as analyze_tender, but gathers bid
+        counts, buyer-winner pair counts, supplier wins and the median value
+        in a few grouped queries instead of several queries per tender.
+        With vectorized=True the rules run as NumPy column operations when
+        NumPy is installed. progress(done, total) is called as scores are
+        written.
+        """
+        if tenders is None:
+            tenders = Tender.objects.all()
+        if context is None:
+            context = self.load_context()
+        
+        scores = self.score_tenders(tenders, context, vectorized)
+        self.write_scores(scores, progress)
+        return self.finish_results(self.summarize_scores(scores))
+    
+    def score_tenders(self, tenders, context, vectorized=False):
+        """Score a queryset of tenders in memory without writing anything"""
+        with self.profiler.measure('phase.load'):
+            rows = self._load_tender_rows(tenders, context)
+        with self.profiler.measure('phase.score'):
+            return self._score_rows(rows, context, vectorized)
+    
+    def summarize_scores(self, scores, results=None):
+        """Tally score dicts into an analysis results dict"""
+        if results is None:
+            results = self._new_results()
+        for score in scores:
+            self._record_result(
+                results,
+                score['risk_level'],
+                score['single_bid_flag'],
+                score['short_window_flag'],
+                score['repeated_pair_flag'],
+            )
+        return results
+    
+    def analyze_tenders_streaming(self, tenders=None, chunk_size=None, checkpoint=None,
+                                  vectorized=False, progress=None):
+        """
+        Score tenders in keyset-ordered chunks with constant memory.
+        
+        Each chunk is loaded, scored and written in its own transaction
+        before the next one is read. The medians come from the database
+        rather than the in-memory value index. With a checkpoint name the
+        last written tender id and running results are saved alongside each
+        chunk, and a later call with the same name resumes after it. A run
+        over all tenders records the baseline once it completes.
+        """
+        full_run = tenders is None
+        if full_run:
+            tenders = Tender.objects.all()
+        chunk_size = chunk_size or self.batch_size
+        last_change = self.last_change_id()
+        context = self.load_context(use_index=False)
         
-        # 2. Short Tender Window Analysis
-        self._analyze_short_window(tender, risk_score)
+        state = None
+        results = self._new_results()
+        last_id = 0
+        if checkpoint:
+            state, created = RiskAnalysisCheckpoint.objects.get_or_create(
+                name=checkpoint, defaults={'last_change_id': last_change}
+            )
+            if not created:
+                last_id = state.last_tender_id
+                last_change = state.last_change_id
+                results = self._results_from_json(state.results)
         
-        # 3. Repeated Buyer-Supplier Pairs
-        self._analyze_repeated_pairs(tender, risk_score)
+        total = tenders.count() if progress else None
+        ordered = tenders.order_by('id')
+        while True:
+            remaining = ordered.filter(id__gt=last_id)
+            # The id closing this chunk, or None when the rest fits in one chunk
+            upper_id = remaining.values_list('id', flat=True)[chunk_size - 1:chunk_size].first()
+            chunk = remaining if upper_id is None else remaining.filter(id__lte=upper_id)
+            
+            scores = self.score_tenders(chunk, context, vectorized)
+            if not scores:
+                break
+            last_id = max(score['tender_id'] for score in scores)
+            self.summarize_scores(scores, results)
+            
+            with transaction.atomic():
+                self.write_scores(scores)
+                if state:
+                    state.last_tender_id = last_id
+                    state.results = results
+                    state.save(update_fields=['last_tender_id', 'results', 'updated_at'])
+            
+            if progress:
+                progress(results['total_analyzed'], total)
+            if upper_id is None:
+                break
         
-        # 4. Network Risk Analysis
-        self._analyze_network_risk(tender, risk_score)
+        if full_run:
+            self.record_baseline(last_change, context)
+        if state:
+            state.delete()
+        return self.finish_results(results)
+    
+    def finish_results(self, results):
+        """Attach the profiler's sections to a results dict when profiling"""
+        if self.profiler.enabled:
+            results['profile'] = self.profiler.as_dict()
+        return results
+    
+    def _results_from_json(self, data):
+        """Rebuild a results dict saved in a checkpoint"""
+        results = self._new_results()
+        results['total_analyzed'] = data.get('total_analyzed', 0)
+        results['high_risk_found'] = data.get('high_risk_found', 0)
+        results['flags_detected'].update(data.get('flags_detected', {}))
+        return results
+    
+    def analyze_tenders_in_database(self, tenders=None):
+        """
+        Score tenders inside the database and upsert RiskScore in one statement.
+        
+        The rule definitions are compiled into a single annotated queryset,
+        so no tender rows pass through Python. Backends without an upsert
+        we can emit fall back to the batch path. A run over all tenders
+        records the baseline.
+        """
+        full_run = tenders is None
+        if full_run:
+            tenders = Tender.objects.all()
+        last_change = self.last_change_id()
+        context = self.load_context()
         
-        # 5. High Value Flag
-        self._analyze_high_value(tender, risk_score)
+        if not DatabaseRiskScorer.is_supported():
+            results = self.analyze_tenders_batch(tenders, context=context)
+            if full_run:
+                self.record_baseline(last_change, context)
+            return results
         
-        # Calculate total risk score
-        risk_score.total_risk_score = (
-            risk_score.single_bid_score * self.risk_weights['single_bid'] // 100 +
-            risk_score.short_window_score * self.risk_weights['short_window'] // 100 +
-            risk_score.repeated_pair_score * self.risk_weights['repeated_pair'] // 100 +
-            risk_score.network_risk_score * self.risk_weights['network_risk'] // 100
+        # Scoring and writing happen in the same statement
+        with self.profiler.measure('phase.write'):
+            DatabaseRiskScorer(self).refresh(tenders, context)
+        if full_run:
+            self.record_baseline(last_change, context)
+        
+        with self.profiler.measure('phase.summarize'):
+            counts = RiskScore.objects.filter(tender__in=tenders.values('id')).aggregate(
+                total=Count('id'),
+                high_risk=Count('id', filter=Q(risk_level__in=['high', 'critical'])),
+                single_bid=Count('id', filter=Q(single_bid_flag=True)),
+                short_window=Count('id', filter=Q(short_window_flag=True)),
+                repeated_pair=Count('id', filter=Q(repeated_pair_flag=True)),
+            )
+        results = self._new_results()
+        results['total_analyzed'] = counts['total']
+        results['high_risk_found'] = counts['high_risk']
+        for flag in ('single_bid', 'short_window', 'repeated_pair'):
+            if counts[flag]:
+                results['flags_detected'][flag] = counts[flag]
+        return self.finish_results(results)
+    
+    def analyze_changed_tenders(self, vectorized=False, progress=None):
+        """
+        Re-score only the tenders affected by changes since the last run.
+        
+        Uses the RiskChange log written by the dashboard signals: changed
+        tenders, tenders sharing a changed buyer-winner pair, and tenders
+        whose stored network or high-value result no longer matches the
+        current supplier win counts or median. Falls back to a full run when
+        there is no baseline or the global inputs drifted past
+        drift_tolerance.
+        """
+        last_change = self.last_change_id()
+        changes = RiskChange.objects.filter(id__lte=last_change)
+        baseline = RiskBaseline.objects.first()
+        context = self.load_context()
+        
+        if baseline is None or self._has_drifted(baseline, context):
+            results = self.analyze_tenders_batch(
+                vectorized=vectorized, context=context, progress=progress
+            )
+            results['full_rescore'] = True
+        else:
+            with self.profiler.measure('phase.select'):
+                tenders = Tender.objects.filter(self._changed_tenders_filter(changes, context))
+            results = self.analyze_tenders_batch(
+                tenders, vectorized=vectorized, context=context, progress=progress
+            )
+            results['full_rescore'] = False
+        
+        self.record_baseline(last_change, context)
+        return self.finish_results(results)
+    
+    def last_change_id(self):
+        """Id of the newest RiskChange, taken before scoring starts"""
+        return RiskChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    
+    def record_baseline(self, last_change, context):
+        """
+        Mark a run's inputs as scored: drop the changes up to last_change and
+        store the global inputs the next incremental run checks for drift.
+        """
+        with transaction.atomic():
+            RiskChange.objects.filter(id__lte=last_change).delete()
+            baseline = RiskBaseline.objects.first()
+            RiskBaseline.objects.update_or_create(
+                pk=baseline.pk if baseline else None,
+                defaults={
+                    'total_awarded': context['total_awarded'],
+                    'median_value': context['median_value'],
+                },
+            )
+    
+    def _has_drifted(self, baseline, context):
+        """Check whether the global scoring inputs moved past the tolerance"""
+        for old, new in (
+            (baseline.total_awarded, context['total_awarded']),
+            (baseline.median_value, context['median_value']),
+        ):
+            if abs(new - old) > abs(old) * Decimal(str(self.drift_tolerance)):
+                return True
+        return False
+    
+    def _changed_tenders_filter(self, changes, context):
+        """Build a Q matching every tender whose score may have changed"""
+        # Tenders edited directly, or whose bids changed
+        query = Q(id__in=changes.values('tender_id'))
+        
+        # Tenders sharing a changed buyer-winner pair (a superset is fine)
+        pair_changes = changes.filter(winner_id__isnull=False)
+        query |= Q(
+            buyer_id__in=pair_changes.values('buyer_id'),
+            winner_id__in=pair_changes.values('winner_id'),
         )
         
-        # Ensure score is within bounds
-        risk_score.total_risk_score = min(100, max(0, risk_score.total_risk_score))
+        # Tenders never scored at all (e.g. created with bulk_create)
+        query |= Q(risk_score__isnull=True)
         
-        risk_score.save()
-        return risk_score
+        # Suppliers whose stored network score no longer matches their share
+        stored_network = RiskScore.objects.filter(
+            tender__winner__isnull=False
+        ).order_by().values_list('tender__winner_id').annotate(
+            lowest=Min('network_risk_score'), highest=Max('network_risk_score')
+        )
+        stale_suppliers = [
+            winner_id
+            for winner_id, lowest, highest in stored_network
+            if lowest != highest or lowest != self._network_risk_component(
+                context['supplier_wins'].get(winner_id, 0), context['total_awarded']
+            )
+        ]
+        if stale_suppliers:
+            query |= Q(winner_id__in=stale_suppliers)
+        
+        # Tenders whose high-value flag flips against the current median
+        query |= Q(id__in=RiskScore.objects.filter(
+            self._stale_high_value_filter(context)
+        ).values('tender_id'))
+        return query
+    
+    def _stale_high_value_filter(self, context):
+        """Q over RiskScore rows whose high-value flag disagrees with the medians"""
+        def flipped(median_value):
+            threshold = median_value * 5
+            return (
+                Q(high_value_flag=True, tender__estimated_value__lte=threshold) |
+                Q(high_value_flag=False, tender__estimated_value__gt=threshold)
+            )
+        
+        peer_medians = context['peer_medians']
+        if not peer_medians:
+            return flipped(context['median_value'])
+        
+        field = 'tender__' + self.PEER_FIELDS[self.high_value_scope]
+        query = Q(~Q(**{field + '__in': list(peer_medians)}), flipped(context['median_value']))
+        for key, median_value in peer_medians.items():
+            query |= Q(Q(**{field: key}), flipped(median_value))
+        return query
+    
+    def _new_results(self):
+        """Empty results dict for an analysis run"""
+        return {
+            'total_analyzed': 0,
+            'high_risk_found': 0,
+            'flags_detected': defaultdict(int),
+        }
+    
+    def _record_result(self, results, risk_level, single_bid_flag,
+                       short_window_flag, repeated_pair_flag):
+        """Add one scored tender to the results dict"""
+        results['total_analyzed'] += 1
+        if risk_level in ['high', 'critical']:
+            results['high_risk_found'] += 1
+        
+        # Count flags
+        if single_bid_flag:
+            results['flags_detected']['single_bid'] += 1
+        if short_window_flag:
+            results['flags_detected']['short_window'] += 1
+        if repeated_pair_flag:
+            results['flags_detected']['repeated_pair'] += 1
+    
+    def load_context(self, use_index=True):
+        """
+        Load the table-wide inputs shared by every tender's score.
+        
+        With use_index=False the medians are computed by the database, so
+        no per-tender data is held in this process.
+        """
+        with self.profiler.measure('phase.load'):
+            return self._load_context(use_index)
+    
+    def _load_context(self, use_index):
+        peer_medians = {}
+        if use_index:
+            value_index.ensure_current(force=True)
+            median_value = self._get_median_tender_value()
+            if self.high_value_scope != 'global':
+                peer_medians = value_index.medians(self.high_value_scope, self.MIN_PEER_TENDERS)
+        else:
+            median_value = self._query_median(Tender.objects.all())
+            if self.high_value_scope != 'global':
+                peer_medians = self._query_peer_medians()
+        
+        awarded = Tender.objects.filter(status='awarded').order_by()
+        supplier_wins = awarded.filter(winner__isnull=False).values_list(
+            'winner_id'
+        ).annotate(wins=Count('id'))
+        
+        return {
+            'total_awarded': awarded.count(),
+            'supplier_wins': dict(supplier_wins),
+            'median_value': median_value,
+            'peer_medians': peer_medians,
+        }
+    
+    def _query_median(self, tenders, count=None):
+        """Median estimated value computed with an ordered OFFSET query"""
+        if count is None:
+            count = tenders.count()
+        if not count:
+            return 0
+        
+        middle = list(tenders.order_by('estimated_value').values_list(
+            'estimated_value', flat=True
+        )[(count - 1) // 2:count // 2 + 1])
+        if count % 2 == 0:
+            return (middle[0] + middle[1]) / 2
+        return middle[0]
+    
+    def _query_peer_medians(self):
+        """Median per peer group, for groups with at least MIN_PEER_TENDERS"""
+        field = self.PEER_FIELDS[self.high_value_scope]
+        group_sizes = Tender.objects.order_by().values_list(field).annotate(tenders=Count('id'))
+        return {
+            key: self._query_median(Tender.objects.filter(**{field: key}), count)
+            for key, count in group_sizes
+            if count >= self.MIN_PEER_TENDERS
+        }
+    
+    def _load_tender_rows(self, tenders, context):
+        """Load tender columns with their bid counts, pair counts and median attached"""
+        tenders = tenders.order_by()
+        rows = list(tenders.values(*self.TENDER_FIELDS))
+        
+        bid_counts = dict(
+            TenderBid.objects.filter(tender_id__in=tenders.values('id'))
+            .order_by().values_list('tender_id').annotate(bids=Count('id'))
+        )
+        pair_counts = {
+            (buyer_id, winner_id): count
+            for buyer_id, winner_id, count in Tender.objects.filter(
+                status='awarded',
+                winner__isnull=False,
+                buyer_id__in=tenders.values('buyer_id'),
+            ).order_by().values_list('buyer_id', 'winner_id').annotate(pairs=Count('id'))
+        }
+        
+        for row in rows:
+            row['bid_count'] = bid_counts.get(row['id'], 0)
+            row['pair_count'] = pair_counts.get((row['buyer_id'], row['winner_id']), 0)
+            row['median_value'] = context['median_value']
+            if context['peer_medians']:
+                peer_key = row[self.PEER_FIELDS[self.high_value_scope]]
+                row['median_value'] = context['peer_medians'].get(peer_key, context['median_value'])
+        return rows
+    
+    def _score_rows(self, rows, context, vectorized=False):
+        """Score loaded tender rows, through the NumPy kernel if requested"""
+        if vectorized and NUMPY_AVAILABLE:
+            scorer = VectorizedScorer(self.risk_weights, self.profiler)
+            result = scorer.score(scorer.load_columns(rows, context))
+            return scorer.to_scores(result, self.SCORE_FIELDS)
+        return [self._score_row(row, context) for row in rows]
+    
+    def _score_row(self, row, context):
+        """Score one tender row in memory, mirroring analyze_tender"""
+        has_winner = row['winner_id'] is not None
+        score = {'tender_id': row['id']}
+        # Rules run on loaded rows here, so there are no queries to count
+        measure = self.profiler.measure
+        
+        with measure('rule.single_bid', sql=False):
+            score['single_bid_flag'], score['single_bid_score'] = self._single_bid_component(
+                row['bid_count'], has_winner
+            )
+        
+        with measure('rule.short_window', sql=False):
+            window_days = None
+            if row['submission_deadline'] and row['publication_date']:
+                window_days = (row['submission_deadline'] - row['publication_date']).days
+            score['short_window_flag'], score['short_window_score'] = self._short_window_component(
+                window_days
+            )
+        
+        score['repeated_pair_flag'], score['repeated_pair_score'] = False, 0
+        score['network_risk_score'] = 0
+        if has_winner:
+            with measure('rule.repeated_pair', sql=False):
+                # The pair count includes this tender when it is itself awarded
+                repeated_count = row['pair_count'] - (1 if row['status'] == 'awarded' else 0)
+                score['repeated_pair_flag'], score['repeated_pair_score'] = self._repeated_pair_component(
+                    repeated_count
+                )
+            with measure('rule.network_risk', sql=False):
+                score['network_risk_score'] = self._network_risk_component(
+                    context['supplier_wins'].get(row['winner_id'], 0),
+                    context['total_awarded'],
+                )
+        
+        with measure('rule.high_value', sql=False):
+            score['high_value_flag'] = self._high_value_component(
+                row['estimated_value'], row['median_value']
+            )
+        
+        score['total_risk_score'] = self._total_risk_score(
+            score['single_bid_score'],
+            score['short_window_score'],
+            score['repeated_pair_score'],
+            score['network_risk_score'],
+        )
+        score['risk_level'] = RiskScore.level_for_score(score['total_risk_score'])
+        return score
+    
+    def write_scores(self, scores, progress=None):
+        """Upsert scored rows into RiskScore with bulk create/update"""
+        with self.profiler.measure('phase.write'):
+            self._write_scores(scores, progress)
+    
+    def _write_scores(self, scores, progress):
+        now = timezone.now()
+        update_fields = list(self.SCORE_FIELDS) + ['analysis_date', 'updated_at']
+        # One INSERT ... ON CONFLICT per chunk where the backend has it;
+        # bulk_update's per-row CASE expressions are far slower
+        upsert = connection.features.supports_update_conflicts_with_target
+        
+        for start in range(0, len(scores), self.batch_size):
+            chunk = scores[start:start + self.batch_size]
+            existing = {}
+            if not upsert:
+                existing = {
+                    risk_score.tender_id: risk_score
+                    for risk_score in RiskScore.objects.filter(
+                        tender_id__in=[score['tender_id'] for score in chunk]
+                    )
+                }
+            
+            to_create = []
+            to_update = []
+            for score in chunk:
+                risk_score = existing.get(score['tender_id'])
+                if risk_score is None:
+                    risk_score = RiskScore(tender_id=score['tender_id'], analysis_version='1.0')
+                    to_create.append(risk_score)
+                else:
+                    to_update.append(risk_score)
+                
+                for field in self.SCORE_FIELDS:
+                    setattr(risk_score, field, score[field])
+                # bulk_update bypasses auto_now, so stamp the dates ourselves
+                risk_score.analysis_date = now
+                risk_score.updated_at = now
+            
+            with transaction.atomic():
+                if upsert:
+                    RiskScore.objects.bulk_create(
+                        to_create,
+                        update_conflicts=True,
+                        unique_fields=['tender'],
+                        update_fields=update_fields,
+                    )
+                else:
+                    RiskScore.objects.bulk_create(to_create)
+                    RiskScore.objects.bulk_update(to_update, update_fields)
+            
+            if progress:
+                progress(start + len(chunk), len(scores))
+    
+    def _total_risk_score(self, single_bid_score, short_window_score,
+                          repeated_pair_score, network_risk_score):
+        """Weighted total of the component scores, clamped to 0-100"""
+        total = (
+            single_bid_score * self.risk_weights['single_bid'] // 100 +
+            short_window_score * self.risk_weights['short_window'] // 100 +
+            repeated_pair_score * self.risk_weights['repeated_pair'] // 100 +
+            network_risk_score * self.risk_weights['network_risk'] // 100
+        )
+        
+        # Ensure score is within bounds
+        return min(100, max(0, total))
+    
+    def _single_bid_component(self, bid_count, has_winner):
+        """Return (flag, score) for the number of bids on a tender"""
+        if bid_count == 0 and has_winner:
+            # No bids recorded, but if there's a winner, assume single bid
+            bid_count = 1
+        return SINGLE_BID_RULE.evaluate(bid_count)
+    
+    def _short_window_component(self, days):
+        """Return (flag, score) for a tender window length in days"""
+        return SHORT_WINDOW_RULE.evaluate(days)
+    
+    def _repeated_pair_component(self, repeated_count):
+        """Return (flag, score) for other awards to the same buyer-supplier pair"""
+        return REPEATED_PAIR_RULE.evaluate(repeated_count)
+    
+    def _network_risk_component(self, supplier_wins, total_tenders):
+        """Return the network score for a supplier's share of all awards"""
+        if total_tenders <= 0:
+            return 0
+        return NETWORK_RISK_RULE.evaluate(supplier_wins / total_tenders)[1]
+    
+    def _high_value_component(self, estimated_value, median_value):
+        """Return the high-value flag for a tender value against the median"""
+        return HIGH_VALUE_RULE.evaluate(estimated_value, scale=median_value)[0]
     
     def _analyze_single_bid(self, tender, risk_score):
         """Detect single-bid tenders"""
         bid_count = tender.bids.count()
-        
-        if bid_count == 0:
-            # No bids recorded, but if there's a winner, assume single bid
-            if tender.winner:
-                risk_score.single_bid_flag = True
-                risk_score.single_bid_score = 100
-        elif bid_count == 1:
-            risk_score.single_bid_flag = True
-            risk_score.single_bid_score = 100
-        elif bid_count == 2:
-            # Two bids is still suspicious
-            risk_score.single_bid_score = 60
-        elif bid_count == 3:
-            # Three bids, moderate risk
-            risk_score.single_bid_score = 30
-        else:
-            # Four or more bids, low risk
-            risk_score.single_bid_score = 0
+        risk_score.single_bid_flag, risk_score.single_bid_score = self._single_bid_component(
+            bid_count, tender.winner_id is not None
+        )
     
     def _analyze_short_window(self, tender, risk_score):
         """Detect short tender windows"""
         if tender.tender_window_days is not None:
-            days = tender.tender_window_days
-            
-            if days < 3:
-                risk_score.short_window_flag = True
-                risk_score.short_window_score = 100
-            elif days < 7:
-                risk_score.short_window_flag = True
-                risk_score.short_window_score = 80
-            elif days < 14:
-                risk_score.short_window_score = 40
-            elif days < 21:
-                risk_score.short_window_score = 20
-            else:
-                risk_score.short_window_score = 0
+            risk_score.short_window_flag, risk_score.short_window_score = self._short_window_component(
+                tender.tender_window_days
+            )
     
     def _analyze_repeated_pairs(self, tender, risk_score):
         """Detect repeated buyer-supplier pairs"""
@@ -157,18 +719,9 @@ class RiskAnalyzer:
             status='awarded'
         ).exclude(pk=tender.pk).count()
         
-        if repeated_count >= 5:
-            risk_score.repeated_pair_flag = True
-            risk_score.repeated_pair_score = 100
-        elif repeated_count >= 3:
-            risk_score.repeated_pair_flag = True
-            risk_score.repeated_pair_score = 80
-        elif repeated_count >= 2:
-            risk_score.repeated_pair_score = 60
-        elif repeated_count == 1:
-            risk_score.repeated_pair_score = 30
-        else:
-            risk_score.repeated_pair_score = 0
+        risk_score.repeated_pair_flag, risk_score.repeated_pair_score = self._repeated_pair_component(
+            repeated_count
+        )
     
     def _analyze_network_risk(self, tender, risk_score):
         """Analyze network patterns for suspicious relationships"""
@@ -184,207 +737,360 @@ class RiskAnalyzer:
         supplier_wins = Tender.objects.filter(winner=supplier, status='awarded').count()
         
         if total_tenders > 0:
-            win_rate = supplier_wins / total_tenders
-            
-            if win_rate > 0.2:  # Wins more than 20% of all tenders
-                risk_score.network_risk_score = 100
-            elif win_rate > 0.1:  # Wins more than 10%
-                risk_score.network_risk_score = 60
-            elif win_rate > 0.05:  # Wins more than 5%
-                risk_score.network_risk_score = 30
-            else:
-                risk_score.network_risk_score = 0
+            risk_score.network_risk_score = self._network_risk_component(
+                supplier_wins, total_tenders
+            )
     
     def _analyze_high_value(self, tender, risk_score):
         """Flag high-value tenders for additional scrutiny"""
         # Calculate median tender value for comparison
         median_value = self._get_median_tender_value()
+        if self.high_value_scope == 'category':
+            median_value = self._get_peer_median(tender.category_id, median_value)
+        elif self.high_value_scope == 'district':
+            median_value = self._get_peer_median(tender.buyer.district_id, median_value)
         
-        if tender.estimated_value > median_value * 10:
-            risk_score.high_value_flag = True
-        elif tender.estimated_value > median_value * 5:
+        if self._high_value_component(tender.estimated_value, median_value):
             risk_score.high_value_flag = True
     
     def _get_median_tender_value(self):
-        """Calculate median tender value"""
-        values = list(Tender.objects.values_list('estimated_value', flat=True))
-        if not values:
-            return 0
-        
-        values.sort()
-        n = len(values)
-        if n % 2 == 0:
-            return (values[n//2 - 1] + values[n//2]) / 2
-        else:
-            return values[n//2]
+        """Median tender value from the maintained value index"""
+        return value_index.median()
+    
+    def _get_peer_median(self, peer_key, default):
+        """Median of a tender's category or district, if the group is big enough"""
+        if value_index.count(self.high_value_scope, peer_key) < self.MIN_PEER_TENDERS:
+            return default
+        return value_index.median(self.high_value_scope, peer_key)
 
 
 class NetworkAnalyzer:
     """Analyze relationship networks between buyers and suppliers"""
     
+    # Suppliers connected to this many organizations are highly connected
+    HIGHLY_CONNECTED_DEGREE = 5
+    
+    # Pairs with this many awarded tenders are exclusive relationships
+    EXCLUSIVE_WEIGHT = 3
+    
+    # Confidence of the error bounds on estimated statistics
+    ESTIMATE_CONFIDENCE = 0.95
+    
+    # Orders of the suspicious pattern lists: worst first, or by organization id
+    PATTERN_SORTS = ('rank', 'id')
+    
+    # Entries per suspicious pattern list in a snapshot or an API page
+    PATTERN_PAGE_SIZE = 100
+    MAX_PATTERN_PAGE_SIZE = 1000
+    
+    # Neighbours kept per organization in the similarity index
+    SIMILAR_TOP_N = 20
+    
+    # Counterparties of more organizations than this are left out of shared counts:
+    # they link nearly everyone and dominate the matrix product
+    SIMILARITY_HUB_DEGREE = 500
+    
+    SIMILARITY_BATCH_SIZE = 5000
+    
     def __init__(self):
-        self.graph = nx.Graph()
+        # Organization id -> name, type and district name; empty when the graph was mapped
+        self.nodes = {}
+        self.graph = None
     
     def build_network(self):
-        """Build network graph from tender data"""
-        self.graph.clear()
-        
-        # Add nodes for organizations
-        organizations = Organization.objects.all()
-        for org in organizations:
-            self.graph.add_node(
-                org.id, 
-                name=org.name, 
-                type=org.organization_type,
-                district=org.district.name
-            )
+        """
+        Build network graph from tender data.
         
-        # Add edges for tender relationships
-        awarded_tenders = Tender.objects.filter(
-            status='awarded',
-            winner__isnull=False
-        ).select_related('buyer', 'winner')
-        
-        for tender in awarded_tenders:
-            if self.graph.has_node(tender.buyer.id) and self.graph.has_node(tender.winner.id):
-                if self.graph.has_edge(tender.buyer.id, tender.winner.id):
-                    # Increment weight
-                    self.graph[tender.buyer.id][tender.winner.id]['weight'] += 1
-                    self.graph[tender.buyer.id][tender.winner.id]['tenders'].append(tender.id)
-                else:
-                    # Add new edge
-                    self.graph.add_edge(
-                        tender.buyer.id, 
-                        tender.winner.id,
-                        weight=1,
-                        tenders=[tender.id]
-                    )
+        With NumPy, the CSR file saved with the last network snapshot is
+        memory-mapped instead while it matches the current data version, so
+        every worker shares one page-cached copy. The graph is rebuilt from
+        the edge index only when the file is stale or missing.
+        """
+        if NUMPY_AVAILABLE:
+            try:
+                store = load_graph_store()
+            except (OSError, ValueError):
+                # An unreadable file is replaced by the next snapshot rebuild
+                store = None
+            if store is not None and store.is_current(NetworkSnapshotState.current().data_version):
+                self.nodes = {}
+                self.graph = store
+                return
+        
+        # Nodes for organizations, district names joined in the same query
+        organizations = Organization.objects.order_by('id').values_list(
+            'id', 'name', 'organization_type', 'district_id', 'district__name'
+        )
+        self.nodes = {}
+        districts = []
+        for org_id, name, org_type, district_id, district in organizations:
+            self.nodes[org_id] = {'name': name, 'type': org_type, 'district': district}
+            districts.append(district_id)
+        
+        # One weighted edge per connected pair, kept current by the Tender signals
+        edges = list(NetworkEdge.objects.order_by().values_list(
+            'organization_id', 'counterparty_id', 'weight'
+        ))
+        
+        if NUMPY_AVAILABLE:
+            type_codes = {name: code for code, name in enumerate(CSRGraphStore.NODE_TYPES)}
+            self.graph = CSRGraphStore.from_edges(
+                np.array(list(self.nodes), dtype=np.int64),
+                np.array([type_codes[node['type']] for node in self.nodes.values()], dtype=np.int8),
+                np.array(districts, dtype=np.int64),
+                np.array(edges, dtype=np.int64).reshape(-1, 3),
+            )
+        else:
+            self.graph = AdjacencyGraph.from_edges(self.nodes, edges)
+    
+    def edge_tenders(self, buyer_id, supplier_id):
+        """Ids of the awarded tenders behind an edge, looked up on demand"""
+        return list(
+            Tender.objects.filter(status='awarded').filter(
+                Q(buyer_id=buyer_id, winner_id=supplier_id) |
+                Q(buyer_id=supplier_id, winner_id=buyer_id)
+            ).order_by('id').values_list('id', flat=True)
+        )
     
-    def find_suspicious_patterns(self):
-        """Find suspicious patterns in the network"""
-        self.build_network()
+    def find_suspicious_patterns(self, limit=None, min_connections=None, min_tenders=None,
+                                 sort='rank', cursors=None):
+        """Find suspicious patterns in the network
+        
+        Both lists are read from the indexed edge and degree tables, so the
+        cost follows the number of rows returned rather than the size of
+        the graph. sort='rank' puts the most connected suppliers and the
+        most frequent pairs first; sort='id' orders by organization id.
+        With a limit, each list holds at most that many entries and
+        'next_cursors' holds the cursor for the following page, passed
+        back through cursors under the same list name.
+        """
+        if sort not in self.PATTERN_SORTS:
+            raise ValueError(f'Unknown sort: {sort}')
+        cursors = cursors or {}
         
         patterns = {
             'highly_connected_suppliers': [],
             'exclusive_relationships': [],
             'cluster_analysis': {},
+            'next_cursors': {},
         }
         
         # Find highly connected suppliers
-        for node_id in self.graph.nodes():
-            node_data = self.graph.nodes[node_id]
-            if node_data['type'] in ['supplier', 'both']:
-                degree = self.graph.degree(node_id)
-                if degree >= 5:  # Connected to 5+ buyers
-                    patterns['highly_connected_suppliers'].append({
-                        'organization_id': node_id,
-                        'name': node_data['name'],
-                        'connections': degree,
-                    })
+        suppliers = NetworkNode.objects.filter(
+            degree__gte=min_connections or self.HIGHLY_CONNECTED_DEGREE,
+            organization__organization_type__in=['supplier', 'both'],
+        )
+        ordering = ('-degree', 'organization_id') if sort == 'rank' else ('organization_id',)
+        rows, patterns['next_cursors']['highly_connected_suppliers'] = self._pattern_page(
+            suppliers, ordering, limit, cursors.get('highly_connected_suppliers'),
+            'organization_id', 'organization__name', 'degree',
+        )
+        for row in rows:
+            patterns['highly_connected_suppliers'].append({
+                'organization_id': row['organization_id'],
+                'name': row['organization__name'],
+                'connections': row['degree'],
+            })
         
         # Find exclusive relationships (high weight edges)
-        for edge in self.graph.edges(data=True):
-            weight = edge[2]['weight']
-            if weight >= 3:  # 3+ tenders between same pair
-                buyer_name = self.graph.nodes[edge[0]]['name']
-                supplier_name = self.graph.nodes[edge[1]]['name']
-                patterns['exclusive_relationships'].append({
-                    'buyer_id': edge[0],
-                    'supplier_id': edge[1],
-                    'buyer_name': buyer_name,
-                    'supplier_name': supplier_name,
-                    'tender_count': weight,
-                })
+        edges = NetworkEdge.objects.filter(weight__gte=min_tenders or self.EXCLUSIVE_WEIGHT)
+        ordering = ('organization_id', 'counterparty_id')
+        if sort == 'rank':
+            ordering = ('-weight',) + ordering
+        rows, patterns['next_cursors']['exclusive_relationships'] = self._pattern_page(
+            edges, ordering, limit, cursors.get('exclusive_relationships'),
+            'organization_id', 'organization__name', 'organization__organization_type',
+            'counterparty_id', 'counterparty__name', 'counterparty__organization_type', 'weight',
+        )
+        for row in rows:
+            buyer = (row['organization_id'], row['organization__name'])
+            supplier = (row['counterparty_id'], row['counterparty__name'])
+            if row['organization__organization_type'] == 'supplier' and \
+                    row['counterparty__organization_type'] != 'supplier':
+                buyer, supplier = supplier, buyer
+            patterns['exclusive_relationships'].append({
+                'buyer_id': buyer[0],
+                'supplier_id': supplier[0],
+                'buyer_name': buyer[1],
+                'supplier_name': supplier[1],
+                'tender_count': row['weight'],
+            })
         
         return patterns
     
-    def get_network_stats(self):
-        """Get overall network statistics"""
-        if not self.graph.nodes():
+    def _pattern_page(self, queryset, ordering, limit, cursor, *fields):
+        """One page of rows in ordering, resuming after the cursor's row
+        
+        Keyset pagination: the cursor holds the ordering values of the last
+        row returned, so each page is a range scan of the ordering index.
+        Returns (rows, next cursor or None).
+        """
+        names = [field.lstrip('-') for field in ordering]
+        if cursor:
+            after = self._decode_cursor(cursor, len(ordering))
+            resume = Q()
+            for i, field in enumerate(ordering):
+                lookup = f'{names[i]}__lt' if field.startswith('-') else f'{names[i]}__gt'
+                step = Q(**{lookup: after[i]})
+                for name, value in zip(names[:i], after[:i]):
+                    step &= Q(**{name: value})
+                resume |= step
+            queryset = queryset.filter(resume)
+        
+        rows = queryset.order_by(*ordering).values(*dict.fromkeys(fields + tuple(names)))
+        if limit is None:
+            return list(rows), None
+        rows = list(rows[:limit + 1])
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1]
+        return rows[:limit], self._encode_cursor([last[name] for name in names])
+    
+    def _encode_cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+    
+    def _decode_cursor(self, cursor, length):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+        if not isinstance(values, list) or len(values) != length or \
+                not all(isinstance(value, int) for value in values):
+            raise ValueError('Invalid cursor')
+        return values
+    
+    def bipartite_projection(self, buyers, winners, side, top_n=None):
+        """Most similar organizations on one side of the buyer-supplier graph
+        
+        buyers and winners are the distinct award pairs. Similarity counts
+        shared counterparties with one sparse product; each organization
+        keeps its top_n neighbours by Jaccard, then overlap coefficient.
+        Returns arrays (organization ids, similar ids, ranks from 1,
+        shared counterparties, jaccard, overlap).
+        """
+        top_n = top_n or self.SIMILAR_TOP_N
+        members, groups = (buyers, winners) if side == 'buyer' else (winners, buyers)
+        member_ids, member_index = np.unique(members, return_inverse=True)
+        _, group_index = np.unique(groups, return_inverse=True)
+        degrees = np.bincount(member_index, minlength=len(member_ids))
+        
+        small = np.bincount(group_index)[group_index] <= self.SIMILARITY_HUB_DEGREE
+        first, second, shared = graph_algorithms.co_occurrence(
+            group_index[small], member_index[small], len(member_ids)
+        )
+        
+        # Both directions of every pair, each organization's best neighbours first
+        sources = np.concatenate([first, second])
+        targets = np.concatenate([second, first])
+        shared = np.concatenate([shared, shared])
+        jaccard = shared / (degrees[sources] + degrees[targets] - shared)
+        overlap = shared / np.minimum(degrees[sources], degrees[targets])
+        order = np.lexsort((targets, -overlap, -jaccard, sources))
+        sources, targets = sources[order], targets[order]
+        ranks = np.arange(len(sources)) - np.searchsorted(sources, sources)
+        keep = ranks < top_n
+        return (
+            member_ids[sources[keep]], member_ids[targets[keep]], ranks[keep] + 1,
+            shared[order][keep], jaccard[order][keep], overlap[order][keep],
+        )
+    
+    def refresh_similarity_index(self, top_n=None):
+        """Recompute both projections and replace the stored similarity index"""
+        if not NUMPY_AVAILABLE:
+            return {'error': 'NumPy not available. Install numpy for similarity analysis.'}
+        
+        pairs = np.array(list(
+            Tender.objects.filter(status='awarded', winner__isnull=False)
+            .order_by().values_list('buyer_id', 'winner_id').distinct()
+        ), dtype=np.int64).reshape(-1, 2)
+        
+        results = {}
+        with transaction.atomic():
+            OrganizationSimilarity.objects.all().delete()
+            for side in ('buyer', 'supplier'):
+                projection = self.bipartite_projection(pairs[:, 0], pairs[:, 1], side, top_n)
+                # bulk_create lists its input, so hand it one batch at a time
+                for start in range(0, len(projection[0]), self.SIMILARITY_BATCH_SIZE):
+                    batch = (column[start:start + self.SIMILARITY_BATCH_SIZE].tolist() for column in projection)
+                    OrganizationSimilarity.objects.bulk_create([
+                        OrganizationSimilarity(
+                            organization_id=org_id, similar_id=similar_id, projection=side, rank=rank,
+                            shared=shared, jaccard=jaccard, overlap=overlap,
+                        )
+                        for org_id, similar_id, rank, shared, jaccard, overlap in zip(*batch)
+                    ])
+                results[side] = len(projection[0])
+        return results
+    
+    def get_network_stats(self, exact=None):
+        """Get overall network statistics
+        
+        Clustering and triangles are exact for graphs up to
+        NETWORK_STATS_APPROXIMATE_ABOVE organizations and estimated from
+        sampled wedges above it, with the error bounds under
+        'approximation'. exact=True or False forces either mode.
+        """
+        if self.graph is None:
             self.build_network()
         
         stats = {
-            'total_nodes': self.graph.number_of_nodes(),
-            'total_edges': self.graph.number_of_edges(),
-            'density': nx.density(self.graph),
-            'connected_components': nx.number_connected_components(self.graph),
+            'total_nodes': self.graph.number_of_nodes,
+            'total_edges': self.graph.number_of_edges,
+            'density': graph_algorithms.density(self.graph),
+            'connected_components': graph_algorithms.connected_components(self.graph),
         }
         
+        if exact is None:
+            exact = stats['total_nodes'] <= settings.NETWORK_STATS_APPROXIMATE_ABOVE
+        stats['exact'] = exact
+        
         if stats['total_nodes'] > 0:
-            # Average clustering coefficient
-            stats['avg_clustering'] = nx.average_clustering(self.graph)
+            if exact:
+                # Average clustering coefficient
+                stats['avg_clustering'] = graph_algorithms.average_clustering(self.graph)
+                stats['triangles'] = graph_algorithms.triangle_count(self.graph)
+            else:
+                stats.update(self._estimate_triangles())
             
-            # Most connected organizations
-            degrees = dict(self.graph.degree())
-            if degrees:
-                max_degree_node = max(degrees, key=degrees.get)
-                stats['most_connected'] = {
-                    'organization_id': max_degree_node,
-                    'name': self.graph.nodes[max_degree_node]['name'],
-                    'connections': degrees[max_degree_node],
-                }
+            stats['degree_percentiles'] = graph_algorithms.degree_percentiles(self.graph)
+            
+            # Most connected organization, the lowest id on ties
+            max_degree_node, max_degree = max(
+                self.graph.degree_items(), key=lambda item: (item[1], -item[0])
+            )
+            stats['most_connected'] = {
+                'organization_id': max_degree_node,
+                'name': self._node_name(max_degree_node),
+                'connections': max_degree,
+            }
         
         return stats
-
-
-class DataImporter:
-    """Import and process procurement data"""
     
-    def import_from_csv(self, csv_file_path):
-        """Import tender data from CSV file"""
-        if not PANDAS_AVAILABLE:
-            return {'success': False, 'error': 'Pandas not available. Install pandas for CSV import functionality.'}
+    def _node_name(self, org_id):
+        if org_id in self.nodes:
+            return self.nodes[org_id]['name']
+        return Organization.objects.filter(pk=org_id).values_list('name', flat=True).first()
+    
+    def _estimate_triangles(self):
+        """Sampled clustering and triangle estimates, sharing the time budget"""
+        confidence = self.ESTIMATE_CONFIDENCE
+        error = settings.NETWORK_STATS_ERROR
+        budget = settings.NETWORK_STATS_TIME_BUDGET / 2
         
-        try:
-            df = pd.read_csv(csv_file_path)
-            return self._process_dataframe(df)
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
-    
-    def import_from_dataframe(self, df):
-        """Import tender data from pandas DataFrame"""
-        return self._process_dataframe(df)
-    
-    def _process_dataframe(self, df):
-        """Process DataFrame and create database records"""
-        results = {
-            'success': True,
-            'imported_tenders': 0,
-            'imported_organizations': 0,
-            'imported_bids': 0,
-            'errors': [],
+        clustering, clustering_samples, clustering_error = graph_algorithms.estimate_clustering(
+            self.graph, error, confidence, budget
+        )
+        _, triangles, triangle_samples, _, triangles_error = graph_algorithms.estimate_triangles(
+            self.graph, error, confidence, budget
+        )
+        return {
+            'avg_clustering': clustering,
+            'triangles': round(triangles),
+            'approximation': {
+                'method': 'wedge_sampling',
+                'confidence': confidence,
+                'avg_clustering': {'samples': clustering_samples, 'error': clustering_error},
+                'triangles': {'samples': triangle_samples, 'error': round(triangles_error)},
+            },
         }
-        
-        try:
-            # Process organizations first
-            self._import_organizations(df, results)
-            
-            # Then process tenders
-            self._import_tenders(df, results)
-            
-            # Finally process bids
-            self._import_bids(df, results)
-            
-        except Exception as e:
-            results['success'] = False
-            results['errors'].append(str(e))
-        
-        return results
-    
-    def _import_organizations(self, df, results):
-        """Import organizations from DataFrame"""
-        # This is a simplified version - in practice, you'd need more sophisticated
-        # organization matching and deduplication
-        pass
-    
-    def _import_tenders(self, df, results):
-        """Import tenders from DataFrame"""
-        # This is a simplified version - you'd implement the actual CSV parsing
-        # and tender creation logic here
-        pass
-    
-    def _import_bids(self, df, results):
-        """Import bids from DataFrame"""
-        # This is a simplified version - you'd implement the actual bid
-        # import logic here
-        pass
+
@@ -0,0 +1,132 @@
+"""
+Declarative definitions of the RiskAnalyzer rules
+Each rule is one threshold ladder, evaluated in Python, NumPy or SQL
+"""
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+import operator
+from datetime import timedelta
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+
+OPERATORS = {
+    'lt': operator.lt,
+    'lte': operator.le,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'exact': operator.eq,
+}
+
+
+class ThresholdRule:
+    """Ordered (operator, threshold, score, flag) steps over one input value
+
+    The first matching step decides the score and flag. When no step
+    matches, or the input is missing, the rule scores 0 without a flag.
+    Thresholds can be scaled by a reference value (e.g. the median) at
+    evaluation time.
+    """
+
+    def __init__(self, name, steps, sql_threshold=None):
+        self.name = name
+        self.steps = steps
+        # Converts a threshold into the SQL input's units (e.g. days to a timedelta)
+        self.sql_threshold = sql_threshold
+
+    def evaluate(self, value, scale=None):
+        """Return (flag, score) for one Python value"""
+        if value is None:
+            return False, 0
+        for op, threshold, score, flag in self.steps:
+            if scale is not None:
+                threshold = threshold * scale
+            if OPERATORS[op](value, threshold):
+                return flag, score
+        return False, 0
+
+    def evaluate_array(self, values, scale=None):
+        """Return (flags, scores) arrays for a NumPy column"""
+        conditions = []
+        for op, threshold, score, flag in self.steps:
+            if scale is not None:
+                threshold = threshold * scale
+            conditions.append(OPERATORS[op](values, threshold))
+        flags = np.select(conditions, [flag for _, _, _, flag in self.steps], default=False)
+        scores = np.select(conditions, [score for _, _, score, _ in self.steps], default=0)
+        return flags.astype(bool), scores
+
+    def score_expression(self, field, scale=None):
+        """SQL CASE computing the rule's score from an annotated field"""
+        return Case(
+            *[
+                When(self._condition(field, op, threshold, scale), then=Value(score))
+                for op, threshold, score, _ in self.steps
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    def flag_expression(self, field, scale=None):
+        """SQL CASE computing the rule's flag from an annotated field"""
+        return Case(
+            *[
+                When(self._condition(field, op, threshold, scale), then=Value(flag))
+                for op, threshold, _, flag in self.steps
+            ],
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+
+    def _condition(self, field, op, threshold, scale):
+        if scale is not None:
+            threshold = scale * threshold
+        elif self.sql_threshold:
+            threshold = self.sql_threshold(threshold)
+        return Q(**{f'{field}__{op}': threshold})
+
+
+# Tenders with 1-3 bids; no recorded bids but a winner counts as one bid
+SINGLE_BID_RULE = ThresholdRule('single_bid', [
+    ('exact', 1, 100, True),
+    ('exact', 2, 60, False),   # Two bids is still suspicious
+    ('exact', 3, 30, False),   # Three bids, moderate risk
+])
+
+# Days between publication and submission deadline
+SHORT_WINDOW_RULE = ThresholdRule('short_window', [
+    ('lt', 3, 100, True),
+    ('lt', 7, 80, True),
+    ('lt', 14, 40, False),
+    ('lt', 21, 20, False),
+], sql_threshold=lambda days: timedelta(days=days))
+
+# Other awarded tenders between the same buyer and winner
+REPEATED_PAIR_RULE = ThresholdRule('repeated_pair', [
+    ('gte', 5, 100, True),
+    ('gte', 3, 80, True),
+    ('gte', 2, 60, False),
+    ('exact', 1, 30, False),
+])
+
+# Winner's share of all awarded tenders
+NETWORK_RISK_RULE = ThresholdRule('network_risk', [
+    ('gt', 0.2, 100, False),   # Wins more than 20% of all tenders
+    ('gt', 0.1, 60, False),    # Wins more than 10%
+    ('gt', 0.05, 30, False),   # Wins more than 5%
+])
+
+# Estimated value against the median, scaled at evaluation time
+HIGH_VALUE_RULE = ThresholdRule('high_value', [
+    ('gt', 5, 0, True),        # Anything above 5x the median (10x included)
+])
+
+RISK_RULES = {
+    rule.name: rule
+    for rule in (
+        SINGLE_BID_RULE, SHORT_WINDOW_RULE, REPEATED_PAIR_RULE,
+        NETWORK_RISK_RULE, HIGH_VALUE_RULE,
+    )
+}
@@ -0,0 +1,141 @@
+"""
+Vectorized scoring kernel for the RiskAnalyzer rules
+Applies every threshold ladder to whole columns of tenders at once
+"""
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from .profiling import RunProfiler
+from .rules import (
+    SINGLE_BID_RULE, SHORT_WINDOW_RULE, REPEATED_PAIR_RULE, NETWORK_RISK_RULE, HIGH_VALUE_RULE
+)
+
+
+class VectorizedScorer:
+    """Columnar evaluation of the RiskAnalyzer rule definitions
+
+    RiskAnalyzer.analyze_tender remains the reference implementation; the
+    kernel must produce identical flags and scores for the same inputs.
+    """
+
+    # Risk level boundaries, mirroring RiskScore.level_for_score
+    RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+    RISK_LEVEL_BINS = (30, 60, 80)
+
+    def __init__(self, risk_weights, profiler=None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError('NumPy not available. Install numpy for vectorized scoring.')
+        self.risk_weights = risk_weights
+        self.profiler = profiler or RunProfiler(enabled=False)
+
+    def load_columns(self, rows, context):
+        """Turn tender rows from RiskAnalyzer._load_tender_rows into arrays"""
+        n = len(rows)
+        supplier_wins = context['supplier_wins']
+
+        columns = {
+            'tender_id': np.fromiter((row['id'] for row in rows), dtype=np.int64, count=n),
+            'bid_count': np.fromiter((row['bid_count'] for row in rows), dtype=np.int64, count=n),
+            'has_winner': np.fromiter(
+                (row['winner_id'] is not None for row in rows), dtype=bool, count=n
+            ),
+            # The pair count includes the tender itself when it is awarded
+            'repeated_count': np.fromiter(
+                (row['pair_count'] - (row['status'] == 'awarded') for row in rows),
+                dtype=np.int64, count=n,
+            ),
+            'supplier_wins': np.fromiter(
+                (supplier_wins.get(row['winner_id'], 0) for row in rows), dtype=np.int64, count=n
+            ),
+            # Values are kept in integer cents so comparisons stay exact
+            'value_cents': np.fromiter(
+                (int(row['estimated_value'] * 100) for row in rows), dtype=np.int64, count=n
+            ),
+            # Twice the (global or peer) median in cents, so even-sized medians stay integral
+            'median_cents_x2': np.fromiter(
+                (int(row['median_value'] * 200) for row in rows), dtype=np.int64, count=n
+            ),
+        }
+
+        window_days = np.zeros(n, dtype=np.int64)
+        has_window = np.zeros(n, dtype=bool)
+        for i, row in enumerate(rows):
+            if row['submission_deadline'] and row['publication_date']:
+                window_days[i] = (row['submission_deadline'] - row['publication_date']).days
+                has_window[i] = True
+        columns['window_days'] = window_days
+        columns['has_window'] = has_window
+
+        columns['total_awarded'] = context['total_awarded']
+        return columns
+
+    def score(self, columns):
+        """Score every tender in the columns, returning one array per field"""
+        result = {'tender_id': columns['tender_id']}
+        measure = self.profiler.measure
+
+        with measure('rule.single_bid', sql=False):
+            result['single_bid_flag'], result['single_bid_score'] = self._single_bid(
+                columns['bid_count'], columns['has_winner']
+            )
+        with measure('rule.short_window', sql=False):
+            result['short_window_flag'], result['short_window_score'] = self._short_window(
+                columns['window_days'], columns['has_window']
+            )
+        with measure('rule.repeated_pair', sql=False):
+            result['repeated_pair_flag'], result['repeated_pair_score'] = self._repeated_pair(
+                columns['repeated_count'], columns['has_winner']
+            )
+        with measure('rule.network_risk', sql=False):
+            result['network_risk_score'] = self._network_risk(
+                columns['supplier_wins'], columns['total_awarded'], columns['has_winner']
+            )
+        with measure('rule.high_value', sql=False):
+            # value > median * 5, compared as 2 * value > (2 * median) * 5
+            result['high_value_flag'], _ = HIGH_VALUE_RULE.evaluate_array(
+                columns['value_cents'] * 2, scale=columns['median_cents_x2']
+            )
+
+        total = (
+            result['single_bid_score'] * self.risk_weights['single_bid'] // 100 +
+            result['short_window_score'] * self.risk_weights['short_window'] // 100 +
+            result['repeated_pair_score'] * self.risk_weights['repeated_pair'] // 100 +
+            result['network_risk_score'] * self.risk_weights['network_risk'] // 100
+        )
+        result['total_risk_score'] = np.clip(total, 0, 100)
+        result['risk_level'] = np.asarray(self.RISK_LEVELS)[
+            np.digitize(result['total_risk_score'], self.RISK_LEVEL_BINS)
+        ]
+        return result
+
+    def to_scores(self, result, score_fields):
+        """Convert kernel output into the score dicts RiskAnalyzer writes"""
+        fields = ('tender_id',) + tuple(score_fields)
+        columns = [result[field].tolist() for field in fields]
+        return [dict(zip(fields, values)) for values in zip(*columns)]
+
+    def _single_bid(self, bid_count, has_winner):
+        """Single-bid rule: no recorded bids with a winner counts as one bid"""
+        effective_bids = np.where((bid_count == 0) & has_winner, 1, bid_count)
+        return SINGLE_BID_RULE.evaluate_array(effective_bids)
+
+    def _short_window(self, window_days, has_window):
+        """Short-window rule, skipped for tenders without a window"""
+        flag, score = SHORT_WINDOW_RULE.evaluate_array(window_days)
+        return flag & has_window, np.where(has_window, score, 0)
+
+    def _repeated_pair(self, repeated_count, has_winner):
+        """Repeated-pair rule, only for tenders with a winner"""
+        flag, score = REPEATED_PAIR_RULE.evaluate_array(repeated_count)
+        return flag & has_winner, np.where(has_winner, score, 0)
+
+    def _network_risk(self, supplier_wins, total_awarded, has_winner):
+        """Network rule over the winner's share of all awards"""
+        if total_awarded <= 0:
+            return np.zeros(len(supplier_wins), dtype=np.int64)
+
+        _, score = NETWORK_RISK_RULE.evaluate_array(supplier_wins / total_awarded)
+        return np.where(has_winner, score, 0)
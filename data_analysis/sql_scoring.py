@@ -0,0 +1,175 @@
+"""
+Database-side risk scoring
+Compiles the rule definitions into one annotated queryset and refreshes
+RiskScore with a single INSERT ... SELECT upsert
+"""
+from django.db import connection, transaction
+from django.db.models import (
+    Case, Count, DecimalField, DurationField, ExpressionWrapper, F, FloatField,
+    IntegerField, OuterRef, Q, Subquery, Value, When, CharField,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest, Least
+from django.utils import timezone
+from dashboard.models import Tender, TenderBid, RiskScore
+from .rules import (
+    SINGLE_BID_RULE, SHORT_WINDOW_RULE, REPEATED_PAIR_RULE, NETWORK_RISK_RULE, HIGH_VALUE_RULE
+)
+
+# Backends whose INSERT ... ON CONFLICT DO UPDATE syntax we emit
+UPSERT_VENDORS = ('sqlite', 'postgresql')
+
+
+class DatabaseRiskScorer:
+    """Score tenders entirely in SQL from the shared rule definitions"""
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+
+    @classmethod
+    def is_supported(cls):
+        return connection.vendor in UPSERT_VENDORS
+
+    def scored_queryset(self, tenders, context):
+        """Annotate tenders with every component score, total and risk level"""
+        awarded = Tender.objects.filter(status='awarded').order_by()
+
+        tenders = tenders.order_by().annotate(
+            bid_count=Coalesce(Subquery(
+                TenderBid.objects.filter(tender=OuterRef('pk')).order_by()
+                .values('tender').annotate(bids=Count('id')).values('bids')
+            ), 0),
+            repeated_count=Coalesce(Subquery(
+                awarded.filter(buyer=OuterRef('buyer'), winner=OuterRef('winner'))
+                .exclude(pk=OuterRef('pk'))
+                .values('buyer').annotate(pairs=Count('id')).values('pairs')
+            ), 0),
+            supplier_wins=Coalesce(Subquery(
+                awarded.filter(winner=OuterRef('winner'))
+                .values('winner').annotate(wins=Count('id')).values('wins')
+            ), 0),
+            window_length=ExpressionWrapper(
+                F('submission_deadline') - F('publication_date'),
+                output_field=DurationField(),
+            ),
+            high_value_median=self._median_expression(context),
+        ).annotate(
+            # No bids recorded, but if there's a winner, assume single bid
+            effective_bids=Case(
+                When(bid_count=0, winner__isnull=False, then=Value(1)),
+                default=F('bid_count'),
+                output_field=IntegerField(),
+            ),
+            win_rate=self._win_rate_expression(context),
+        )
+
+        has_winner = Q(winner__isnull=False)
+        tenders = tenders.annotate(
+            single_bid_flag=SINGLE_BID_RULE.flag_expression('effective_bids'),
+            single_bid_score=SINGLE_BID_RULE.score_expression('effective_bids'),
+            short_window_flag=SHORT_WINDOW_RULE.flag_expression('window_length'),
+            short_window_score=SHORT_WINDOW_RULE.score_expression('window_length'),
+            repeated_pair_flag=self._gated(
+                REPEATED_PAIR_RULE.flag_expression('repeated_count'), has_winner, False
+            ),
+            repeated_pair_score=self._gated(
+                REPEATED_PAIR_RULE.score_expression('repeated_count'), has_winner, 0
+            ),
+            network_risk_score=self._gated(
+                NETWORK_RISK_RULE.score_expression('win_rate'),
+                has_winner & Q(win_rate__isnull=False),
+                0,
+            ),
+            high_value_flag=HIGH_VALUE_RULE.flag_expression(
+                'estimated_value', scale=F('high_value_median')
+            ),
+        )
+
+        weights = self.analyzer.risk_weights
+        weighted = (
+            F('single_bid_score') * Value(weights['single_bid']) / Value(100) +
+            F('short_window_score') * Value(weights['short_window']) / Value(100) +
+            F('repeated_pair_score') * Value(weights['repeated_pair']) / Value(100) +
+            F('network_risk_score') * Value(weights['network_risk']) / Value(100)
+        )
+        tenders = tenders.annotate(
+            total_risk_score=Least(
+                Greatest(ExpressionWrapper(weighted, output_field=IntegerField()), Value(0)),
+                Value(100),
+            ),
+        )
+        return tenders.annotate(
+            risk_level=Case(
+                When(total_risk_score__gte=80, then=Value('critical')),
+                When(total_risk_score__gte=60, then=Value('high')),
+                When(total_risk_score__gte=30, then=Value('medium')),
+                default=Value('low'),
+                output_field=CharField(),
+            ),
+        )
+
+    def refresh(self, tenders, context):
+        """Upsert RiskScore rows for tenders with one INSERT ... SELECT"""
+        fields = self.analyzer.SCORE_FIELDS
+        select_sql, select_params = self.scored_queryset(tenders, context).values_list(
+            'id', *fields
+        ).query.sql_with_params()
+
+        qn = connection.ops.quote_name
+        score_columns = [qn(field) for field in fields]
+        stamp_columns = [qn('analysis_date'), qn('updated_at')]
+        insert_columns = [qn('tender_id')] + score_columns + stamp_columns + [
+            qn('analysis_version'), qn('created_at')
+        ]
+        updates = ', '.join(
+            f'{column} = EXCLUDED.{column}' for column in score_columns + stamp_columns
+        )
+
+        # Select by name: Django does not keep values_list order in the SQL
+        selected = ', '.join(f'scored.{column}' for column in [qn('id')] + score_columns)
+
+        # WHERE 1 = 1 keeps SQLite from reading ON CONFLICT as a join constraint
+        sql = (
+            f'INSERT INTO {qn(RiskScore._meta.db_table)} ({", ".join(insert_columns)}) '
+            f'SELECT {selected}, %s, %s, %s, %s FROM ({select_sql}) scored WHERE 1 = 1 '
+            f'ON CONFLICT ({qn("tender_id")}) DO UPDATE SET {updates}'
+        )
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        params = [now, now, '1.0', now] + list(select_params)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def _median_expression(self, context):
+        """Per-row median for the high-value rule, global or by peer group"""
+        decimal = DecimalField(max_digits=18, decimal_places=3)
+        default = Value(context['median_value'], output_field=decimal)
+        if not context['peer_medians']:
+            return default
+
+        field = self.analyzer.PEER_FIELDS[self.analyzer.high_value_scope]
+        return Case(
+            *[
+                When(**{field: key, 'then': Value(median_value, output_field=decimal)})
+                for key, median_value in context['peer_medians'].items()
+            ],
+            default=default,
+            output_field=decimal,
+        )
+
+    def _win_rate_expression(self, context):
+        """Winner's share of all awards, NULL when nothing is awarded"""
+        if context['total_awarded'] <= 0:
+            return Value(None, output_field=FloatField())
+        return ExpressionWrapper(
+            Cast('supplier_wins', FloatField()) / Value(float(context['total_awarded'])),
+            output_field=FloatField(),
+        )
+
+    def _gated(self, expression, condition, otherwise):
+        """Only apply a rule where condition holds"""
+        return Case(
+            When(condition, then=expression),
+            default=Value(otherwise),
+            output_field=expression.output_field,
+        )
@@ -0,0 +1,764 @@
+"""
+Tests for the risk analysis engine, the network statistics and the importers
+"""
+try:
+    import networkx as nx
+    NETWORKX_AVAILABLE = True
+except ImportError:
+    NETWORKX_AVAILABLE = False
+
+import csv
+import gzip
+import json
+import os
+import random
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from dashboard.models import (
+    District, NetworkEdge, NetworkNode, NetworkSnapshotState, Organization, OrganizationMerge,
+    RiskAnalysisCheckpoint, RiskBaseline, RiskChange, RiskScore, Tender, TenderBid,
+)
+from .benchmarks import SyntheticDataset
+from .cobidding import CoBiddingAnalyzer
+from .entity_resolution import OrganizationResolver
+from . import graph_algorithms
+from .graph_algorithms import AdjacencyGraph
+from .graph_store import CSRGraphStore
+from .importer import DataImporter
+from .network_index import network_index
+from .ocds import OCDSImporter
+from .parallel import ShardedRiskRunner
+from .risk_analyzer import RiskAnalyzer
+from .scoring_kernel import NUMPY_AVAILABLE
+from .value_index import TenderValueIndex
+
+
+class ScoringParityTests(TestCase):
+    """The batch and vectorized paths must score exactly like analyze_tender"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataset(400, seed=7).generate()
+
+    def reference_scores(self, analyzer):
+        """Scores from the per-tender reference implementation, by tender id"""
+        for tender in Tender.objects.order_by('id'):
+            analyzer.analyze_tender(tender)
+        return {
+            row['tender_id']: row
+            for row in RiskScore.objects.values('tender_id', *RiskAnalyzer.SCORE_FIELDS)
+        }
+
+    def assert_same_scores(self, scores, expected):
+        self.assertEqual(len(scores), len(expected))
+        for score in scores:
+            self.assertEqual(score, expected[score['tender_id']], f'tender {score["tender_id"]}')
+
+    def check_scope(self, high_value_scope, vectorized):
+        analyzer = RiskAnalyzer(high_value_scope=high_value_scope)
+        expected = self.reference_scores(analyzer)
+        scores = analyzer.score_tenders(Tender.objects.all(), analyzer.load_context(), vectorized)
+        self.assert_same_scores(
+            [{'tender_id': score['tender_id'], **{f: score[f] for f in RiskAnalyzer.SCORE_FIELDS}}
+             for score in scores],
+            expected,
+        )
+
+    def test_batch_matches_analyze_tender(self):
+        for scope in ('global', 'category', 'district'):
+            with self.subTest(scope=scope):
+                self.check_scope(scope, vectorized=False)
+
+    @skipUnless(NUMPY_AVAILABLE, 'NumPy not available')
+    def test_vectorized_matches_analyze_tender(self):
+        for scope in ('global', 'category', 'district'):
+            with self.subTest(scope=scope):
+                self.check_scope(scope, vectorized=True)
+
+    def test_batch_run_writes_reference_scores(self):
+        analyzer = RiskAnalyzer()
+        expected = self.reference_scores(analyzer)
+        RiskScore.objects.all().delete()
+        results = analyzer.analyze_all_tenders(batch=True)
+        self.assertEqual(results['total_analyzed'], len(expected))
+        self.assert_same_scores(
+            list(RiskScore.objects.values('tender_id', *RiskAnalyzer.SCORE_FIELDS)), expected
+        )
+
+    def check_full_run(self, analyzer, run):
+        """A full run must write the reference scores and record the baseline"""
+        expected = self.reference_scores(analyzer)
+        RiskScore.objects.all().delete()
+        RiskBaseline.objects.all().delete()
+        RiskChange.objects.create(tender_id=Tender.objects.first().pk)
+        results = run()
+        self.assertEqual(results['total_analyzed'], len(expected))
+        self.assert_same_scores(
+            list(RiskScore.objects.values('tender_id', *RiskAnalyzer.SCORE_FIELDS)), expected
+        )
+        self.assertFalse(RiskChange.objects.exists())
+        self.assertEqual(
+            RiskBaseline.objects.get().total_awarded,
+            Tender.objects.filter(status='awarded').count(),
+        )
+        return results
+
+    def test_sharded_run_writes_reference_scores_and_baseline(self):
+        runner = ShardedRiskRunner()
+        results = self.check_full_run(runner.analyzer, lambda: runner.run(shard_count=3))
+        self.assertEqual(len(results['shards']), 3)
+
+    def test_streaming_run_writes_reference_scores_and_baseline(self):
+        analyzer = RiskAnalyzer()
+        self.check_full_run(
+            analyzer, lambda: analyzer.analyze_tenders_streaming(chunk_size=70, checkpoint='test')
+        )
+        self.assertFalse(RiskAnalysisCheckpoint.objects.exists())
+
+    def test_resumed_streaming_run_keeps_its_change_id(self):
+        analyzer = RiskAnalyzer()
+        before = RiskChange.objects.create(tender_id=Tender.objects.first().pk)
+        RiskAnalysisCheckpoint.objects.create(
+            name='test', last_tender_id=Tender.objects.order_by('id')[100].id,
+            last_change_id=before.pk,
+        )
+        # Recorded after the interrupted run started, so left for the next run
+        after = RiskChange.objects.create(tender_id=Tender.objects.first().pk)
+        analyzer.analyze_tenders_streaming(checkpoint='test')
+        self.assertEqual(list(RiskChange.objects.values_list('id', flat=True)), [after.pk])
+
+    def test_in_database_run_writes_reference_scores_and_baseline(self):
+        for scope in ('global', 'category', 'district'):
+            with self.subTest(scope=scope):
+                analyzer = RiskAnalyzer(high_value_scope=scope)
+                self.check_full_run(analyzer, analyzer.analyze_tenders_in_database)
+    def test_incremental_run_matches_full_run(self):
+        analyzer = RiskAnalyzer()
+        analyzer.analyze_changed_tenders()
+        suppliers = list(Organization.objects.filter(organization_type='supplier').order_by('id'))
+        tenders = list(Tender.objects.order_by('id')[:30])
+        # Award moves, edits of tender-local inputs, bids and deletions, through the signals
+        for tender, supplier in zip(tenders[:8], suppliers):
+            tender.status, tender.winner = 'awarded', supplier
+            tender.save()
+        for tender in tenders[8:14]:
+            tender.submission_deadline = tender.publication_date + timedelta(days=3)
+            tender.save()
+        for bid in TenderBid.objects.filter(tender__in=tenders[14:]).order_by('id')[:4]:
+            bid.delete()
+        for tender in tenders[18:21]:
+            tender.delete()
+        Tender.objects.filter(winner__isnull=False).last().winner.delete()
+
+        results = analyzer.analyze_changed_tenders()
+        self.assertFalse(results['full_rescore'])
+        self.assertLess(results['total_analyzed'], Tender.objects.count())
+        scores = analyzer.score_tenders(Tender.objects.all(), analyzer.load_context())
+        self.assert_same_scores(
+            list(RiskScore.objects.values('tender_id', *RiskAnalyzer.SCORE_FIELDS)),
+            {score['tender_id']: {'tender_id': score['tender_id'],
+                                  **{f: score[f] for f in RiskAnalyzer.SCORE_FIELDS}}
+             for score in scores},
+        )
+
+
+class ValueIndexTests(TestCase):
+    """An index built in another process must notice changes it wasn't told about"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataset(300, seed=3).generate()
+
+    def setUp(self):
+        # A separate instance gets no signals, like the index in another process
+        self.index = TenderValueIndex()
+        self.index.rebuild()
+
+    def assert_matches_database(self):
+        self.index.ensure_current(force=True)
+        analyzer = RiskAnalyzer(high_value_scope='district')
+        self.assertEqual(self.index.median(), analyzer._query_median(Tender.objects.all()))
+        self.assertEqual(
+            self.index.medians('district', analyzer.MIN_PEER_TENDERS),
+            analyzer._query_peer_medians(),
+        )
+
+    def test_saved_district_move_triggers_rebuild(self):
+        buyer = Organization.objects.filter(bought_tenders__isnull=False).first()
+        buyer.district = District.objects.exclude(pk=buyer.district_id).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            buyer.save()
+        self.assert_matches_database()
+
+    def test_invalidated_queryset_update_triggers_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Tender.objects.filter(id__lte=Tender.objects.order_by('id')[50].id).update(
+                estimated_value=1
+            )
+            NetworkSnapshotState.invalidate()
+        self.assert_matches_database()
+
+
+class NetworkIndexTests(TestCase):
+    """Edges kept current award by award must equal a full rebuild"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataset(300, seed=5).generate()
+
+    def stored_index(self):
+        return (
+            set(NetworkEdge.objects.values_list('organization_id', 'counterparty_id', 'weight')),
+            set(NetworkNode.objects.values_list('organization_id', 'degree')),
+        )
+
+    def assert_matches_rebuild(self):
+        maintained = self.stored_index()
+        network_index.rebuild()
+        self.assertEqual(maintained, self.stored_index())
+
+    def awarded(self):
+        return Tender.objects.filter(status='awarded', winner__isnull=False).order_by('id')
+
+    def test_signals_match_rebuild(self):
+        suppliers = list(Organization.objects.filter(organization_type='supplier').order_by('id'))
+        tenders = list(self.awarded()[:40])
+        for tender, supplier in zip(tenders[:10], suppliers):
+            tender.winner = supplier
+            tender.save()
+        for tender in tenders[10:15]:
+            tender.status = 'cancelled'
+            tender.save()
+        for tender in tenders[15:20]:
+            tender.delete()
+        # An organization that awards a tender to itself is a self-loop
+        tenders[20].winner_id = tenders[20].buyer_id
+        tenders[20].save()
+        tenders[21].winner.delete()
+        published = Tender.objects.filter(status='published').first()
+        published.status, published.winner = 'awarded', suppliers[-1]
+        published.save()
+        self.assert_matches_rebuild()
+
+    def test_refresh_matches_rebuild(self):
+        suppliers = Organization.objects.filter(organization_type='supplier').order_by('-id')
+        changed = list(self.awarded().values_list('id', 'buyer_id', 'winner_id')[:60])
+        pairs = {(buyer_id, winner_id) for _, buyer_id, winner_id in changed}
+        # Set-based writes like the importer's, which skip the signals
+        for (tender_id, buyer_id, _), supplier in zip(changed[:30], suppliers):
+            Tender.objects.filter(id=tender_id).update(winner=supplier)
+            pairs.add((buyer_id, supplier.id))
+        Tender.objects.filter(id__in=[tender_id for tender_id, _, _ in changed[30:]]).update(
+            status='closed'
+        )
+        network_index.refresh(pairs)
+        self.assert_matches_rebuild()
+
+
+@skipUnless(NETWORKX_AVAILABLE, 'NetworkX not available')
+class GraphAlgorithmTests(SimpleTestCase):
+    """Both graph representations must give NetworkX's statistics"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(11)
+        # Isolated nodes, repeated and reversed pairs, and a few self-loops
+        cls.node_ids = list(range(1, 301))
+        cls.pairs = [(rng.randint(1, 250), rng.randint(1, 250), rng.randint(1, 3)) for _ in range(600)]
+        cls.pairs += [(node, node, 1) for node in rng.sample(cls.node_ids, 5)]
+        cls.expected = nx.Graph()
+        cls.expected.add_nodes_from(cls.node_ids)
+        cls.expected.add_edges_from((buyer_id, winner_id) for buyer_id, winner_id, _ in cls.pairs)
+
+    def graphs(self):
+        yield 'adjacency', AdjacencyGraph.from_edges(self.node_ids, self.pairs)
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            n = len(self.node_ids)
+            yield 'csr', CSRGraphStore.from_edges(
+                np.array(self.node_ids), np.zeros(n, dtype=np.int8), np.zeros(n, dtype=np.int64),
+                np.array(self.pairs),
+            )
+
+    def test_statistics_match_networkx(self):
+        expected = self.expected
+        self.assertGreater(sum(nx.triangles(expected).values()), 0)
+        for name, graph in self.graphs():
+            with self.subTest(graph=name):
+                self.assertEqual(graph.number_of_nodes, expected.number_of_nodes())
+                self.assertEqual(graph.number_of_edges, expected.number_of_edges())
+                self.assertEqual(
+                    dict(graph.degree_items()), {node: degree for node, degree in expected.degree()}
+                )
+                self.assertAlmostEqual(graph_algorithms.density(graph), nx.density(expected))
+                self.assertEqual(
+                    graph_algorithms.connected_components(graph),
+                    nx.number_connected_components(expected),
+                )
+                self.assertEqual(
+                    graph_algorithms.triangle_count(graph), sum(nx.triangles(expected).values()) // 3
+                )
+                self.assertAlmostEqual(
+                    graph_algorithms.average_clustering(graph), nx.average_clustering(expected)
+                )
+
+    def test_estimates_are_within_their_error_bounds(self):
+        clustering = nx.average_clustering(self.expected)
+        transitivity = nx.transitivity(self.expected)
+        for name, graph in self.graphs():
+            with self.subTest(graph=name):
+                estimate, _, bound = graph_algorithms.estimate_clustering(graph, error=0.02, seed=1)
+                self.assertLessEqual(abs(estimate - clustering), bound)
+                estimate, _, _, bound, _ = graph_algorithms.estimate_triangles(graph, error=0.02, seed=1)
+                self.assertLessEqual(abs(estimate - transitivity), bound)
+
+
+# Columns of an import file; every test row fills the ones it needs
+CSV_COLUMNS = (
+    'tender_id', 'title', 'description', 'category', 'buyer', 'buyer_district', 'estimated_value',
+    'award_amount', 'currency', 'publication_date', 'submission_deadline', 'opening_date',
+    'award_date', 'status', 'winner', 'bidder', 'bidder_district', 'bid_amount',
+    'bid_submission_date', 'is_winner', 'technical_score', 'financial_score',
+)
+
+
+def tender_rows(tender_id, bidders, winner=None, **values):
+    """Bid rows of one tender, with plausible tender columns repeated on each"""
+    rows = []
+    for position, bidder in enumerate(bidders):
+        row = {
+            'tender_id': tender_id,
+            'title': f'Tender {tender_id}',
+            'category': 'Infrastructure',
+            'buyer': 'Roads Department',
+            'buyer_district': 'Dhaka',
+            'estimated_value': '1000000',
+            'publication_date': '2024-01-01',
+            'submission_deadline': '2024-01-15',
+            'opening_date': '2024-01-16',
+            'status': 'awarded' if winner else 'published',
+            'winner': winner or '',
+            'bidder': bidder,
+            'bidder_district': 'Dhaka',
+            'bid_amount': str(900000 + position * 10000),
+            'is_winner': 'true' if bidder == winner else 'false',
+        }
+        row.update(values)
+        rows.append(row)
+    return rows
+
+
+class ImportTestCase(TestCase):
+    """Imports CSV rows written to a temporary file"""
+
+    @classmethod
+    def setUpTestData(cls):
+        District.objects.create(name='Dhaka', division='Dhaka', code='DHK')
+        District.objects.create(name='Sylhet', division='Sylhet', code='SYL')
+
+    def temporary_path(self, suffix):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def write_csv(self, rows, columns=CSV_COLUMNS):
+        path = self.temporary_path('.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.DictWriter(csv_file, columns, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def import_rows(self, rows, chunk_size=None, importer=None):
+        importer = importer or DataImporter(chunk_size=chunk_size)
+        results = importer.import_from_csv(self.write_csv(rows))
+        self.assertTrue(results['success'], results)
+        return results
+
+    def stored_tenders(self):
+        """Every imported value by tender_id, organizations by name"""
+        tenders = Tender.objects.select_related('category', 'buyer', 'winner').prefetch_related(
+            'bids__bidder'
+        )
+        return {
+            tender.tender_id: (
+                tender.title, tender.category.name, tender.buyer.name, tender.buyer.district_id,
+                tender.winner.name if tender.winner else None, tender.status,
+                tender.estimated_value, tender.award_amount, tender.publication_date,
+                tender.submission_deadline,
+                {(bid.bidder.name, bid.bid_amount, bid.is_winner) for bid in tender.bids.all()},
+            )
+            for tender in tenders
+        }
+
+
+class EntityResolutionTests(ImportTestCase):
+    """Only names that are certainly the same organization are merged"""
+
+    def resolver(self, *names, district_id=1):
+        resolver = OrganizationResolver()
+        for organization_id, name in enumerate(names, 1):
+            resolver.add(organization_id, name, district_id=district_id)
+        return resolver
+
+    def test_spelling_variants_merge(self):
+        resolver = self.resolver('Rahman Traders Ltd', 'Md. Karim Enterprise')
+        for name, organization_id in (
+            ('M/S. Rahaman Traders Limited', 1),
+            ('Mohammad Karim Enterprises', 2),
+        ):
+            with self.subTest(name=name):
+                match = resolver.resolve(name, district_id=2)
+                self.assertEqual(match['organization_id'], organization_id)
+                self.assertEqual((match['method'], match['merge']), ('normalized', True))
+
+    def test_near_miss_names_are_not_merged(self):
+        for existing, name in (
+            ('Rahim Traders', 'Rahima Traders'),
+            ('Karim', 'Karima'),
+            ('Green Builders', 'Grain Builders'),
+        ):
+            with self.subTest(name=name):
+                match = self.resolver(existing).resolve(name, district_id=1)
+                self.assertTrue(match is None or not match['merge'], match)
+
+    def test_similar_names_merge_only_within_a_district(self):
+        resolver = self.resolver('Meghna Printing and Packaging')
+        match = resolver.resolve('Meghna Printing and Packagings', district_id=1)
+        self.assertEqual((match['method'], match['merge']), ('fuzzy', True))
+        match = resolver.resolve('Meghna Printing and Packagings', district_id=2)
+        self.assertEqual((match['organization_id'], match['merge']), (1, False))
+
+    def test_different_registration_numbers_never_match(self):
+        resolver = OrganizationResolver()
+        resolver.add(1, 'Rahman Traders Limited', 'REG-1', district_id=1)
+        self.assertIsNone(resolver.resolve('Rahman Traders Ltd', 'REG-2', district_id=1))
+        self.assertEqual(resolver.resolve('Rahman Traders Ltd', 'REG-1', district_id=1)['organization_id'], 1)
+
+    def test_import_records_near_misses_for_review(self):
+        self.import_rows(tender_rows('T-1', ['Rahim Traders', 'Green Builders'], 'Rahim Traders'))
+        rahim = Organization.objects.get(name='Rahim Traders')
+
+        results = self.import_rows(tender_rows(
+            'T-2', ['Rahima Traders', 'Grain Builders', 'M/S. Rahim Traders'], 'Rahima Traders'
+        ))
+        self.assertEqual(results['imported_organizations'], 2)
+        self.assertEqual(results['resolved_organizations'], 1)
+        self.assertEqual(results['pending_merges'], 2)
+
+        rahima = Organization.objects.get(name='Rahima Traders')
+        self.assertEqual(Tender.objects.get(tender_id='T-2').winner, rahima)
+        pending = OrganizationMerge.objects.get(name='Rahima Traders')
+        self.assertEqual(
+            (pending.status, pending.method, pending.organization, pending.imported_as),
+            ('pending', 'phonetic', rahim, rahima),
+        )
+        self.assertEqual(
+            OrganizationMerge.objects.get(name='M/S. Rahim Traders').organization, rahim
+        )
+
+        # A re-import finds the new organizations by name, without asking again
+        results = self.import_rows(tender_rows('T-3', ['Rahima Traders'], 'Rahima Traders'))
+        self.assertEqual((results['imported_organizations'], results['pending_merges']), (0, 0))
+        self.assertEqual(Tender.objects.get(tender_id='T-3').winner, rahima)
+
+
+@skipUnless(NUMPY_AVAILABLE, 'NumPy not available')
+class CoBiddingTests(ImportTestCase):
+    """Pair counts and the communities built on them"""
+
+    RING = ('Padma Builders', 'Meghna Supply', 'Jamuna Engineering', 'Karnaphuli Works')
+
+    def test_co_occurrence_matches_pair_counts(self):
+        import numpy as np
+        rng = random.Random(4)
+        entries = [(rng.randrange(60), rng.randrange(40)) for _ in range(500)]
+        expected = {}
+        for group in {group for group, _ in entries}:
+            members = sorted({member for other, member in entries if other == group})
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    expected[(first, second)] = expected.get((first, second), 0) + 1
+
+        groups = np.array([group for group, _ in entries])
+        members = np.array([member for _, member in entries])
+        for name, pairs in (
+            ('co_occurrence', graph_algorithms.co_occurrence(groups, members, 40)),
+            ('expand_pairs', graph_algorithms._expand_pairs(groups, members, 40)),
+        ):
+            with self.subTest(path=name):
+                first, second, shared = pairs
+                self.assertEqual(dict(zip(zip(first.tolist(), second.tolist()), shared.tolist())), expected)
+
+    def test_bid_rotation_ring_is_found(self):
+        rows = []
+        # The ring bids together on eight tenders and takes turns winning
+        for number in range(8):
+            rows += tender_rows(f'RING-{number}', self.RING, self.RING[number % 4])
+        # Other suppliers bid against one ring member at a time
+        for number in range(12):
+            bidders = [f'Independent Supplier {number}', self.RING[number % 4]]
+            rows += tender_rows(f'OPEN-{number}', bidders, bidders[0])
+        self.import_rows(rows)
+
+        results = CoBiddingAnalyzer().analyze()
+        self.assertEqual(results['summary']['communities'], 1)
+        community = results['communities'][0]
+        self.assertEqual({supplier['name'] for supplier in community['suppliers']}, set(self.RING))
+        self.assertEqual(community['shared_tenders'], 8)
+        self.assertEqual(community['win_rotation'], 1.0)
+
+
+class CSVImportTests(ImportTestCase):
+    """Chunked CSV imports with per-row validation"""
+
+    def test_chunks_never_split_a_tender(self):
+        rows = []
+        for number in range(5):
+            rows += tender_rows(f'T-{number}', ['Padma Builders', 'Meghna Supply', 'Jamuna Works'],
+                                'Meghna Supply')
+        results = self.import_rows(rows, chunk_size=4)
+
+        # A chunk closes at the first tender boundary after chunk_size rows
+        self.assertEqual([chunk['rows'] for chunk in results['chunks']], [6, 6, 3])
+        self.assertEqual(
+            (results['imported_tenders'], results['imported_bids'], results['imported_organizations']),
+            (5, 15, 4),
+        )
+        self.assertEqual(
+            results['load_method'], 'copy' if connection.vendor == 'postgresql' else 'executemany'
+        )
+        for tender in self.stored_tenders().values():
+            self.assertEqual(tender[4:6], ('Meghna Supply', 'awarded'))
+            self.assertEqual(len(tender[-1]), 3)
+
+    def test_invalid_rows_are_rejected_and_reported(self):
+        rows = tender_rows('T-1', ['Padma Builders'], 'Padma Builders')
+        rows += tender_rows('T-2', ['Padma Builders'], buyer_district='Atlantis')
+        rows += tender_rows('T-3', ['Padma Builders'], estimated_value='a lot')
+        rows += tender_rows('T-4', ['Padma Builders'], status='pending')
+        results = self.import_rows(rows)
+
+        self.assertEqual((results['imported_tenders'], results['rejected_rows']), (1, 3))
+        errors = results['chunks'][0]['errors']
+        self.assertEqual([error['row'] for error in errors], [3, 4, 5])
+        self.assertEqual([error['tender_id'] for error in errors], ['T-2', 'T-3', 'T-4'])
+        self.assertEqual(list(self.stored_tenders()), ['T-1'])
+
+    def test_missing_columns_fail_the_import(self):
+        path = self.write_csv(tender_rows('T-1', ['Padma Builders']), columns=('tender_id', 'title'))
+        results = DataImporter().import_from_csv(path)
+        self.assertFalse(results['success'])
+        self.assertIn('buyer_district', results['error'])
+        self.assertFalse(Tender.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY needs PostgreSQL')
+class CopyImportTests(ImportTestCase):
+    """COPY must store exactly what batched inserts store"""
+
+    def test_copy_matches_executemany(self):
+        rows = tender_rows(
+            'T-1', ['Padma Builders', 'মেঘনা ট্রেডার্স'], 'মেঘনা ট্রেডার্স',
+            title='Roads, "phase 2"\tdelimiters', description='Line one\nLine two \\N',
+            award_amount='950000.50',
+        )
+        rows += tender_rows('T-2', ['Jamuna Works'], estimated_value='1234567.89', award_amount='')
+        rows += tender_rows('T-3', [''], title='Published, no bids yet')
+
+        results = self.import_rows(rows)
+        self.assertEqual(results['load_method'], 'copy')
+        copied = self.stored_tenders()
+        self.assertEqual(len(copied), 3)
+        descriptions = dict(Tender.objects.values_list('tender_id', 'description'))
+
+        Tender.objects.all().delete()
+        Organization.objects.all().delete()
+        importer = DataImporter()
+        importer._copy_supported = lambda: False
+        results = self.import_rows(rows, importer=importer)
+        self.assertEqual(results['load_method'], 'executemany')
+        self.assertEqual(self.stored_tenders(), copied)
+        self.assertEqual(dict(Tender.objects.values_list('tender_id', 'description')), descriptions)
+
+
+class FingerprintImportTests(ImportTestCase):
+    """Re-imports write only the rows whose values changed"""
+
+    def rows(self, **changes):
+        rows = []
+        for number in range(4):
+            rows += tender_rows(f'T-{number}', ['Padma Builders', 'Meghna Supply'], 'Padma Builders')
+        for row in rows:
+            row.update(changes.get(row['tender_id'], {}))
+        return rows
+
+    def test_unchanged_reimport_writes_nothing(self):
+        self.import_rows(self.rows())
+        RiskChange.objects.all().delete()
+        updated = dict(Tender.objects.values_list('tender_id', 'updated_at'))
+
+        results = self.import_rows(self.rows())
+        self.assertEqual(
+            (results['imported_tenders'], results['updated_tenders'], results['imported_bids'],
+             results['updated_bids'], results['unchanged_tenders'], results['changed_tenders']),
+            (0, 0, 0, 0, 4, 0),
+        )
+        self.assertEqual(dict(Tender.objects.values_list('tender_id', 'updated_at')), updated)
+        self.assertFalse(RiskChange.objects.exists())
+
+    def test_changed_rows_are_updated_and_logged(self):
+        self.import_rows(self.rows())
+        RiskChange.objects.all().delete()
+        padma = Organization.objects.get(name='Padma Builders')
+        meghna = Organization.objects.get(name='Meghna Supply')
+
+        rows = self.rows(**{
+            'T-1': {'estimated_value': '2000000'},
+            'T-2': {'winner': 'Meghna Supply'},
+        })
+        for row in rows:
+            if row['tender_id'] == 'T-2':
+                row['is_winner'] = 'true' if row['bidder'] == 'Meghna Supply' else 'false'
+        results = self.import_rows(rows)
+
+        self.assertEqual(
+            (results['updated_tenders'], results['updated_bids'], results['unchanged_tenders']),
+            (2, 2, 2),
+        )
+        self.assertEqual(Tender.objects.get(tender_id='T-1').estimated_value, 2000000)
+        self.assertEqual(Tender.objects.get(tender_id='T-2').winner, meghna)
+        t1, t2 = (Tender.objects.get(tender_id=tender_id).pk for tender_id in ('T-1', 'T-2'))
+        buyer = Tender.objects.get(tender_id='T-2').buyer_id
+        # The moved award logs the tender with its old and new pairs
+        self.assertEqual(
+            set(RiskChange.objects.values_list('tender_id', 'buyer_id', 'winner_id')),
+            {(t1, buyer, padma.pk), (t2, buyer, padma.pk), (t2, buyer, meghna.pk)},
+        )
+        edges = set(NetworkEdge.objects.values_list('organization_id', 'counterparty_id', 'weight'))
+        network_index.rebuild()
+        self.assertEqual(
+            edges, set(NetworkEdge.objects.values_list('organization_id', 'counterparty_id', 'weight'))
+        )
+
+
+class OCDSImportTests(ImportTestCase):
+    """OCDS packages and JSON Lines map onto the CSV import"""
+
+    def releases(self):
+        parties = [
+            {'id': 'B1', 'name': 'Roads Department', 'identifier': {'id': 'GOV-1'},
+             'address': {'locality': 'Dhaka'}},
+            {'id': 'S1', 'name': 'Padma Builders', 'identifier': {'id': 'REG-1'},
+             'address': {'region': 'Sylhet'}},
+            {'id': 'S2', 'name': 'Meghna Supply', 'address': {'locality': 'Nowhere'}},
+        ]
+        awarded = {
+            'ocid': 'ocds-test-001',
+            'date': '2024-01-20T00:00:00Z',
+            'parties': parties,
+            'buyer': {'id': 'B1'},
+            'tender': {
+                'title': 'Road repair',
+                'mainProcurementCategory': 'works',
+                'status': 'complete',
+                'value': {'amount': 1000000.5, 'currency': 'BDT'},
+                'tenderPeriod': {'startDate': '2024-01-01T00:00:00Z', 'endDate': '2024-01-15T00:00:00Z'},
+            },
+            'awards': [{'status': 'active', 'suppliers': [{'id': 'S1'}], 'value': {'amount': 950000},
+                        'date': '2024-01-20T00:00:00Z'}],
+            'bids': {'details': [
+                {'tenderers': [{'id': 'S1'}], 'value': {'amount': 950000}, 'date': '2024-01-10T00:00:00Z'},
+                {'tenderers': [{'id': 'S2'}], 'value': {'amount': 990000}, 'date': '2024-01-11T00:00:00Z'},
+                {'status': 'withdrawn', 'tenderers': [{'id': 'S2'}], 'value': {'amount': 1}},
+            ]},
+        }
+        published = {
+            'ocid': 'ocds-test-002',
+            'date': '2024-02-01T00:00:00Z',
+            'parties': parties,
+            'buyer': {'id': 'B1'},
+            'tender': {
+                'title': 'School furniture',
+                'items': [{'classification': {'description': 'Education'}}],
+                'value': {'amount': 500000, 'currency': 'BDT'},
+                'tenderPeriod': {'startDate': '2024-02-01T00:00:00Z', 'endDate': '2024-02-20T00:00:00Z'},
+            },
+        }
+        return awarded, published
+
+    def import_file(self, suffix, content, compress=False):
+        path = self.temporary_path(suffix)
+        opener = gzip.open if compress else open
+        with opener(path, 'wt', encoding='utf-8') as ocds_file:
+            ocds_file.write(content)
+        results = OCDSImporter().import_from_file(path)
+        self.assertTrue(results['success'], results)
+        return self.stored_tenders()
+
+    def test_release_package(self):
+        awarded, published = self.releases()
+        stored = self.import_file('.json', json.dumps({'publisher': {'name': 'Test'},
+                                                       'releases': [awarded, published]}))
+
+        self.assertEqual(stored['ocds-test-001'][:8], (
+            'Road repair', 'Works', 'Roads Department', District.objects.get(name='Dhaka').pk,
+            'Padma Builders', 'awarded', Decimal('1000000.50'), Decimal('950000.00'),
+        ))
+        self.assertEqual(stored['ocds-test-001'][-1], {
+            ('Padma Builders', Decimal('950000.00'), True),
+            ('Meghna Supply', Decimal('990000.00'), False),
+        })
+        self.assertEqual(stored['ocds-test-002'][1:6], (
+            'Education', 'Roads Department', District.objects.get(name='Dhaka').pk, None, 'published',
+        ))
+        self.assertEqual(
+            dict(Organization.objects.values_list('name', 'registration_number')),
+            {'Roads Department': 'GOV-1', 'Padma Builders': 'REG-1', 'Meghna Supply': ''},
+        )
+        # Bidders in an unknown district are placed in their buyer's
+        self.assertEqual(
+            dict(Organization.objects.values_list('name', 'district__name')),
+            {'Roads Department': 'Dhaka', 'Padma Builders': 'Sylhet', 'Meghna Supply': 'Dhaka'},
+        )
+
+    def test_other_layouts_match_the_release_package(self):
+        awarded, published = self.releases()
+        expected = self.import_file('.json', json.dumps({'releases': [awarded, published]}))
+        # An earlier release of the same process, superseded by the later one
+        planned = {**awarded, 'tender': {**awarded['tender'], 'title': 'Planned road repair'},
+                   'awards': [], 'bids': {}}
+        del planned['awards'], planned['bids']
+        layouts = (
+            ('.jsonl.gz', '\n'.join(json.dumps(release) for release in (planned, awarded, published)),
+             True),
+            ('.json', json.dumps({'records': [
+                {'ocid': release['ocid'], 'compiledRelease': release} for release in (awarded, published)
+            ]}), False),
+            ('.json', json.dumps([awarded, published]), False),
+        )
+        for suffix, content, compress in layouts:
+            with self.subTest(suffix=suffix, content=content[:30]):
+                Tender.objects.all().delete()
+                Organization.objects.all().delete()
+                self.assertEqual(self.import_file(suffix, content, compress), expected)
+
+    def test_malformed_file_keeps_earlier_chunks(self):
+        awarded, published = self.releases()
+        later = {**published, 'ocid': 'ocds-test-003'}
+        # A release may continue in the next one, and a chunk in the next release, so the
+        # last two complete releases are still pending when the file breaks off
+        content = '\n'.join(json.dumps(release) for release in (awarded, published, later))
+        content += '\n' + json.dumps(awarded)[:40]
+        path = self.temporary_path('.jsonl')
+        with open(path, 'w', encoding='utf-8') as ocds_file:
+            ocds_file.write(content)
+        results = OCDSImporter(chunk_size=1).import_from_file(path)
+        self.assertFalse(results['success'])
+        self.assertEqual(list(self.stored_tenders()), ['ocds-test-001'])
@@ -0,0 +1,182 @@
+"""
+Order-statistic index over tender estimated values
+Answers medians and percentiles without re-reading the tender table
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from decimal import Decimal
+from django.db.models import Count, Max
+from dashboard.models import Tender, Organization, NetworkSnapshotState
+
+
+class TenderValueIndex:
+    """Sorted tender values, globally and per category and buyer district
+
+    Values are held as integer cents in sorted arrays, so a median or
+    percentile is an O(1) lookup and an insert or delete is a binary
+    search plus one array shift. The index is built from one ordered
+    query, kept current by the Tender signals in this process, and
+    rebuilt when another process has changed the table.
+
+    Changes are detected by the tender count, the newest updated_at and
+    the network data version, which organization saves (and so district
+    moves) bump. Writes that move none of them, such as QuerySet.update()
+    without updated_at or raw SQL, must call NetworkSnapshotState.invalidate().
+    """
+
+    SCOPES = ('category', 'district')
+
+    def __init__(self, check_interval=60):
+        # Seconds between checks for changes made by other processes
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._checked_at = 0
+        self._state = None
+        self._all = array('q')
+        self._groups = {scope: {} for scope in self.SCOPES}
+        self._buyer_districts = {}
+
+    def ensure_current(self, force=False):
+        """Rebuild the index if the tender table changed behind our back"""
+        with self._lock:
+            if self._loaded and not force and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            state = self._table_state()
+            if not self._loaded or state != self._state:
+                self.rebuild(state)
+            self._checked_at = time.monotonic()
+
+    def rebuild(self, state=None):
+        """Load every tender value, already sorted by the database"""
+        with self._lock:
+            self._all = array('q')
+            self._groups = {scope: {} for scope in self.SCOPES}
+            self._buyer_districts = dict(Organization.objects.values_list('id', 'district_id'))
+
+            rows = Tender.objects.order_by('estimated_value').values_list(
+                'estimated_value', 'category_id', 'buyer_id'
+            )
+            for value, category_id, buyer_id in rows.iterator(chunk_size=5000):
+                cents = self._to_cents(value)
+                # Appending in value order keeps every array sorted
+                self._all.append(cents)
+                for values in self._group_arrays(category_id, buyer_id):
+                    values.append(cents)
+
+            self._state = state or self._table_state()
+            self._loaded = True
+
+    def add(self, value, category_id, buyer_id, updated_at=None):
+        """Insert one tender value"""
+        with self._lock:
+            if not self._loaded:
+                return
+            cents = self._to_cents(value)
+            insort(self._all, cents)
+            for values in self._group_arrays(category_id, buyer_id):
+                insort(values, cents)
+            self._track_local_change(1, updated_at)
+
+    def remove(self, value, category_id, buyer_id):
+        """Delete one tender value"""
+        with self._lock:
+            if not self._loaded:
+                return
+            cents = self._to_cents(value)
+            self._discard(self._all, cents)
+            for values in self._group_arrays(category_id, buyer_id):
+                self._discard(values, cents)
+            self._track_local_change(-1, None)
+
+    def replace(self, old, new, updated_at=None):
+        """Move a tender from its old (value, category, buyer) to the new one"""
+        with self._lock:
+            if not self._loaded:
+                return
+            if old == new:
+                self._track_local_change(0, updated_at)
+                return
+            self.remove(*old)
+            self.add(*new, updated_at=updated_at)
+
+    def median(self, scope=None, key=None):
+        """Median value of all tenders, or of one category or district"""
+        self.ensure_current()
+        values = self._values(scope, key)
+        n = len(values)
+        if not n:
+            return 0
+        if n % 2 == 0:
+            return Decimal(values[n//2 - 1] + values[n//2]) / 200
+        return Decimal(values[n//2]) / 100
+
+    def percentile(self, q, scope=None, key=None):
+        """Linearly interpolated percentile (0-100) of tender values"""
+        self.ensure_current()
+        values = self._values(scope, key)
+        if not values:
+            return 0
+        position = Decimal(str(q)) / 100 * (len(values) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        fraction = position - lower
+        return (values[lower] + (values[upper] - values[lower]) * fraction) / 100
+
+    def count(self, scope=None, key=None):
+        """Number of tender values in a scope"""
+        self.ensure_current()
+        return len(self._values(scope, key))
+
+    def medians(self, scope, min_count=1):
+        """Median per category or district, for groups with min_count values"""
+        self.ensure_current()
+        with self._lock:
+            keys = [key for key, values in self._groups[scope].items() if len(values) >= min_count]
+        return {key: self.median(scope, key) for key in keys}
+
+    def _values(self, scope, key):
+        if scope is None:
+            return self._all
+        return self._groups[scope].get(key, ())
+
+    def _group_arrays(self, category_id, buyer_id):
+        district_id = self._district_for(buyer_id)
+        return (
+            self._groups['category'].setdefault(category_id, array('q')),
+            self._groups['district'].setdefault(district_id, array('q')),
+        )
+
+    def _district_for(self, buyer_id):
+        if buyer_id not in self._buyer_districts:
+            self._buyer_districts[buyer_id] = Organization.objects.filter(
+                pk=buyer_id
+            ).values_list('district_id', flat=True).first()
+        return self._buyer_districts[buyer_id]
+
+    def _discard(self, values, cents):
+        position = bisect_left(values, cents)
+        if position < len(values) and values[position] == cents:
+            del values[position]
+
+    def _track_local_change(self, count_delta, updated_at):
+        # Keep the table snapshot in step so our own writes don't force a rebuild
+        count, last_updated, version = self._state
+        if updated_at is not None and (last_updated is None or updated_at > last_updated):
+            last_updated = updated_at
+        self._state = (count + count_delta, last_updated, version)
+
+    def _table_state(self):
+        state = Tender.objects.aggregate(count=Count('id'), last_updated=Max('updated_at'))
+        # current() creates the row, so later invalidations have one to bump
+        version = NetworkSnapshotState.current().data_version
+        return (state['count'], state['last_updated'], version)
+
+    def _to_cents(self, value):
+        return int(Decimal(value) * 100)
+
+
+# Shared per-process index used by the risk analyzer and the Tender signals
+value_index = TenderValueIndex()
@@ -106,6 +106,15 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Memory-mapped buyer-supplier graph shared by all workers
+NETWORK_GRAPH_PATH = config('NETWORK_GRAPH_PATH', default=str(BASE_DIR / 'network_graph.csr'))
+
+# Network clustering and triangles are estimated above this many organizations,
+# to within NETWORK_STATS_ERROR at 95% confidence or NETWORK_STATS_TIME_BUDGET seconds
+NETWORK_STATS_APPROXIMATE_ABOVE = config('NETWORK_STATS_APPROXIMATE_ABOVE', default=100000, cast=int)
+NETWORK_STATS_ERROR = config('NETWORK_STATS_ERROR', default=0.01, cast=float)
+NETWORK_STATS_TIME_BUDGET = config('NETWORK_STATS_TIME_BUDGET', default=10.0, cast=float)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 